@@ -0,0 +1,234 @@
+"""
+Scene-Build Profiler
+Times how long a scene takes to build, separately from rendering. While the
+scene's entry point (create_scene for the VJ loop) runs, every function defined
+in the scene script and in the repo modules it imports (material builders,
+instancing, LOD, layout) is wrapped, and so is every bpy.ops call. Each call
+records wall time, call count and the depsgraph updates fired while it was
+on top of the stack.
+
+The result is a call tree: a flame-style summary printed with total and self
+time per node, plus optional JSON (tree and per-function totals) and folded
+stacks ("a;b;c <self us>") for flamegraph.pl or speedscope. Builder code that
+is not in a function of its own (the compositor setup inside create_scene)
+shows up as the self time of its caller.
+
+Usage:
+  blender --background --python build_profiler.py -- [--json outputs/build_profile.json] [--folded outputs/build.folded]
+  blender --background --python build_profiler.py -- --script scene_03_vj_loop.py --entry create_scene --min-ms 1
+"""
+
+import argparse
+import functools
+import importlib.util
+import json
+import os
+import sys
+import time
+import types
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from script_env import SCRIPT_DIR  # noqa: E402
+
+BAR_WIDTH = 24
+
+
+def load_script_module(path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    assert spec and spec.loader
+    spec.loader.exec_module(module)
+    return module
+
+
+def _node(name):
+    return {'name': name, 'calls': 0, 'total': 0.0, 'depsgraph': 0, 'children': {}}
+
+
+class BuildProfiler:
+    """Call tree of wrapped builder functions and bpy.ops calls, with depsgraph update counts."""
+
+    def __init__(self):
+        self.root = _node('build')
+        self.stack = [self.root]
+        self.patched = []
+        self.op_type = None
+        self.op_call = None
+
+    def _call(self, name, fn, *args, **kwargs):
+        parent = self.stack[-1]
+        node = parent['children'].setdefault(name, _node(name))
+        self.stack.append(node)
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            node['total'] += time.perf_counter() - start
+            node['calls'] += 1
+            self.stack.pop()
+
+    def wrap(self, name, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return self._call(name, fn, *args, **kwargs)
+        return wrapper
+
+    def on_depsgraph_update(self, scene, depsgraph):
+        self.stack[-1]['depsgraph'] += 1
+
+    def install(self, modules):
+        """Wrap the repo functions in `modules`, bpy.ops calls and the depsgraph update handler."""
+        names = {m.__name__ for m in modules}
+        wrappers = {}
+        for module in modules:
+            for attr, value in list(vars(module).items()):
+                if not isinstance(value, types.FunctionType) or value.__module__ not in names:
+                    continue
+                if value not in wrappers:
+                    wrappers[value] = self.wrap(f"{value.__module__}.{value.__name__}", value)
+                self.patched.append((module, attr, value))
+                setattr(module, attr, wrappers[value])
+
+        # Operators are instances of one Python wrapper class; patch its __call__
+        self.op_type = type(bpy.ops.object.select_all)
+        self.op_call = self.op_type.__call__
+        profiler, op_call = self, self.op_call
+
+        def call(op, *args, **kwargs):
+            return profiler._call(f"bpy.ops.{op.idname_py()}", op_call, op, *args, **kwargs)
+
+        self.op_type.__call__ = call
+        bpy.app.handlers.depsgraph_update_post.append(self.on_depsgraph_update)
+
+    def remove(self):
+        for module, attr, value in self.patched:
+            setattr(module, attr, value)
+        self.patched = []
+        if self.op_type is not None:
+            self.op_type.__call__ = self.op_call
+        if self.on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+            bpy.app.handlers.depsgraph_update_post.remove(self.on_depsgraph_update)
+
+    def profile(self, fn, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.root['total'] += time.perf_counter() - start
+            self.root['calls'] += 1
+
+
+# --- Reports ---
+
+def self_time(node):
+    return node['total'] - sum(c['total'] for c in node['children'].values())
+
+
+def tree_json(node):
+    children = sorted(node['children'].values(), key=lambda c: -c['total'])
+    return {'name': node['name'], 'calls': node['calls'], 'total_ms': node['total'] * 1000.0,
+            'self_ms': self_time(node) * 1000.0, 'depsgraph_updates': node['depsgraph'],
+            'children': [tree_json(c) for c in children]}
+
+
+def flat_totals(node, totals=None):
+    """Per function / operator: calls, total and self time over the whole tree."""
+    totals = {} if totals is None else totals
+    for child in node['children'].values():
+        entry = totals.setdefault(child['name'], {'calls': 0, 'total_ms': 0.0, 'self_ms': 0.0, 'depsgraph_updates': 0})
+        entry['calls'] += child['calls']
+        entry['total_ms'] += child['total'] * 1000.0
+        entry['self_ms'] += self_time(child) * 1000.0
+        entry['depsgraph_updates'] += child['depsgraph']
+        flat_totals(child, totals)
+    return totals
+
+
+def depsgraph_updates(node):
+    return node['depsgraph'] + sum(depsgraph_updates(c) for c in node['children'].values())
+
+
+def folded_stacks(node, prefix=()):
+    """Folded stack lines with self time in microseconds."""
+    path = prefix + (node['name'],)
+    lines = [f"{';'.join(path)} {int(round(self_time(node) * 1e6))}"]
+    for child in node['children'].values():
+        lines += folded_stacks(child, path)
+    return lines
+
+
+def print_flame(node, total, min_ms=0.5, depth=0):
+    """Indented call tree, widest first, with a bar of each node's share of the build."""
+    if depth == 0:
+        print(f"{'total ms':>10} {'self ms':>9} {'calls':>6} {'dg upd':>6}  {'':<{BAR_WIDTH}}  name")
+    share = node['total'] / total if total > 0 else 0.0
+    bar = "#" * int(round(share * BAR_WIDTH))
+    print(f"{node['total'] * 1000:10.1f} {self_time(node) * 1000:9.1f} {node['calls']:6d} "
+          f"{node['depsgraph']:6d}  {bar:<{BAR_WIDTH}}  {'  ' * depth}{node['name']}")
+    hidden = 0
+    for child in sorted(node['children'].values(), key=lambda c: -c['total']):
+        if child['total'] * 1000 < min_ms:
+            hidden += 1
+            continue
+        print_flame(child, total, min_ms, depth + 1)
+    if hidden:
+        print(f"{'':>36}  {'':<{BAR_WIDTH}}  {'  ' * (depth + 1)}({hidden} more under {min_ms} ms)")
+
+
+def repo_modules(module):
+    """The script module plus every loaded module that lives in the repo."""
+    modules = [module]
+    for other in list(sys.modules.values()):
+        path = getattr(other, '__file__', None) or ""
+        if path and other is not module and other.__name__ != __name__ \
+                and os.path.dirname(os.path.abspath(path)) == SCRIPT_DIR:
+            modules.append(other)
+    return modules
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Profile scene building: time, operator calls, depsgraph updates")
+    parser.add_argument('--script', default="scene_03_vj_loop.py", help="Scene script to build")
+    parser.add_argument('--entry', default="create_scene", help="Builder entry point in the script")
+    parser.add_argument('--json', default=None, help="Write the call tree and per-function totals here")
+    parser.add_argument('--folded', default=None, help="Write folded stacks (flamegraph.pl / speedscope) here")
+    parser.add_argument('--min-ms', type=float, default=0.5, help="Hide calls shorter than this in the summary")
+    args = parser.parse_args(argv)
+
+    script = os.path.join(SCRIPT_DIR, args.script)
+    module = load_script_module(script)
+    profiler = BuildProfiler()
+    profiler.install(repo_modules(module))
+    try:
+        profiler.profile(getattr(module, args.entry))
+    finally:
+        profiler.remove()
+
+    root = profiler.root
+    print(f"\nBuild profile: {args.script}:{args.entry}")
+    print_flame(root, root['total'], args.min_ms)
+    ops = {name: t for name, t in flat_totals(root).items() if name.startswith("bpy.ops.")}
+    print(f"{sum(t['calls'] for t in ops.values())} operator calls "
+          f"({sum(t['total_ms'] for t in ops.values()):.1f} ms), {depsgraph_updates(root)} depsgraph updates")
+
+    if args.json:
+        os.makedirs(os.path.dirname(os.path.abspath(args.json)), exist_ok=True)
+        with open(args.json, 'w') as f:
+            json.dump({'script': args.script, 'entry': args.entry, 'blender': bpy.app.version_string,
+                       'total_ms': root['total'] * 1000.0, 'tree': tree_json(root),
+                       'functions': flat_totals(root)}, f, indent=2)
+        print(f"Profile written to: {args.json}")
+    if args.folded:
+        os.makedirs(os.path.dirname(os.path.abspath(args.folded)), exist_ok=True)
+        with open(args.folded, 'w') as f:
+            f.write("\n".join(folded_stacks(root)) + "\n")
+        print(f"Folded stacks written to: {args.folded}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Frame I/O helpers shared by the NumPy-based builders and post stages.
+Images are exchanged as float32 arrays shaped (height, width, 4), top row first.
+"""
+
+import glob
+import os
+import subprocess
+
+import bpy
+import numpy as np
+
+FFMPEG = os.environ.get("FFMPEG", "ffmpeg")
+
+
+def to_rgba(pixels: np.ndarray) -> np.ndarray:
+    """Expand a (h, w), (h, w, 1), (h, w, 3) or (h, w, 4) array to float32 RGBA."""
+    pixels = np.asarray(pixels, dtype=np.float32)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    channels = pixels.shape[2]
+    if channels == 4:
+        return pixels
+    if channels == 1:
+        rgb = np.repeat(pixels, 3, axis=2)
+    else:
+        rgb = pixels[:, :, :3]
+    alpha = np.ones(pixels.shape[:2] + (1,), dtype=np.float32)
+    return np.concatenate([rgb, alpha], axis=2)
+
+
+def srgb_to_linear(values: np.ndarray) -> np.ndarray:
+    """sRGB-encoded values (byte images) to scene-linear, per IEC 61966-2-1."""
+    values = np.clip(values, 0.0, None)
+    return np.where(values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4).astype(np.float32)
+
+
+def linear_to_srgb(values: np.ndarray) -> np.ndarray:
+    """Scene-linear values to sRGB display encoding (IEC 61966-2-1 OETF), clipped to 0..1."""
+    values = np.clip(values, 0.0, 1.0)
+    return np.where(values <= 0.0031308, values * 12.92, 1.055 * values ** (1.0 / 2.4) - 0.055).astype(np.float32)
+
+
+def image_to_array(img) -> np.ndarray:
+    """Return the pixels of a bpy image datablock as an (h, w, 4) float32 array."""
+    width, height = img.size
+    channels = img.channels
+    buf = np.empty(width * height * channels, dtype=np.float32)
+    img.pixels.foreach_get(buf)
+    # Blender stores rows bottom-up
+    return to_rgba(buf.reshape(height, width, channels)[::-1])
+
+
+def load_image_array(path: str, non_color: bool = False) -> np.ndarray:
+    """Load an image through Blender and return its pixels as an (h, w, 4) float32 array.
+    - non_color: read data maps (depth, masks, motion vectors) without colour management
+      or alpha premultiplication
+    """
+    img = bpy.data.images.load(os.path.abspath(path), check_existing=False)
+    try:
+        if non_color:
+            img.colorspace_settings.name = 'Non-Color'
+            img.alpha_mode = 'CHANNEL_PACKED'
+        return image_to_array(img)
+    finally:
+        bpy.data.images.remove(img)
+
+
+def save_image_array(path: str, pixels: np.ndarray, file_format: str = 'PNG'):
+    """Write an (h, w, C) array to disk through Blender's image writer.
+    Byte formats (PNG, JPEG) store values as-is, so pass display-referred pixels.
+    """
+    rgba = to_rgba(pixels)
+    height, width = rgba.shape[:2]
+    float_buffer = file_format in ('OPEN_EXR', 'OPEN_EXR_MULTILAYER', 'HDR')
+    img = bpy.data.images.new(os.path.basename(path), width, height, alpha=True, float_buffer=float_buffer)
+    try:
+        img.pixels.foreach_set(np.ascontiguousarray(rgba[::-1]).ravel())
+        img.filepath_raw = os.path.abspath(path)
+        img.file_format = file_format
+        img.save()
+    finally:
+        bpy.data.images.remove(img)
+
+
+def save_render_array(path: str, pixels: np.ndarray, scene):
+    """Write scene-linear pixels the way a render is saved: through the scene's
+    view transform, look and output image settings.
+    """
+    rgba = to_rgba(pixels)
+    height, width = rgba.shape[:2]
+    img = bpy.data.images.new(os.path.basename(path), width, height, alpha=True, float_buffer=True)
+    try:
+        img.pixels.foreach_set(np.ascontiguousarray(rgba[::-1]).ravel())
+        img.save_render(os.path.abspath(path), scene=scene)
+    finally:
+        bpy.data.images.remove(img)
+
+
+def add_pass_output(scene, out_dir: str, passes: dict, prefix: str = "", denoise=()):
+    """Add a compositor File Output node writing Render Layers passes as 32-bit EXR.
+    - passes: file tag -> Render Layers output name, e.g. {'albedo': 'Denoising Albedo'}
+    - denoise: tags to run through a Denoise node (needs denoising_store_passes)
+    Files are named <prefix><tag>_<frame>.exr; existing compositor nodes are kept.
+    """
+    scene.render.use_compositing = True
+    scene.use_nodes = True
+    tree = scene.node_tree
+    layers = next((n for n in tree.nodes if n.type == 'R_LAYERS'), None)
+    if layers is None:
+        layers = tree.nodes.new(type='CompositorNodeRLayers')
+    output = tree.nodes.new(type='CompositorNodeOutputFile')
+    output.base_path = out_dir
+    output.format.file_format = 'OPEN_EXR'
+    output.format.color_depth = '32'
+    output.format.exr_codec = 'ZIP'
+    output.file_slots.clear()
+    for i, (tag, socket) in enumerate(passes.items()):
+        output.file_slots.new(f"{prefix}{tag}_")
+        source = layers.outputs[socket]
+        if tag in denoise:
+            node = tree.nodes.new(type='CompositorNodeDenoise')
+            tree.links.new(source, node.inputs['Image'])
+            tree.links.new(layers.outputs['Denoising Albedo'], node.inputs['Albedo'])
+            tree.links.new(layers.outputs['Denoising Normal'], node.inputs['Normal'])
+            source = node.outputs['Image']
+        tree.links.new(source, output.inputs[i])
+    return output
+
+
+def find_pass_file(out_dir: str, prefix: str, tag: str, frame: int = None) -> str:
+    """Path of a pass written by add_pass_output (latest frame if frame is None)."""
+    number = "*" if frame is None else f"{frame:04d}"
+    matches = sorted(glob.glob(os.path.join(out_dir, f"{prefix}{tag}_{number}.exr")))
+    if not matches:
+        raise FileNotFoundError(f"Missing {prefix}{tag} pass in {out_dir}")
+    return matches[-1]
+
+
+def to_uint8_rgb(pixels: np.ndarray) -> np.ndarray:
+    """Quantise display-referred float pixels to contiguous 8-bit RGB."""
+    rgb = np.clip(np.asarray(pixels)[:, :, :3], 0.0, 1.0) * 255.0 + 0.5
+    return np.ascontiguousarray(rgb.astype(np.uint8))
+
+
+def _h264_args(fps: int, crf: int):
+    """ffmpeg output options shared by every encode path."""
+    return ['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-crf', str(crf), '-g', str(fps * 2), '-bf', '2']
+
+
+def encode_frames(frames, output_path: str, fps: int, crf: int = 18):
+    """Pipe display-referred frames into ffmpeg as H.264 (same settings as vj_notes.md).
+    - frames: iterable of (h, w, C) float arrays in 0..1
+    Returns the number of frames written.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    proc = None
+    count = 0
+    try:
+        for frame in frames:
+            if proc is None:
+                height, width = frame.shape[:2]
+                cmd = [
+                    FFMPEG, '-y', '-loglevel', 'error',
+                    '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(fps),
+                    '-i', '-',
+                    *_h264_args(fps, crf), output_path,
+                ]
+                proc = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+            proc.stdin.write(to_uint8_rgb(frame).tobytes())
+            count += 1
+    finally:
+        if proc is not None:
+            proc.stdin.close()
+            if proc.wait() != 0:
+                raise RuntimeError(f"ffmpeg failed while encoding {output_path}")
+    return count
+
+
+def encode_image_sequence(pattern: str, output_path: str, fps: int, start_number: int = 1, crf: int = 18,
+                          filters: str = None):
+    """Encode a numbered image sequence (ffmpeg pattern such as frames/%04d.png) to H.264.
+    - filters: optional ffmpeg -vf filter chain applied while encoding
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    cmd = [
+        FFMPEG, '-y', '-loglevel', 'error',
+        '-framerate', str(fps), '-start_number', str(start_number), '-i', pattern,
+        *(['-vf', filters] if filters else []),
+        *_h264_args(fps, crf), output_path,
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def encode_minterpolated(pattern: str, output_path: str, fps: int, factor: int, frame_count: int,
+                         start_number: int = 1, crf: int = 18):
+    """Encode a looping image sequence at fps * factor with ffmpeg's motion-compensated
+    minterpolate. The pattern must hold frame_count frames plus a copy of the first one
+    after the last, so the in-betweens wrap across the loop seam; that extra frame is
+    trimmed from the output. Source frames land unchanged on every factor-th frame.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    out_fps = fps * factor
+    cmd = [
+        FFMPEG, '-y', '-loglevel', 'error',
+        '-framerate', str(fps), '-start_number', str(start_number), '-i', pattern,
+        '-vf', f'minterpolate=fps={out_fps}:mi_mode=mci:mc_mode=aobmc:me_mode=bidir:vsbmc=1',
+        '-frames:v', str(frame_count * factor),
+        *_h264_args(out_fps, crf), output_path,
+    ]
+    subprocess.run(cmd, check=True)
@@ -0,0 +1,271 @@
+"""
+Post-Render Colour Grading for the VJ loops
+Renders a loop once to scene-linear EXR frames, then exports any number of
+colour variants from them: ASC CDL, exposure and 3D LUT looks applied with
+NumPy over frame batches, so a cooler or warmer cut of a finished loop takes
+minutes instead of a re-render. Palettes baked into the shaders (the world
+colour, the lava and marble colour ramps) can be pushed around afterwards.
+
+A look is a list of operations, applied in order:
+  {'exposure': stops}                                     scene-linear
+  {'cdl': {'slope', 'offset', 'power', 'saturation'}}     scene-linear (Rec.709 luma)
+  {'lut': path.cube, 'space': 'linear'}                   trilinear NumPy lookup, .cube domain
+  {'lut': path.cube, 'space': 'display'}                  ffmpeg lut3d after the view transform (last op only)
+Graded frames go through the render's view transform (recorded at render time).
+
+Looks are registered per loop: DEFAULT_LOOKS below, extended or overridden by
+looks.json (`register`). Each batch of frames is loaded once and graded with
+every requested look.
+
+Usage:
+  blender --background --python grade.py -- render [--preview]
+  blender --background --python grade.py -- apply --looks cool warm noir
+  blender --background --python grade.py -- register vj_loop teal --spec teal.json
+  blender --background --python grade.py -- list
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import encode_image_sequence, load_image_array, save_render_array  # noqa: E402
+from script_env import SCRIPT_DIR, load_vj_module  # noqa: E402
+
+LOOKS_PATH = os.path.join(SCRIPT_DIR, "looks.json")
+SOURCE_DIR = "outputs/grade_source"
+GRADE_DIR = "outputs/grade"
+BATCH = 8
+LUT_CHUNK = 1 << 20
+REC709_LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+VIEW_SETTINGS = ('view_transform', 'look', 'exposure', 'gamma')
+
+DEFAULT_LOOKS = {
+    'vj_loop': {
+        'neutral': [],
+        'cool': [{'cdl': {'slope': [0.9, 0.97, 1.12], 'offset': [0.0, 0.0, 0.004], 'saturation': 0.95}}],
+        'warm': [{'cdl': {'slope': [1.12, 1.0, 0.86], 'offset': [0.003, 0.0, 0.0], 'saturation': 1.05}}],
+        'noir': [{'exposure': 0.3}, {'cdl': {'power': [1.15, 1.15, 1.15], 'saturation': 0.0}}],
+        'acid': [{'cdl': {'slope': [0.85, 1.15, 0.9], 'power': [1.0, 0.9, 1.1], 'saturation': 1.6}}],
+        'night': [{'exposure': -0.7}, {'cdl': {'slope': [0.8, 0.9, 1.2], 'saturation': 0.7}}],
+    },
+}
+
+
+# --- Look registry ---
+
+def load_looks(loop, path=LOOKS_PATH):
+    """Looks for a loop: the defaults, extended or overridden by looks.json."""
+    looks = dict(DEFAULT_LOOKS.get(loop, {}))
+    if os.path.exists(path):
+        with open(path) as f:
+            looks.update(json.load(f).get(loop, {}))
+    return looks
+
+
+def register_look(loop, name, ops, path=LOOKS_PATH):
+    validate_look(ops)
+    data = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+    data.setdefault(loop, {})[name] = ops
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def validate_look(ops):
+    for i, op in enumerate(ops):
+        kinds = set(op) & {'exposure', 'cdl', 'lut'}
+        if len(kinds) != 1:
+            raise ValueError(f"Look operation {i} needs exactly one of exposure/cdl/lut: {op}")
+        if 'lut' in op and op.get('space', 'linear') == 'display' and i != len(ops) - 1:
+            raise ValueError("A display-space LUT must be the look's last operation")
+
+
+# --- Grading ---
+
+def load_cube(path):
+    """(table (N, N, N, 3) indexed [b, g, r], domain_min, domain_max) from a .cube 3D LUT."""
+    size, domain_min, domain_max, rows = None, [0.0] * 3, [1.0] * 3, []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0].startswith('#'):
+                continue
+            key = parts[0]
+            if key == 'LUT_3D_SIZE':
+                size = int(parts[1])
+            elif key == 'DOMAIN_MIN':
+                domain_min = [float(v) for v in parts[1:4]]
+            elif key == 'DOMAIN_MAX':
+                domain_max = [float(v) for v in parts[1:4]]
+            elif key == 'LUT_1D_SIZE':
+                raise ValueError(f"{path}: 1D LUTs are not supported")
+            elif key[0].isdigit() or key[0] in '-.':
+                rows.append([float(v) for v in parts[:3]])
+    if size is None or len(rows) != size ** 3:
+        raise ValueError(f"{path}: expected LUT_3D_SIZE and size^3 entries")
+    table = np.asarray(rows, dtype=np.float32).reshape(size, size, size, 3)
+    return table, np.asarray(domain_min, dtype=np.float32), np.asarray(domain_max, dtype=np.float32)
+
+
+def apply_lut3d(rgb, table, domain_min, domain_max):
+    """Trilinear 3D LUT lookup for (..., 3) pixels, in chunks to bound the gather memory."""
+    size = table.shape[0]
+    flat_table = table.reshape(-1, 3)
+    flat = rgb.reshape(-1, 3)
+    out = np.empty_like(flat)
+    for start in range(0, len(flat), LUT_CHUNK):
+        p = flat[start:start + LUT_CHUNK]
+        x = np.clip((p - domain_min) / (domain_max - domain_min), 0.0, 1.0) * (size - 1)
+        i0 = np.minimum(x.astype(np.int32), size - 2)
+        f = x - i0
+        r, g, b = i0[:, 0], i0[:, 1], i0[:, 2]
+        fr, fg, fb = f[:, 0:1], f[:, 1:2], f[:, 2:3]
+
+        def at(db, dg, dr):
+            return flat_table[((b + db) * size + (g + dg)) * size + (r + dr)]
+
+        c0 = (at(0, 0, 0) * (1 - fr) + at(0, 0, 1) * fr) * (1 - fg) + (at(0, 1, 0) * (1 - fr) + at(0, 1, 1) * fr) * fg
+        c1 = (at(1, 0, 0) * (1 - fr) + at(1, 0, 1) * fr) * (1 - fg) + (at(1, 1, 0) * (1 - fr) + at(1, 1, 1) * fr) * fg
+        out[start:start + LUT_CHUNK] = c0 * (1 - fb) + c1 * fb
+    return out.reshape(rgb.shape)
+
+
+def apply_cdl(rgb, slope=(1.0, 1.0, 1.0), offset=(0.0, 0.0, 0.0), power=(1.0, 1.0, 1.0), saturation=1.0):
+    """ASC CDL on (..., 3) scene-linear pixels: (in * slope + offset) ^ power, then saturation."""
+    out = rgb * np.asarray(slope, dtype=np.float32) + np.asarray(offset, dtype=np.float32)
+    out = np.power(np.maximum(out, 0.0), np.asarray(power, dtype=np.float32))
+    if saturation != 1.0:
+        luma = out @ REC709_LUMA
+        out = luma[..., None] + saturation * (out - luma[..., None])
+    return out
+
+
+def grade_batch(batch, ops, luts):
+    """Apply a look's scene-linear operations to a (B, h, w, 4) batch; alpha is kept."""
+    rgb = batch[..., :3]
+    for op in ops:
+        if 'exposure' in op:
+            rgb = rgb * np.float32(2.0 ** op['exposure'])
+        elif 'cdl' in op:
+            rgb = apply_cdl(rgb, **op['cdl'])
+        elif op.get('space', 'linear') == 'linear':
+            rgb = apply_lut3d(rgb, *luts[op['lut']])
+    return np.concatenate([rgb, batch[..., 3:]], axis=-1)
+
+
+def display_filter(ops):
+    """ffmpeg filter for a trailing display-space LUT, or None."""
+    if ops and 'lut' in ops[-1] and ops[-1].get('space', 'linear') == 'display':
+        return f"lut3d=file='{os.path.abspath(ops[-1]['lut'])}':interp=tetrahedral"
+    return None
+
+
+# --- Stages ---
+
+def render_source(vj, source_dir, preview=False):
+    """Render the loop once to scene-linear half-float EXR, recording fps and view settings."""
+    vj.create_scene()
+    scene = bpy.context.scene
+    vj.apply_sample_profile(scene, preview)
+    settings = scene.render.image_settings
+    settings.file_format = 'OPEN_EXR'
+    settings.color_depth = '16'
+    settings.exr_codec = 'ZIP'
+    scene.render.filepath = os.path.join(source_dir, "####")
+    bpy.ops.render.render(animation=True)
+    info = {'loop': 'vj_loop', 'fps': scene.render.fps,
+            'frames': list(range(scene.frame_start, scene.frame_end + 1)),
+            'view': {k: getattr(scene.view_settings, k) for k in VIEW_SETTINGS},
+            'display_device': scene.display_settings.display_device}
+    with open(os.path.join(source_dir, "source.json"), 'w') as f:
+        json.dump(info, f, indent=2)
+    print(f"Scene-linear frames written to: {source_dir}")
+
+
+def apply_looks(source_dir, names, out_dir=GRADE_DIR, batch_size=BATCH):
+    """Grade every frame of a rendered loop with each named look and encode one MP4 per look."""
+    with open(os.path.join(source_dir, "source.json")) as f:
+        info = json.load(f)
+    registry = load_looks(info['loop'])
+    unknown = [n for n in names if n not in registry]
+    if unknown:
+        raise ValueError(f"Unknown looks for {info['loop']}: {unknown} (have {sorted(registry)})")
+    looks = {n: registry[n] for n in names}
+    for ops in looks.values():
+        validate_look(ops)
+    luts = {op['lut']: load_cube(op['lut']) for ops in looks.values() for op in ops
+            if 'lut' in op and op.get('space', 'linear') == 'linear'}
+
+    scene = bpy.context.scene
+    scene.display_settings.display_device = info['display_device']
+    for key, value in info['view'].items():
+        setattr(scene.view_settings, key, value)
+    scene.render.image_settings.file_format = 'PNG'
+    frame_dirs = {}
+    for name in looks:
+        frame_dirs[name] = os.path.abspath(os.path.join(out_dir, name))
+        os.makedirs(frame_dirs[name], exist_ok=True)
+
+    frames = info['frames']
+    for start in range(0, len(frames), batch_size):
+        chunk = frames[start:start + batch_size]
+        batch = np.stack([load_image_array(os.path.join(source_dir, f"{frame:04d}.exr"), non_color=True)
+                          for frame in chunk])
+        for name, ops in looks.items():
+            graded = grade_batch(batch, ops, luts)
+            for frame, pixels in zip(chunk, graded):
+                save_render_array(os.path.join(frame_dirs[name], f"{frame:04d}.png"), pixels, scene)
+        print(f"Graded frames {chunk[0]}-{chunk[-1]} with {len(looks)} look(s)")
+
+    for name, ops in looks.items():
+        output = os.path.join(out_dir, f"{info['loop']}_{name}.mp4")
+        encode_image_sequence(os.path.join(frame_dirs[name], "%04d.png"), output, info['fps'],
+                              start_number=frames[0], filters=display_filter(ops))
+        print(f"Saved: {output}")
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Post-render CDL / 3D LUT grading with per-loop looks")
+    sub = parser.add_subparsers(dest='command', required=True)
+    render = sub.add_parser('render', help="Render the loop to scene-linear EXR frames")
+    render.add_argument('--preview', action='store_true')
+    apply = sub.add_parser('apply', help="Export graded variants of a rendered loop")
+    apply.add_argument('--looks', nargs='+', required=True)
+    apply.add_argument('--output-dir', default=GRADE_DIR)
+    apply.add_argument('--batch', type=int, default=BATCH, help="Frames graded per batch")
+    for p in (render, apply):
+        p.add_argument('--source-dir', default=SOURCE_DIR)
+    register = sub.add_parser('register', help="Add or replace a look in looks.json")
+    register.add_argument('loop')
+    register.add_argument('name')
+    register.add_argument('--spec', required=True, help="JSON file with the look's operation list")
+    listing = sub.add_parser('list', help="Show the registered looks")
+    listing.add_argument('loop', nargs='?', default='vj_loop')
+    args = parser.parse_args(argv)
+
+    if args.command == 'register':
+        with open(args.spec) as f:
+            register_look(args.loop, args.name, json.load(f))
+        print(f"Registered look {args.name} for {args.loop} in {LOOKS_PATH}")
+    elif args.command == 'list':
+        for name, ops in sorted(load_looks(args.loop).items()):
+            print(f"{name}: {json.dumps(ops)}")
+    elif args.command == 'render':
+        source_dir = os.path.abspath(args.source_dir)
+        os.makedirs(source_dir, exist_ok=True)
+        render_source(load_vj_module(), source_dir, args.preview)
+    else:
+        apply_looks(os.path.abspath(args.source_dir), args.looks, args.output_dir, args.batch)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Geometry Nodes Instancing
+Turns repeated primitives into point-instanced geometry: one point-cloud mesh
+holds per-instance position, rotation, scale, prototype index and animation
+attributes (written in bulk with foreach_set), and a Geometry Nodes modifier
+instances the prototype objects onto it. Memory and scene-sync time stay flat
+as the instance count grows, and spin/pulse animation is evaluated in the node
+tree instead of per-object keyframes.
+
+Per-instance attributes:
+  rotation (FLOAT_VECTOR)  Euler XYZ at frame_start
+  scale (FLOAT_VECTOR)     base scale
+  proto_index (INT)        which prototype (shape/material variant) to instance
+  spin (FLOAT_VECTOR)      Euler rotation added over one loop
+  phase (FLOAT)            beat offset of the pulse, in beats
+  lod (FLOAT)              level of detail, keyed per frame by lod.py
+
+Extra attributes (e.g. a FLOAT_COLOR "color") pass through to the instances,
+where materials read them with an Attribute node set to Instancer.
+
+Loop and beat lengths live in named Math nodes ("Loop Frames", "Frames Per Beat"),
+with their base values in the group's "beat_timing" property, so retime.py can
+rescale them for a new tempo.
+"""
+
+import bpy
+import numpy as np
+
+from scene_spec import primitive_mesh
+
+
+def make_prototypes(name, variants):
+    """Create one hidden prototype object per (primitive, material) variant.
+    A primitive is a scene_spec primitive name or an existing mesh datablock.
+    Variants with the same primitive share mesh data; materials are linked per object.
+    Returns a collection that is not linked to the scene, so only instances render.
+    """
+    collection = bpy.data.collections.new(f"{name}_Prototypes")
+    meshes = {}
+    for i, (primitive, material) in enumerate(variants):
+        mesh = meshes.get(primitive)
+        if mesh is None:
+            if isinstance(primitive, bpy.types.Mesh):
+                mesh = primitive
+            else:
+                mesh = primitive_mesh(f"{name}_{primitive}", primitive)
+            if not mesh.materials:
+                mesh.materials.append(material)
+            meshes[primitive] = mesh
+        obj = bpy.data.objects.new(f"{name}_proto_{i:03d}", mesh)
+        obj.material_slots[0].link = 'OBJECT'
+        obj.material_slots[0].material = material
+        collection.objects.link(obj)
+    return collection
+
+
+def _named_attribute(nodes, name, data_type):
+    node = nodes.new(type='GeometryNodeInputNamedAttribute')
+    node.data_type = data_type
+    node.inputs['Name'].default_value = name
+    return node.outputs['Attribute']
+
+
+def _math(nodes, links, operation, a, b=None, c=None):
+    node = nodes.new(type='ShaderNodeMath')
+    node.operation = operation
+    for i, value in enumerate((a, b, c)):
+        if value is None:
+            continue
+        if isinstance(value, (int, float)):
+            node.inputs[i].default_value = value
+        else:
+            links.new(value, node.inputs[i])
+    return node.outputs['Value']
+
+
+def _timing_divisor(group, output, name, frames):
+    """Name a DIVIDE node whose divisor is a length in frames and record its base value."""
+    output.node.name = name
+    timing = dict(group.get("beat_timing", {}))
+    timing[name] = frames
+    group["beat_timing"] = timing
+
+
+def _vector_math(nodes, links, operation, a, b):
+    node = nodes.new(type='ShaderNodeVectorMath')
+    node.operation = operation
+    links.new(a, node.inputs[0])
+    links.new(b, node.inputs['Scale' if operation == 'SCALE' else 1])
+    return node.outputs['Vector']
+
+
+def build_instancing_group(name, prototypes, frame_range=None, frames_per_beat=None, pulse_peak=1.0, pulse_decay=0.35,
+                           lod_levels=1):
+    """Geometry Nodes group instancing `prototypes` on the points of its input mesh.
+    - frame_range: (start, end) over which each instance adds its `spin` rotation
+    - frames_per_beat / pulse_peak / pulse_decay: beat-synced scale pulse, offset by `phase`
+    - lod_levels: prototypes hold this many levels per variant (variant-major);
+      each instance picks proto_index * lod_levels + lod
+    """
+    group = bpy.data.node_groups.new(name, 'GeometryNodeTree')
+    group.interface.new_socket(name="Geometry", in_out='INPUT', socket_type='NodeSocketGeometry')
+    group.interface.new_socket(name="Geometry", in_out='OUTPUT', socket_type='NodeSocketGeometry')
+    nodes = group.nodes
+    links = group.links
+
+    group_in = nodes.new(type='NodeGroupInput')
+    group_out = nodes.new(type='NodeGroupOutput')
+    collection_info = nodes.new(type='GeometryNodeCollectionInfo')
+    collection_info.transform_space = 'ORIGINAL'
+    collection_info.inputs['Collection'].default_value = prototypes
+    collection_info.inputs['Separate Children'].default_value = True
+    collection_info.inputs['Reset Children'].default_value = True
+    instance = nodes.new(type='GeometryNodeInstanceOnPoints')
+    instance.inputs['Pick Instance'].default_value = True
+
+    rotation = _named_attribute(nodes, 'rotation', 'FLOAT_VECTOR')
+    scale = _named_attribute(nodes, 'scale', 'FLOAT_VECTOR')
+
+    if frame_range is not None or frames_per_beat is not None:
+        frame = nodes.new(type='GeometryNodeInputSceneTime').outputs['Frame']
+
+    if frame_range is not None:
+        start, end = frame_range
+        # t runs 0 -> 1 across the loop, matching linear keyframes at start and end
+        t = _math(nodes, links, 'DIVIDE', _math(nodes, links, 'SUBTRACT', frame, float(start)), float(end - start))
+        _timing_divisor(group, t, "Loop Frames", float(end - start))
+        spin = _named_attribute(nodes, 'spin', 'FLOAT_VECTOR')
+        rotation = _vector_math(nodes, links, 'ADD', rotation, _vector_math(nodes, links, 'SCALE', spin, t))
+
+    if frames_per_beat is not None and pulse_peak != 1.0:
+        start = frame_range[0] if frame_range is not None else 1
+        beats = _math(nodes, links, 'DIVIDE', _math(nodes, links, 'SUBTRACT', frame, float(start)), float(frames_per_beat))
+        _timing_divisor(group, beats, "Frames Per Beat", float(frames_per_beat))
+        beat_phase = _math(nodes, links, 'FRACT', _math(nodes, links, 'ADD', beats, _named_attribute(nodes, 'phase', 'FLOAT')))
+        # Peak on the beat, linear return to base after `pulse_decay` of a beat
+        pulse = _math(nodes, links, 'MAXIMUM', _math(nodes, links, 'SUBTRACT', 1.0,
+                      _math(nodes, links, 'DIVIDE', beat_phase, float(pulse_decay))), 0.0)
+        factor = _math(nodes, links, 'MULTIPLY_ADD', pulse, float(pulse_peak - 1.0), 1.0)
+        scale = _vector_math(nodes, links, 'SCALE', scale, factor)
+
+    links.new(group_in.outputs['Geometry'], instance.inputs['Points'])
+    links.new(collection_info.outputs['Instances'], instance.inputs['Instance'])
+    pick = _named_attribute(nodes, 'proto_index', 'INT')
+    if lod_levels > 1:
+        pick = _math(nodes, links, 'MULTIPLY_ADD', pick, float(lod_levels), _named_attribute(nodes, 'lod', 'FLOAT'))
+    links.new(pick, instance.inputs['Instance Index'])
+    links.new(rotation, instance.inputs['Rotation'])
+    links.new(scale, instance.inputs['Scale'])
+    links.new(instance.outputs['Instances'], group_out.inputs['Geometry'])
+    return group
+
+
+def _add_attribute(mesh, name, data_type, values):
+    attr = mesh.attributes.new(name, data_type, 'POINT')
+    field = {'FLOAT_VECTOR': 'vector', 'FLOAT_COLOR': 'color'}.get(data_type, 'value')
+    dtype = np.int32 if data_type == 'INT' else np.float32
+    attr.data.foreach_set(field, np.ascontiguousarray(values, dtype=dtype).ravel())
+
+
+def build_instancer(name, prototypes, locations, rotations=None, scales=None, proto_index=None,
+                    spin=None, phase=None, collection=None, attributes=None, **animation):
+    """Create a point-instancing object.
+    - prototypes: collection from make_prototypes
+    - locations: (N, 3); rotations/scales/spin: (N, 3) or None; proto_index/phase: (N,)
+    - attributes: extra point attributes {name: (data_type, values)}, e.g. {'color': ('FLOAT_COLOR', (N, 4))}
+    - animation: keyword arguments for build_instancing_group (frame_range, frames_per_beat, ...)
+    """
+    locations = np.asarray(locations, dtype=np.float32).reshape(-1, 3)
+    count = len(locations)
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(count)
+    mesh.vertices.foreach_set("co", locations.ravel())
+    _add_attribute(mesh, 'rotation', 'FLOAT_VECTOR', np.zeros((count, 3)) if rotations is None else rotations)
+    _add_attribute(mesh, 'scale', 'FLOAT_VECTOR', np.ones((count, 3)) if scales is None else scales)
+    _add_attribute(mesh, 'proto_index', 'INT', np.zeros(count) if proto_index is None else proto_index)
+    _add_attribute(mesh, 'spin', 'FLOAT_VECTOR', np.zeros((count, 3)) if spin is None else spin)
+    _add_attribute(mesh, 'phase', 'FLOAT', np.zeros(count) if phase is None else phase)
+    _add_attribute(mesh, 'lod', 'FLOAT', np.zeros(count))
+    for attr_name, (data_type, values) in (attributes or {}).items():
+        _add_attribute(mesh, attr_name, data_type, values)
+    mesh.update()
+
+    obj = bpy.data.objects.new(name, mesh)
+    obj["lod_levels"] = animation.get('lod_levels', 1)
+    (collection or bpy.context.scene.collection).objects.link(obj)
+    modifier = obj.modifiers.new(name="Instancing", type='NODES')
+    modifier.node_group = build_instancing_group(f"{name}_Instancing", prototypes, **animation)
+    return obj
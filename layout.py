@@ -0,0 +1,220 @@
+"""
+Procedural Layout
+Vectorized NumPy placement generators for dense abstract compositions:
+Poisson-disk sampling, ring and spiral distributions, and spatial-hash overlap
+rejection. Every generator takes a seed, so a layout is reproducible, and the
+output arrays feed straight into instancing.build_instancer.
+
+Tens of thousands of placements lay out in well under a second; no bpy needed.
+
+Usage (timing check):
+  python layout.py --count 20000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+# Neighbouring cells searched by the hash lookups (3x3x3 block)
+_OFFSETS_3D = np.stack(np.meshgrid([-1, 0, 1], [-1, 0, 1], [-1, 0, 1], indexing='ij'), -1).reshape(-1, 3)
+
+
+def _rng(seed):
+    return seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+
+def _close_pairs(idx, mask, others, cand, r2):
+    """Rows of `cand` with a masked neighbour `others[idx]` closer than sqrt(r2); only masked pairs are measured."""
+    rows, cols = np.nonzero(mask)
+    diff = others[idx[rows, cols]] - cand[rows]
+    return rows[diff[:, 0] ** 2 + diff[:, 1] ** 2 < r2]
+
+
+def poisson_disk(min_dist, bounds, count=None, seed=0, attempts=12):
+    """Blue-noise 2D points at least `min_dist` apart inside bounds ((xmin, ymin), (xmax, ymax)).
+    Vectorized dart throwing on a background grid with one point per cell: every round throws
+    one candidate into each empty cell (into a random subset of them while well short of `count`),
+    and a cell is retired after `attempts` misses.
+    Stops at `count` points or when no cell is left. Returns an (N, 2) array.
+    """
+    rng = _rng(seed)
+    lo = np.asarray(bounds[0], dtype=np.float64)
+    hi = np.asarray(bounds[1], dtype=np.float64)
+    cell = min_dist / np.sqrt(2.0)
+    shape = np.maximum(np.ceil((hi - lo) / cell).astype(int), 1)
+    # Grid padded by two cells so neighbourhood lookups never leave it
+    width = shape[1] + 4
+    grid = np.full((shape[0] + 4) * width, -1, dtype=np.int64)
+    interior = ((np.arange(shape[0])[:, None] + 2) * width + np.arange(shape[1]) + 2).ravel()
+    misses = np.zeros(len(interior), dtype=np.int32)
+    # 5x5 neighbourhood without the corners, which are always further than min_dist
+    offsets = np.array([di * width + dj for di in range(-2, 3) for dj in range(-2, 3) if abs(di) + abs(dj) < 4])
+    points = np.zeros((len(interior), 2))
+    accepted = 0
+    limit = len(points) if count is None else min(count, len(points))
+    r2 = min_dist * min_dist
+    # Candidate slots of the current round, for in-round conflict checks; reset after each round
+    local = np.full_like(grid, -1)
+
+    while accepted < limit:
+        open_cells = np.nonzero((grid[interior] < 0) & (misses < attempts))[0]
+        if not len(open_cells):
+            break
+        # A random subset of the open cells is enough when only `count` points are wanted
+        batch = max(4 * (limit - accepted), 4096)
+        open_cells = rng.permutation(open_cells)[:batch]
+        ij = np.stack(np.divmod(open_cells, shape[1]), axis=1)
+        cand = np.minimum(lo + (ij + rng.random(ij.shape)) * cell, hi)
+        slots = interior[open_cells]
+
+        # Reject against accepted points in the neighbourhood
+        idx = grid[slots[:, None] + offsets]
+        ok = np.ones(len(cand), dtype=bool)
+        ok[_close_pairs(idx, idx >= 0, points, cand, r2)] = False
+
+        # Resolve conflicts inside the round: earlier (randomly ordered) candidates win
+        survivors = np.nonzero(ok)[0]
+        local[slots[survivors]] = survivors
+        idx = local[slots[survivors, None] + offsets]
+        local[slots[survivors]] = -1
+        ok[survivors[_close_pairs(idx, (idx >= 0) & (idx < survivors[:, None]), cand, cand[survivors], r2)]] = False
+
+        misses[open_cells[~ok]] += 1
+        keep = np.nonzero(ok)[0][:limit - accepted]
+        new = np.arange(accepted, accepted + len(keep))
+        points[new] = cand[keep]
+        grid[slots[keep]] = new
+        accepted += len(keep)
+
+    return points[:accepted].copy()
+
+
+def ring(count, radius, jitter=0.0, phase=0.0, seed=0):
+    """`count` evenly spaced 2D points on a circle, with optional radial/angular jitter."""
+    rng = _rng(seed)
+    angle = phase + np.arange(count) / count * 2 * np.pi
+    r = np.full(count, float(radius))
+    if jitter:
+        angle = angle + rng.uniform(-jitter, jitter, count) / max(radius, 1e-6)
+        r = r + rng.uniform(-jitter, jitter, count)
+    return np.stack([r * np.cos(angle), r * np.sin(angle)], axis=1)
+
+
+def spiral(count, r_min, r_max, turns=None, jitter=0.0, seed=0):
+    """Spiral from r_min to r_max. With turns=None uses the golden angle (sunflower packing,
+    even area density); otherwise an Archimedean spiral with that many turns."""
+    rng = _rng(seed)
+    t = (np.arange(count) + 0.5) / count
+    if turns is None:
+        angle = np.arange(count) * np.pi * (3.0 - np.sqrt(5.0))
+        r = np.sqrt(r_min ** 2 + t * (r_max ** 2 - r_min ** 2))
+    else:
+        angle = t * turns * 2 * np.pi
+        r = r_min + t * (r_max - r_min)
+    points = np.stack([r * np.cos(angle), r * np.sin(angle)], axis=1)
+    if jitter:
+        points += rng.uniform(-jitter, jitter, points.shape)
+    return points
+
+
+def _hash_pairs(positions, cell):
+    """Candidate (i, j) pairs, i < j, of points in the same or adjacent hash cells."""
+    keys = np.floor(positions / cell).astype(np.int64)
+    keys -= keys.min(axis=0)
+    dims = keys.max(axis=0) + 3
+    flat = ((keys[:, 0] + 1) * dims[1] + keys[:, 1] + 1) * dims[2] + keys[:, 2] + 1
+    order = np.argsort(flat, kind='stable')
+    sorted_keys = flat[order]
+    uniq, starts, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+
+    pairs_i, pairs_j = [], []
+    for offset in _OFFSETS_3D:
+        shift = (offset[0] * dims[1] + offset[1]) * dims[2] + offset[2]
+        target = flat + shift
+        slot = np.clip(np.searchsorted(uniq, target), 0, len(uniq) - 1)
+        hit = uniq[slot] == target
+        src = np.nonzero(hit)[0]
+        n = counts[slot[src]]
+        if not len(src):
+            continue
+        # Expand each source point against every member of its neighbour cell
+        rep = np.repeat(src, n)
+        pos = np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)
+        dst = order[np.repeat(starts[slot[src]], n) + pos]
+        keep = rep < dst
+        pairs_i.append(rep[keep])
+        pairs_j.append(dst[keep])
+    if not pairs_i:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    return np.concatenate(pairs_i), np.concatenate(pairs_j)
+
+
+def reject_overlaps(positions, radii):
+    """Boolean keep-mask so that no two kept spheres overlap.
+    Earlier entries have priority: the result equals a sequential greedy pass in index
+    order, computed in vectorized rounds over spatial-hash candidate pairs.
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    if positions.shape[1] == 2:
+        positions = np.column_stack([positions, np.zeros(len(positions))])
+    radii = np.broadcast_to(np.asarray(radii, dtype=np.float64), (len(positions),))
+    if not len(positions):
+        return np.zeros(0, dtype=bool)
+
+    i, j = _hash_pairs(positions, 2.0 * radii.max())
+    d2 = np.sum((positions[i] - positions[j]) ** 2, axis=1)
+    overlap = d2 < (radii[i] + radii[j]) ** 2
+    i, j = i[overlap], j[overlap]
+
+    state = np.zeros(len(positions), dtype=np.int8)  # 0 undecided, 1 kept, -1 rejected
+    while np.any(state == 0):
+        # An undecided point is kept once no undecided or kept point precedes it in a conflict
+        blocked = np.zeros(len(positions), dtype=bool)
+        blocked[j[(state[i] >= 0) & (state[j] == 0)]] = True
+        state[(state == 0) & ~blocked] = 1
+        state[j[(state[i] == 1) & (state[j] == 0)]] = -1
+    return state == 1
+
+
+def scatter_attributes(count, variants, scale_range=(0.5, 1.2), seed=0):
+    """Random per-instance Euler rotations, uniform scales and prototype indices."""
+    rng = _rng(seed)
+    rotations = rng.uniform(0, np.pi, (count, 3))
+    scale = rng.uniform(scale_range[0], scale_range[1], count)
+    return {
+        'rotations': rotations,
+        'scales': np.repeat(scale[:, None], 3, axis=1),
+        'proto_index': rng.integers(0, variants, count),
+    }
+
+
+def lift(points, z_range, seed=0):
+    """Give 2D points a random height in z_range, returning (N, 3)."""
+    rng = _rng(seed)
+    return np.column_stack([points, rng.uniform(z_range[0], z_range[1], len(points))])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the layout generators")
+    parser.add_argument('--count', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    extent = np.sqrt(args.count) * 0.25
+    start = time.perf_counter()
+    points = poisson_disk(0.2, ((-extent, -extent), (extent, extent)), count=args.count, seed=args.seed)
+    t_poisson = time.perf_counter() - start
+
+    start = time.perf_counter()
+    positions = lift(spiral(args.count, 1.0, extent, jitter=0.1, seed=args.seed), (0.2, 3.0), seed=args.seed)
+    attrs = scatter_attributes(args.count, 6, scale_range=(0.05, 0.15), seed=args.seed)
+    keep = reject_overlaps(positions, attrs['scales'][:, 0])
+    t_reject = time.perf_counter() - start
+
+    print(f"poisson_disk: {len(points)} points in {t_poisson * 1000:.0f} ms")
+    print(f"spiral + reject_overlaps: kept {keep.sum()}/{args.count} in {t_reject * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+"""
+Live VJ Mode for the 120 BPM VJ loop
+Plays the scene_03 VJ scene through EEVEE at a fixed frame-time budget, driven
+by an external beat clock instead of the baked 120 BPM timeline, so the visuals
+follow the DJ's actual tempo.
+
+Clock sources:
+- MIDI clock (24 ticks per beat, start/stop/continue/song position) via mido
+- OSC over UDP on localhost: /vj/beat [beat:int] [sent:double], /vj/start, /vj/stop
+
+The clock fits a tempo line through the last ticks and predicts the live beat
+position between them. Each frame maps that position onto the loop's keyed
+timeline (beat b -> frame FRAME_START + b * FRAMES_PER_BEAT, with subframes), so
+the pulse envelopes keyed in scene_03_vj_loop_spec.py are evaluated against the live
+beat phase and the 32-beat loop wraps on the clock's downbeats.
+
+Stats: frame work time, missed deadlines (dropped frames), beat-to-frame latency
+(first frame showing a beat vs the arrival of that beat's tick; negative when
+the prediction got there first) and OSC transport latency from sender stamps.
+
+`send` is a local stand-in clock for tests (OSC, or MIDI clock to a mido port).
+
+Usage:
+  blender scene_03_vj_loop.blend --python live_vj.py -- play --osc 9000 [--fps 60]
+  blender --background --python live_vj.py -- play --osc 9000 --headless --duration 30 --stats outputs/live_stats.json
+  blender --background --python live_vj.py -- send --bpm 126 --beats 64 [--jitter-ms 3] [--midi "IAC Bus 1"]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import struct
+import sys
+import threading
+import time
+from collections import deque
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from render_vj_fast import configure_eevee_look  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+OSC_HOST = "127.0.0.1"
+OSC_PORT = 9000
+MIDI_TICKS_PER_BEAT = 24
+LIVE_FPS = 60
+LIVE_SAMPLES = 1
+HEADLESS_PERCENTAGE = 25
+STATS_INTERVAL = 10.0
+OSC_FORMATS = {'i': '>i', 'f': '>f', 'd': '>d', 'h': '>q'}
+
+
+# --- Beat clock ---
+
+class BeatClock:
+    """Live beat position from timestamped clock ticks (thread-safe; ticks arrive on listener threads)."""
+
+    def __init__(self, ticks_per_beat=1, bpm=120.0):
+        self.ticks_per_beat = ticks_per_beat
+        self.default_rate = bpm / 60.0 * ticks_per_beat
+        self.ticks = deque(maxlen=max(8, 2 * ticks_per_beat))
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+        self.index = -1
+        self.running = True
+        self.frozen = 0.0
+        self.floor = 0.0
+        self.beat_received = {}
+        self.transport = []
+
+    def tick(self, t, index=None, sent=None):
+        """A tick at perf_counter time t; index counts ticks since the clock's beat 0."""
+        with self.lock:
+            self.index = self.index + 1 if index is None else index
+            self.ticks.append((self.index, t))
+            self.running = True
+            if self.index % self.ticks_per_beat == 0:
+                self.beat_received.setdefault(self.index // self.ticks_per_beat, t)
+            if sent is not None:
+                self.transport.append(time.time() - sent)
+
+    def start(self, t, index=-1):
+        """Restart at beat 0 (MIDI start / song position): the next tick is `index + 1`."""
+        with self.lock:
+            self.ticks.clear()
+            self.index = index
+            self.origin = t
+            self.floor = 0.0
+            self.beat_received.clear()
+            self.running = True
+
+    def stop(self, t):
+        self.frozen = self.position(t)
+        with self.lock:
+            self.running = False
+
+    def _rate_and_anchor(self):
+        """(ticks per second, (tick, time)) from a least-squares line through the recent ticks."""
+        if len(self.ticks) < 2:
+            anchor = self.ticks[-1] if self.ticks else (self.index + 1, self.origin)
+            return self.default_rate, anchor
+        index, times = np.array(self.ticks, dtype=np.float64).T
+        last = times[-1]
+        slope, intercept = np.polyfit(times - last, index, 1)
+        return max(slope, 1e-3), (intercept, last)
+
+    def position(self, now):
+        """Beat position at `now`, never moving backwards (late ticks become short holds)."""
+        with self.lock:
+            if not self.running:
+                return self.frozen
+            rate, (index, t) = self._rate_and_anchor()
+            beat = (index + (now - t) * rate) / self.ticks_per_beat
+            self.floor = max(self.floor, beat)
+            return self.floor
+
+    def bpm(self):
+        with self.lock:
+            return self._rate_and_anchor()[0] * 60.0 / self.ticks_per_beat
+
+
+# --- OSC ---
+
+def _osc_pad(data):
+    data += b"\0"
+    return data + b"\0" * (-len(data) % 4)
+
+
+def _osc_string(data, offset):
+    end = data.index(b"\0", offset)
+    return data[offset:end].decode(), (end + 4) & ~3
+
+
+def osc_message(address, *args):
+    """Encode an OSC message with int (i), float (d) and string (s) arguments."""
+    tags, payload = ",", b""
+    for arg in args:
+        if isinstance(arg, int):
+            tags, payload = tags + "i", payload + struct.pack(">i", arg)
+        elif isinstance(arg, float):
+            tags, payload = tags + "d", payload + struct.pack(">d", arg)
+        else:
+            tags, payload = tags + "s", payload + _osc_pad(str(arg).encode())
+    return _osc_pad(address.encode()) + _osc_pad(tags.encode()) + payload
+
+
+def parse_osc(data):
+    """Yield (address, args) from an OSC message or bundle."""
+    if data.startswith(b"#bundle\0"):
+        offset = 16
+        while offset < len(data):
+            (size,) = struct.unpack_from(">i", data, offset)
+            yield from parse_osc(data[offset + 4:offset + 4 + size])
+            offset += 4 + size
+        return
+    address, offset = _osc_string(data, 0)
+    tags, offset = _osc_string(data, offset)
+    args = []
+    for tag in tags[1:]:
+        if tag in OSC_FORMATS:
+            args.append(struct.unpack_from(OSC_FORMATS[tag], data, offset)[0])
+            offset += struct.calcsize(OSC_FORMATS[tag])
+        elif tag == 's':
+            value, offset = _osc_string(data, offset)
+            args.append(value)
+        elif tag in 'TF':
+            args.append(tag == 'T')
+        else:
+            break
+    yield address, args
+
+
+class OscClockInput:
+    """Feed /vj/beat, /vj/start and /vj/stop messages from a UDP port into a BeatClock."""
+
+    def __init__(self, clock, port=OSC_PORT, host=OSC_HOST):
+        self.clock = clock
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host, port))
+        self.sock.settimeout(0.2)
+        self.running = True
+        self.thread = threading.Thread(target=self._listen, daemon=True)
+        self.thread.start()
+        print(f"Listening for OSC beats on {host}:{port}")
+
+    def _listen(self):
+        while self.running:
+            try:
+                data = self.sock.recv(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            t = time.perf_counter()
+            for address, args in parse_osc(data):
+                if address == '/vj/beat':
+                    index = int(args[0]) if args else None
+                    sent = float(args[1]) if len(args) > 1 else None
+                    self.clock.tick(t, index, sent)
+                elif address == '/vj/start':
+                    self.clock.start(t)
+                elif address == '/vj/stop':
+                    self.clock.stop(t)
+
+    def close(self):
+        self.running = False
+        self.sock.close()
+
+
+def _mido():
+    try:
+        import mido
+    except ImportError as exc:
+        raise RuntimeError("MIDI clock needs mido and python-rtmidi (pip install mido python-rtmidi); "
+                           "use --osc instead") from exc
+    return mido
+
+
+class MidiClockInput:
+    """Feed MIDI clock, start/stop/continue and song position from a mido input port into a BeatClock."""
+
+    def __init__(self, clock, port_name=None):
+        self.clock = clock
+        self.port = _mido().open_input(port_name, callback=self._on_message)
+        print(f"Listening for MIDI clock on {self.port.name}")
+
+    def _on_message(self, msg):
+        t = time.perf_counter()
+        if msg.type == 'clock':
+            self.clock.tick(t)
+        elif msg.type == 'start':
+            self.clock.start(t)
+        elif msg.type == 'stop':
+            self.clock.stop(t)
+        elif msg.type == 'songpos':
+            # Song position counts 16th notes (6 clock ticks each)
+            self.clock.start(t, index=msg.pos * 6 - 1)
+
+    def close(self):
+        self.port.close()
+
+
+def send_clock(bpm, beats, port=OSC_PORT, jitter_ms=0.0, midi_port=None):
+    """Stand-in DJ clock: OSC beats (with send stamps) or MIDI clock at `bpm`."""
+    ticks_per_beat = MIDI_TICKS_PER_BEAT if midi_port else 1
+    interval = 60.0 / bpm / ticks_per_beat
+    if midi_port:
+        mido = _mido()
+        out = mido.open_output(midi_port)
+        send_tick = lambda i: out.send(mido.Message('clock'))  # noqa: E731
+        out.send(mido.Message('start'))
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        send_tick = lambda i: sock.sendto(osc_message('/vj/beat', i, time.time()), (OSC_HOST, port))  # noqa: E731
+        sock.sendto(osc_message('/vj/start'), (OSC_HOST, port))
+    print(f"Sending {beats} beats at {bpm} BPM ({'MIDI clock' if midi_port else f'OSC :{port}'})")
+    start = time.perf_counter()
+    for i in range(beats * ticks_per_beat):
+        due = start + i * interval + random.uniform(-jitter_ms, jitter_ms) / 1000.0
+        time.sleep(max(0.0, due - time.perf_counter()))
+        send_tick(i)
+
+
+# --- Live playback ---
+
+def setup_live_scene(vj, scene, headless=False):
+    """The look-matched EEVEE setup at live sample counts, motion blur off;
+    viewports in camera view, rendered, with the compositor."""
+    configure_eevee_look(scene, LIVE_SAMPLES)
+    scene.eevee.taa_samples = LIVE_SAMPLES
+    scene.render.use_motion_blur = False
+    if headless:
+        scene.render.resolution_percentage = HEADLESS_PERCENTAGE
+        return
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type != 'VIEW_3D':
+                continue
+            space = area.spaces.active
+            space.shading.type = 'RENDERED'
+            space.shading.use_compositor = 'ALWAYS'
+            space.overlay.show_overlays = False
+            space.region_3d.view_perspective = 'CAMERA'
+
+
+class LiveStats:
+    """Frame-time, dropped-frame and latency bookkeeping for a live run."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.work = []
+        self.dropped = 0
+        self.beat_shown = {}
+        self.last_beat = None
+        self.start = time.perf_counter()
+
+    def frame(self, work, missed):
+        self.work.append(work)
+        self.dropped += missed
+
+    def presented(self, t, beat):
+        """A frame showing beat position `beat` reached the screen (or finished rendering) at t."""
+        if self.last_beat is not None:
+            for b in range(int(np.floor(self.last_beat)) + 1, int(np.floor(beat)) + 1):
+                self.beat_shown.setdefault(b, t)
+        self.last_beat = beat
+
+    def report(self, clock):
+        work = np.array(self.work) * 1000.0 if self.work else np.zeros(1)
+        beats = sorted(set(self.beat_shown) & set(clock.beat_received))
+        latency = np.array([self.beat_shown[b] - clock.beat_received[b] for b in beats]) * 1000.0
+        transport = np.array(clock.transport) * 1000.0
+        frames = len(self.work)
+        return {
+            'seconds': time.perf_counter() - self.start,
+            'frames': frames,
+            'budget_ms': self.budget * 1000.0,
+            'bpm': clock.bpm(),
+            'frame_ms': {'mean': float(work.mean()), 'p95': float(np.percentile(work, 95)), 'max': float(work.max())},
+            'dropped_frames': self.dropped,
+            'dropped_pct': 100.0 * self.dropped / max(1, frames + self.dropped),
+            'beat_latency_ms': {'beats': len(beats),
+                                'mean': float(latency.mean()) if len(latency) else None,
+                                'p95': float(np.percentile(latency, 95)) if len(latency) else None},
+            'transport_latency_ms': float(transport.mean()) if len(transport) else None,
+        }
+
+
+def print_report(report):
+    f = report['frame_ms']
+    b = report['beat_latency_ms']
+    print(f"{report['frames']} frames in {report['seconds']:.1f}s at {report['bpm']:.1f} BPM | "
+          f"frame {f['mean']:.1f}/{f['p95']:.1f}/{f['max']:.1f} ms (mean/p95/max, budget {report['budget_ms']:.1f}) | "
+          f"dropped {report['dropped_frames']} ({report['dropped_pct']:.1f}%)")
+    if b['beats']:
+        print(f"  beat-to-frame latency over {b['beats']} beats: {b['mean']:.1f} ms mean, {b['p95']:.1f} ms p95")
+    if report['transport_latency_ms'] is not None:
+        print(f"  OSC transport latency: {report['transport_latency_ms']:.2f} ms")
+
+
+class LivePlayer:
+    """Advance the loop from a BeatClock at a fixed frame budget."""
+
+    def __init__(self, vj, scene, clock, fps=LIVE_FPS, duration=None, stats_path=None):
+        self.vj = vj
+        self.scene = scene
+        self.clock = clock
+        self.budget = 1.0 / fps
+        self.stats = LiveStats(self.budget)
+        self.end = None if duration is None else time.perf_counter() + duration
+        self.stats_path = stats_path
+        self.deadline = time.perf_counter()
+        self.next_report = time.perf_counter() + STATS_INTERVAL
+        self.beat = 0.0
+
+    def show(self, now):
+        """Set the scene to the live beat position; returns that position."""
+        beat = self.clock.position(now)
+        frame = self.vj.FRAME_START + (beat % self.vj.TOTAL_BEATS) * self.vj.FRAMES_PER_BEAT
+        whole = int(np.floor(frame))
+        self.scene.frame_set(whole, subframe=frame - whole)
+        self.beat = beat
+        return beat
+
+    def finish_frame(self, start):
+        """Book the frame's work time and missed deadlines; seconds until the next deadline."""
+        now = time.perf_counter()
+        self.deadline += self.budget
+        missed = 0
+        if now > self.deadline:
+            missed = int((now - self.deadline) // self.budget) + 1
+            self.deadline += missed * self.budget
+        self.stats.frame(now - start, missed)
+        if now >= self.next_report:
+            print_report(self.stats.report(self.clock))
+            self.next_report = now + STATS_INTERVAL
+        return self.deadline - now
+
+    def done(self):
+        return self.end is not None and time.perf_counter() >= self.end
+
+    def close(self):
+        report = self.stats.report(self.clock)
+        print_report(report)
+        if self.stats_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.stats_path)), exist_ok=True)
+            with open(self.stats_path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Stats written to: {self.stats_path}")
+        return report
+
+    def run_headless(self):
+        """Render each frame with EEVEE (no display); a finished render counts as presented."""
+        while not self.done():
+            start = time.perf_counter()
+            beat = self.show(start)
+            bpy.ops.render.render()
+            self.stats.presented(time.perf_counter(), beat)
+            time.sleep(max(0.0, self.finish_frame(start)))
+        return self.close()
+
+    def run_interactive(self, on_close=None):
+        """Drive the viewport from an app timer; a viewport draw counts as presented."""
+        def draw():
+            self.stats.presented(time.perf_counter(), self.beat)
+
+        handle = bpy.types.SpaceView3D.draw_handler_add(draw, (), 'WINDOW', 'POST_PIXEL')
+
+        def step():
+            if self.done():
+                bpy.types.SpaceView3D.draw_handler_remove(handle, 'WINDOW')
+                self.close()
+                if on_close:
+                    on_close()
+                return None
+            start = time.perf_counter()
+            self.show(start)
+            return max(0.0, self.finish_frame(start))
+
+        bpy.app.timers.register(step, first_interval=0.0, persistent=True)
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Live, beat-clocked EEVEE playback of the VJ loop")
+    sub = parser.add_subparsers(dest='command', required=True)
+    play = sub.add_parser('play', help="Play the loop from a MIDI or OSC beat clock")
+    source = play.add_mutually_exclusive_group()
+    source.add_argument('--osc', type=int, default=OSC_PORT, help="UDP port for /vj/beat messages")
+    source.add_argument('--midi', default=None, help="mido input port name for MIDI clock")
+    play.add_argument('--fps', type=int, default=LIVE_FPS, help="Frame-time budget as frames per second")
+    play.add_argument('--bpm', type=float, default=None, help="Free-run tempo until the clock arrives")
+    play.add_argument('--headless', action='store_true', help="Render frames without a display (tests)")
+    play.add_argument('--duration', type=float, default=None, help="Stop after this many seconds")
+    play.add_argument('--stats', default=None, help="Write the final stats to this JSON file")
+    send = sub.add_parser('send', help="Local stand-in beat clock")
+    send.add_argument('--bpm', type=float, default=120.0)
+    send.add_argument('--beats', type=int, default=64)
+    send.add_argument('--port', type=int, default=OSC_PORT)
+    send.add_argument('--jitter-ms', type=float, default=0.0)
+    send.add_argument('--midi', default=None, help="Send MIDI clock to this mido output port instead of OSC")
+    args = parser.parse_args(argv)
+
+    if args.command == 'send':
+        send_clock(args.bpm, args.beats, args.port, args.jitter_ms, args.midi)
+        return
+
+    vj = load_vj_module()
+    if args.headless or not bpy.context.scene.objects:
+        vj.create_scene()
+    scene = bpy.context.scene
+    headless = args.headless or bpy.app.background
+    if headless and args.duration is None:
+        parser.error("--duration is required without a display")
+    setup_live_scene(vj, scene, headless)
+
+    ticks_per_beat = MIDI_TICKS_PER_BEAT if args.midi else 1
+    clock = BeatClock(ticks_per_beat, args.bpm or vj.BPM)
+    clock_input = MidiClockInput(clock, args.midi) if args.midi else OscClockInput(clock, args.osc)
+    player = LivePlayer(vj, scene, clock, args.fps, args.duration, args.stats)
+    if headless:
+        try:
+            player.run_headless()
+        finally:
+            clock_input.close()
+    else:
+        player.run_interactive(on_close=clock_input.close)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Camera-Distance Level of Detail
+Projects every mesh object's bounding sphere through the animated camera for
+each frame of the loop and switches between precomputed detail levels with
+constant-interpolated keyframes, so per-frame render cost follows what is
+actually on screen:
+
+  level 0  the object as built
+  level 1+ decimated mesh data and material copies whose noise textures stop at
+           the octaves that still resolve at that level's largest screen size
+
+A noise octave k at texture Scale s has s * 2^k features across the object, so
+it only shows while that stays under half the object's projected width in
+pixels; higher octaves are sub-pixel noise the sampler averages away anyway.
+
+Plain objects get one hidden copy per level, switched with keyed hide_render.
+Point instancers (instancing.py, built with lod_levels) get per-instance
+prototype levels, switched by keying each point's `lod` attribute. Objects
+that stay at level 0 for the whole range are left untouched.
+
+Usage:
+  blender --background --python lod.py    # report levels for the VJ loop
+"""
+
+import math
+import os
+import sys
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from instancing import make_prototypes  # noqa: E402
+from scene_spec import primitive_mesh  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+# Projected bounding-sphere diameter (render pixels) below which each level starts
+LOD_PIXELS = (400.0, 150.0)
+# Mesh decimation ratio per level
+DECIMATE_RATIOS = (1.0, 0.45, 0.15)
+# Meshes with fewer faces are shared between levels as-is
+MIN_DECIMATE_FACES = 64
+LEVELS = len(LOD_PIXELS) + 1
+
+
+# --- Screen size ---
+
+def focal_pixels(scene, camera):
+    """Focal length in render pixels (sensor fit along the larger image axis)."""
+    pct = scene.render.resolution_percentage / 100.0
+    width = scene.render.resolution_x * pct
+    height = scene.render.resolution_y * pct
+    return 0.5 * max(width, height) / math.tan(0.5 * camera.data.angle), (width, height)
+
+
+def bounding_sphere(mesh):
+    """(centre, radius) of a mesh's vertices in object space."""
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3)
+    centre = 0.5 * (co.min(axis=0) + co.max(axis=0))
+    return centre, float(np.linalg.norm(co - centre, axis=1).max())
+
+
+def sample_matrices(scene, objects, frames):
+    """World matrices per frame: camera (F, 4, 4) and name -> (F, 4, 4) for each object."""
+    saved = scene.frame_current
+    camera = np.empty((len(frames), 4, 4))
+    matrices = {obj.name: np.empty((len(frames), 4, 4)) for obj in objects}
+    try:
+        for i, frame in enumerate(frames):
+            scene.frame_set(frame)
+            camera[i] = np.array(scene.camera.matrix_world)
+            for obj in objects:
+                matrices[obj.name][i] = np.array(obj.matrix_world)
+    finally:
+        scene.frame_set(saved)
+    return camera, matrices
+
+
+def project(camera, centres):
+    """Camera-space x, y (camera looks down -Z) and depth of world points seen from
+    per-frame camera matrices. camera: (F, 4, 4); centres: (F, N, 3) or (N, 3)."""
+    centres = np.broadcast_to(centres, (len(camera),) + np.shape(centres)[-2:])
+    offset = centres - camera[:, None, :3, 3]
+    local = np.einsum('fji,fnj->fni', camera[:, :3, :3], offset)
+    return local[:, :, 0], local[:, :, 1], -local[:, :, 2]
+
+
+def projected_sizes(camera, centres, radii, focal, size, clip_start=0.1):
+    """Projected diameter in pixels of spheres seen from per-frame camera matrices.
+    - camera: (F, 4, 4); centres: (F, N, 3) or (N, 3) in world space; radii: (F, N) or (N,)
+    Spheres entirely outside the frame or behind the camera get 0.
+    """
+    x, y, z = project(camera, centres)
+    radii = np.broadcast_to(radii, z.shape)
+    depth = np.maximum(z, 1e-6)
+    diameter = 2.0 * radii * focal / depth
+    x = np.abs(x) * focal / depth
+    y = np.abs(y) * focal / depth
+    visible = ((z + radii > clip_start)
+               & (x - 0.5 * diameter < 0.5 * size[0])
+               & (y - 0.5 * diameter < 0.5 * size[1]))
+    return np.where(visible, diameter, 0.0)
+
+
+def levels_for(sizes):
+    """Level per projected size: 0 above LOD_PIXELS[0], ..., the last level below LOD_PIXELS[-1]."""
+    return np.sum(np.asarray(sizes)[..., None] < np.array(LOD_PIXELS), axis=-1)
+
+
+# --- Detail levels ---
+
+def useful_detail(pixels, scale):
+    """Noise Detail (octaves - 1) that still resolves on an object `pixels` wide."""
+    return max(0, math.ceil(math.log2(max(pixels, 1.0) / (2.0 * max(scale, 1e-3)))))
+
+
+def decimated_mesh(mesh, ratio, name):
+    """Copy of `mesh` collapsed to `ratio` of its faces (the mesh itself if too small to bother)."""
+    if ratio >= 1.0 or len(mesh.polygons) < MIN_DECIMATE_FACES:
+        return mesh
+    temp = bpy.data.objects.new(name, mesh)
+    bpy.context.scene.collection.objects.link(temp)
+    try:
+        modifier = temp.modifiers.new(name="Decimate", type='DECIMATE')
+        modifier.ratio = ratio
+        evaluated = temp.evaluated_get(bpy.context.evaluated_depsgraph_get())
+        return bpy.data.meshes.new_from_object(evaluated)
+    finally:
+        bpy.data.objects.remove(temp)
+
+
+def simplified_material(material, level):
+    """Copy of `material` with noise Detail capped for `level` (the material itself if unchanged)."""
+    if material is None or level == 0 or not material.use_nodes:
+        return material
+    pixels = LOD_PIXELS[level - 1]
+    caps = {}
+    for node in material.node_tree.nodes:
+        if node.type == 'TEX_NOISE' and not node.inputs['Detail'].is_linked:
+            detail = node.inputs['Detail'].default_value
+            cap = useful_detail(pixels, node.inputs['Scale'].default_value)
+            if cap < detail:
+                caps[node.name] = cap
+    if not caps:
+        return material
+    simple = material.copy()
+    simple.name = f"{material.name}_LOD{level}"
+    for name, cap in caps.items():
+        simple.node_tree.nodes[name].inputs['Detail'].default_value = cap
+    return simple
+
+
+def make_lod_prototypes(name, variants):
+    """make_prototypes for (primitive, material) variants with LEVELS levels each, variant-major."""
+    expanded = []
+    meshes = {}
+    for primitive, material in variants:
+        if primitive not in meshes:
+            base = primitive_mesh(f"{name}_{primitive}", primitive)
+            meshes[primitive] = [decimated_mesh(base, ratio, f"{name}_{primitive}_LOD{level}")
+                                 for level, ratio in enumerate(DECIMATE_RATIOS)]
+        for level in range(LEVELS):
+            expanded.append((meshes[primitive][level], simplified_material(material, level)))
+    return make_prototypes(name, expanded)
+
+
+# --- Keyed switches ---
+
+def _own_action(copy, source):
+    """Give `copy` its own copy of `source`'s action, so keys added to one don't reach the other."""
+    anim = source.animation_data
+    if anim is None or anim.action is None:
+        return
+    copy.animation_data_create().action = anim.action.copy()
+    if hasattr(copy.animation_data, 'action_slot') and copy.animation_data.action.slots:
+        copy.animation_data.action_slot = copy.animation_data.action.slots[0]
+
+
+def key_switch(owner, data_path, values, frames):
+    """Constant keyframes on owner.<data_path> wherever the per-frame value changes."""
+    previous = None
+    for frame, value in zip(frames, values):
+        if value == previous:
+            continue
+        setattr(owner, data_path, value)
+        owner.keyframe_insert(data_path=data_path, frame=frame)
+        previous = value
+
+
+def _constant_interpolation(id_block, prefix):
+    anim = id_block.animation_data
+    if anim is None or anim.action is None:
+        return
+    for fcurve in anim.action.fcurves:
+        if fcurve.data_path.startswith(prefix):
+            for kp in fcurve.keyframe_points:
+                kp.interpolation = 'CONSTANT'
+
+
+def lod_object(obj, levels, frames):
+    """Add hidden copies of `obj` for the levels it reaches and key hide_render per frame."""
+    mesh = obj.data
+    versions = {0: obj}
+    for level in sorted(set(int(v) for v in levels) - {0}):
+        copy = obj.copy()
+        copy.name = f"{obj.name}_LOD{level}"
+        copy["lod_of"] = obj.name
+        copy.data = decimated_mesh(mesh, DECIMATE_RATIOS[level], copy.name)
+        for slot in copy.material_slots:
+            material = simplified_material(slot.material, level)
+            slot.link = 'OBJECT'
+            slot.material = material
+        _own_action(copy, obj)
+        for collection in obj.users_collection:
+            collection.objects.link(copy)
+        versions[level] = copy
+    for level, version in versions.items():
+        key_switch(version, 'hide_render', [bool(v != level) for v in levels], frames)
+        _constant_interpolation(version, 'hide_render')
+    return versions
+
+
+def lod_instancer(obj, levels, frames):
+    """Key each instance point's `lod` attribute (levels: (F, N))."""
+    data = obj.data.attributes['lod'].data
+    for i in range(levels.shape[1]):
+        key_switch(data[i], 'value', [float(v) for v in levels[:, i]], frames)
+    _constant_interpolation(obj.data, 'attributes["lod"]')
+
+
+def object_spheres(obj, matrices):
+    """World-space bounding-sphere centres (F, 3) and radii (F,) from per-frame world matrices."""
+    centre, radius = bounding_sphere(obj.data)
+    centres = np.einsum('fij,j->fi', matrices[:, :3, :3], centre) + matrices[:, :3, 3]
+    return centres, radius * np.abs(matrices[:, :3, :3]).max(axis=(1, 2))
+
+
+def instancer_spheres(obj):
+    """World-space centres (N, 3) and radii (N,) of a static instancer's points."""
+    mesh = obj.data
+    count = len(mesh.vertices)
+    co = np.empty(count * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    scale = np.empty(count * 3, dtype=np.float32)
+    mesh.attributes['scale'].data.foreach_get("vector", scale)
+    index = np.empty(count, dtype=np.int32)
+    mesh.attributes['proto_index'].data.foreach_get("value", index)
+    group = obj.modifiers["Instancing"].node_group
+    prototypes = next(n for n in group.nodes if n.type == 'COLLECTION_INFO').inputs['Collection'].default_value
+    protos = sorted(prototypes.objects, key=lambda o: o.name)
+    levels = obj.get("lod_levels", 1)
+    spheres = [bounding_sphere(protos[i * levels].data) for i in range(len(protos) // levels)]
+    proto_radius = np.array([r for _, r in spheres])[index]
+    matrix = np.array(obj.matrix_world)
+    centres = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+    radii = proto_radius * np.abs(scale.reshape(-1, 3)).max(axis=1) * np.abs(matrix[:3, :3]).max()
+    return centres, radii
+
+
+def apply_lod(scene, frame_start=None, frame_end=None):
+    """Compute per-frame levels for every mesh object and LOD-enabled instancer and key the switches.
+    Returns name -> per-frame levels ((F,) for objects, (F, N) for instancers)."""
+    start = frame_start if frame_start is not None else scene.frame_start
+    end = frame_end if frame_end is not None else scene.frame_end
+    frames = list(range(start, end + 1))
+    instancers = [o for o in scene.objects if o.get("lod_levels", 1) > 1 and "Instancing" in o.modifiers]
+    objects = [o for o in scene.objects
+               if o.type == 'MESH' and "Instancing" not in o.modifiers and len(o.data.vertices)]
+    focal, size = focal_pixels(scene, scene.camera)
+    camera, matrices = sample_matrices(scene, objects, frames)
+
+    result = {}
+    for obj in objects:
+        centres, radii = object_spheres(obj, matrices[obj.name])
+        levels = levels_for(projected_sizes(camera, centres[:, None], radii[:, None], focal, size))[:, 0]
+        if levels.any():
+            lod_object(obj, levels, frames)
+        result[obj.name] = levels
+    for obj in instancers:
+        centres, radii = instancer_spheres(obj)
+        levels = levels_for(projected_sizes(camera, centres, radii, focal, size))
+        lod_instancer(obj, levels, frames)
+        result[obj.name] = levels
+    return result
+
+
+def main():
+    vj = load_vj_module()
+    vj.create_scene(lod=False)
+    scene = bpy.context.scene
+    result = apply_lod(scene, vj.FRAME_START, vj.FRAME_END)
+    for name, levels in sorted(result.items()):
+        share = np.bincount(np.ravel(levels), minlength=LEVELS) / np.size(levels)
+        print(f"{name:24s} " + "  ".join(f"L{k} {s:5.1%}" for k, s in enumerate(share)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+"""
+Material Library
+Single source of truth for every material used by the scenes. Each definition is
+a builder function plus parameters; the build step compiles them once into a
+shared asset .blend where each material is named by its definition hash, and
+scenes append (or link) them with bpy.data.libraries.load instead of rebuilding
+node trees in Python. Editing a builder or its parameters changes the hash, so
+only stale materials are recompiled.
+
+Usage:
+  /Applications/Blender.app/Contents/MacOS/Blender --background --python material_library.py
+"""
+
+import hashlib
+import inspect
+import json
+import os
+
+import bpy
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+LIBRARY_PATH = os.path.join(SCRIPT_DIR, "materials_library.blend")
+
+
+def _new_material(name):
+    mat = bpy.data.materials.new(name=name)
+    mat.use_nodes = True
+    mat.node_tree.nodes.clear()
+    return mat
+
+
+def build_principled(name, color, metallic=0.0, roughness=0.5, emission_strength=0.0):
+    """Create a principled BSDF material"""
+    mat = _new_material(name)
+    nodes = mat.node_tree.nodes
+
+    # Create nodes
+    node_bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    node_output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Set material properties
+    node_bsdf.inputs['Base Color'].default_value = (*color, 1.0)
+    node_bsdf.inputs['Metallic'].default_value = metallic
+    node_bsdf.inputs['Roughness'].default_value = roughness
+    node_bsdf.inputs['Emission Strength'].default_value = emission_strength
+
+    # Link nodes
+    mat.node_tree.links.new(node_bsdf.outputs['BSDF'], node_output.inputs['Surface'])
+
+    return mat
+
+
+def build_glass(name, color, ior=1.45):
+    """Create a glass material"""
+    mat = _new_material(name)
+    nodes = mat.node_tree.nodes
+
+    # Create nodes
+    node_bsdf = nodes.new(type='ShaderNodeBsdfGlass')
+    node_output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Set properties
+    node_bsdf.inputs['Color'].default_value = (*color, 1.0)
+    node_bsdf.inputs['IOR'].default_value = ior
+
+    # Link nodes
+    mat.node_tree.links.new(node_bsdf.outputs['BSDF'], node_output.inputs['Surface'])
+
+    return mat
+
+
+def build_glossy(name, color, roughness=0.1):
+    """Create a glossy metallic material"""
+    mat = _new_material(name)
+    nodes = mat.node_tree.nodes
+
+    # Create nodes
+    node_bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    node_output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Set properties
+    node_bsdf.inputs['Base Color'].default_value = (*color, 1.0)
+    node_bsdf.inputs['Metallic'].default_value = 1.0
+    node_bsdf.inputs['Roughness'].default_value = roughness
+
+    # Link nodes
+    mat.node_tree.links.new(node_bsdf.outputs['BSDF'], node_output.inputs['Surface'])
+
+    return mat
+
+
+def build_emission(name, color, strength=5.0):
+    """Create an emissive material"""
+    mat = _new_material(name)
+    nodes = mat.node_tree.nodes
+
+    # Create nodes
+    node_emission = nodes.new(type='ShaderNodeEmission')
+    node_output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Set properties
+    node_emission.inputs['Color'].default_value = (*color, 1.0)
+    node_emission.inputs['Strength'].default_value = strength
+
+    # Link nodes
+    mat.node_tree.links.new(node_emission.outputs['Emission'], node_output.inputs['Surface'])
+
+    return mat
+
+
+def build_marble(name, roughness=0.25, specular=0.6):
+    """Create a procedural marble material (Mapping node drives the flow animation)"""
+    mat = _new_material(name)
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+
+    # Create nodes
+    tex_coord = nodes.new(type='ShaderNodeTexCoord')
+    mapping = nodes.new(type='ShaderNodeMapping')
+    noise_tex1 = nodes.new(type='ShaderNodeTexNoise')
+    noise_tex2 = nodes.new(type='ShaderNodeTexNoise')
+    mix_rgb = nodes.new(type='ShaderNodeMix')
+    color_ramp = nodes.new(type='ShaderNodeValToRGB')
+    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Configure noise textures
+    noise_tex1.inputs['Scale'].default_value = 3.0
+    noise_tex1.inputs['Detail'].default_value = 8.0
+    noise_tex1.inputs['Roughness'].default_value = 0.5
+
+    noise_tex2.inputs['Scale'].default_value = 6.0
+    noise_tex2.inputs['Detail'].default_value = 4.0
+
+    # Configure color ramp for marble veins
+    color_ramp.color_ramp.elements[0].color = (0.9, 0.9, 0.95, 1.0)
+    color_ramp.color_ramp.elements[1].color = (0.2, 0.2, 0.25, 1.0)
+
+    # Configure BSDF
+    bsdf.inputs['Roughness'].default_value = roughness
+    bsdf.inputs['Specular IOR Level'].default_value = specular
+
+    # Link nodes
+    links.new(tex_coord.outputs['Generated'], mapping.inputs['Vector'])
+    links.new(mapping.outputs['Vector'], noise_tex1.inputs['Vector'])
+    links.new(mapping.outputs['Vector'], noise_tex2.inputs['Vector'])
+    links.new(noise_tex1.outputs['Fac'], mix_rgb.inputs['A'])
+    links.new(noise_tex2.outputs['Fac'], mix_rgb.inputs['B'])
+    links.new(mix_rgb.outputs['Result'], color_ramp.inputs['Fac'])
+    links.new(color_ramp.outputs['Color'], bsdf.inputs['Base Color'])
+    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
+
+    return mat
+
+
+def build_lava(name, roughness=0.7, emission_strength=2.5):
+    """Create a procedural lava/magma material (Mapping node drives the flow animation)"""
+    mat = _new_material(name)
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+
+    # Create nodes
+    tex_coord = nodes.new(type='ShaderNodeTexCoord')
+    mapping = nodes.new(type='ShaderNodeMapping')
+    noise_tex = nodes.new(type='ShaderNodeTexNoise')
+    voronoi_tex = nodes.new(type='ShaderNodeTexVoronoi')
+    color_ramp1 = nodes.new(type='ShaderNodeValToRGB')
+    color_ramp2 = nodes.new(type='ShaderNodeValToRGB')
+    mix_rgb = nodes.new(type='ShaderNodeMix')
+    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Configure textures
+    noise_tex.inputs['Scale'].default_value = 4.0
+    noise_tex.inputs['Detail'].default_value = 10.0
+    voronoi_tex.inputs['Scale'].default_value = 3.0
+
+    # Configure color ramps
+    color_ramp1.color_ramp.elements[0].color = (0.1, 0.0, 0.0, 1.0)
+    color_ramp1.color_ramp.elements[1].color = (1.0, 0.3, 0.0, 1.0)
+
+    color_ramp2.color_ramp.elements[0].position = 0.3
+    color_ramp2.color_ramp.elements[1].position = 0.7
+
+    # Configure BSDF for emission
+    bsdf.inputs['Roughness'].default_value = roughness
+    bsdf.inputs['Emission Strength'].default_value = emission_strength
+
+    # Link nodes
+    links.new(tex_coord.outputs['Generated'], mapping.inputs['Vector'])
+    links.new(mapping.outputs['Vector'], noise_tex.inputs['Vector'])
+    links.new(mapping.outputs['Vector'], voronoi_tex.inputs['Vector'])
+    links.new(noise_tex.outputs['Fac'], color_ramp1.inputs['Fac'])
+    links.new(voronoi_tex.outputs['Distance'], color_ramp2.inputs['Fac'])
+    links.new(color_ramp1.outputs['Color'], mix_rgb.inputs['A'])
+    links.new(color_ramp2.outputs['Color'], mix_rgb.inputs['B'])
+    links.new(mix_rgb.outputs['Result'], bsdf.inputs['Base Color'])
+    links.new(mix_rgb.outputs['Result'], bsdf.inputs['Emission Color'])
+    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
+
+    return mat
+
+
+def build_crystal(name, voronoi_scale=10.0, glossy_roughness=0.08, glossy_mix=0.25):
+    """Create a procedural crystal material"""
+    mat = _new_material(name)
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+
+    # Create nodes
+    tex_coord = nodes.new(type='ShaderNodeTexCoord')
+    voronoi_tex = nodes.new(type='ShaderNodeTexVoronoi')
+    color_ramp = nodes.new(type='ShaderNodeValToRGB')
+    glass_bsdf = nodes.new(type='ShaderNodeBsdfGlass')
+    glossy_bsdf = nodes.new(type='ShaderNodeBsdfGlossy')
+    mix_shader = nodes.new(type='ShaderNodeMixShader')
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Configure voronoi
+    voronoi_tex.inputs['Scale'].default_value = voronoi_scale
+    voronoi_tex.feature = 'DISTANCE_TO_EDGE'
+
+    # Configure color ramp
+    color_ramp.color_ramp.elements[0].color = (0.3, 0.5, 1.0, 1.0)
+    color_ramp.color_ramp.elements[1].color = (0.8, 0.9, 1.0, 1.0)
+
+    # Configure shaders
+    glass_bsdf.inputs['IOR'].default_value = 1.6
+    glossy_bsdf.inputs['Roughness'].default_value = glossy_roughness
+
+    # Link nodes
+    links.new(tex_coord.outputs['Generated'], voronoi_tex.inputs['Vector'])
+    links.new(voronoi_tex.outputs['Distance'], color_ramp.inputs['Fac'])
+    links.new(color_ramp.outputs['Color'], glass_bsdf.inputs['Color'])
+    links.new(color_ramp.outputs['Color'], glossy_bsdf.inputs['Color'])
+    links.new(glass_bsdf.outputs['BSDF'], mix_shader.inputs[1])
+    links.new(glossy_bsdf.outputs['BSDF'], mix_shader.inputs[2])
+    links.new(mix_shader.outputs['Shader'], output.inputs['Surface'])
+    mix_shader.inputs['Fac'].default_value = glossy_mix
+
+    return mat
+
+
+def build_rusty_metal(name, noise_scale=14.0, noise_detail=18.0, metallic=0.9, roughness=0.55):
+    """Create a procedural rusty metal material"""
+    mat = _new_material(name)
+    nodes = mat.node_tree.nodes
+    links = mat.node_tree.links
+
+    # Create nodes
+    tex_coord = nodes.new(type='ShaderNodeTexCoord')
+    noise_tex = nodes.new(type='ShaderNodeTexNoise')
+    color_ramp = nodes.new(type='ShaderNodeValToRGB')
+    bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+
+    # Configure noise
+    noise_tex.inputs['Scale'].default_value = noise_scale
+    noise_tex.inputs['Detail'].default_value = noise_detail
+
+    # Configure color ramp for rust
+    color_ramp.color_ramp.elements[0].color = (0.6, 0.3, 0.1, 1.0)  # Rust
+    color_ramp.color_ramp.elements[1].color = (0.4, 0.4, 0.45, 1.0)  # Metal
+
+    # Configure BSDF
+    bsdf.inputs['Metallic'].default_value = metallic
+    bsdf.inputs['Roughness'].default_value = roughness
+
+    # Link nodes
+    links.new(tex_coord.outputs['Generated'], noise_tex.inputs['Vector'])
+    links.new(noise_tex.outputs['Fac'], color_ramp.inputs['Fac'])
+    links.new(color_ramp.outputs['Color'], bsdf.inputs['Base Color'])
+    links.new(color_ramp.outputs['Color'], bsdf.inputs['Roughness'])
+    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
+
+    return mat
+
+
+# Every material used by the scenes: key -> (builder, parameters)
+MATERIALS = {
+    # Scene 1: geometric abstract
+    'Red_Glossy': (build_principled, {'color': (0.8, 0.1, 0.1), 'metallic': 0.8, 'roughness': 0.2}),
+    'Blue_Matte': (build_principled, {'color': (0.1, 0.3, 0.9), 'metallic': 0.0, 'roughness': 0.8}),
+    'Gold': (build_principled, {'color': (1.0, 0.766, 0.336), 'metallic': 1.0, 'roughness': 0.3}),
+    'Cyan_Emit': (build_principled, {'color': (0.0, 0.8, 0.8), 'roughness': 0.5, 'emission_strength': 2.0}),
+    'Purple': (build_principled, {'color': (0.6, 0.1, 0.8), 'metallic': 0.5, 'roughness': 0.4}),
+    'Orange': (build_principled, {'color': (1.0, 0.5, 0.0), 'metallic': 0.0, 'roughness': 0.3}),
+    'Ground': (build_principled, {'color': (0.2, 0.2, 0.25), 'metallic': 0.9, 'roughness': 0.1}),
+
+    # Scene 2: lighting showcase
+    'Mirror_Chrome': (build_glossy, {'color': (0.9, 0.9, 0.95), 'roughness': 0.05}),
+    'Glass_Red': (build_glass, {'color': (1.0, 0.3, 0.3)}),
+    'Glass_Blue': (build_glass, {'color': (0.3, 0.3, 1.0)}),
+    'Glass_Green': (build_glass, {'color': (0.3, 1.0, 0.3)}),
+    'Glass_Yellow': (build_glass, {'color': (1.0, 0.8, 0.3)}),
+    'Emit_Red': (build_emission, {'color': (1.0, 0.2, 0.2), 'strength': 10.0}),
+    'Emit_Blue': (build_emission, {'color': (0.2, 0.2, 1.0), 'strength': 10.0}),
+    'Emit_Yellow': (build_emission, {'color': (1.0, 1.0, 0.2), 'strength': 10.0}),
+    'Emit_Cyan': (build_emission, {'color': (0.2, 1.0, 1.0), 'strength': 10.0}),
+    'Glossy_Ground': (build_glossy, {'color': (0.1, 0.1, 0.15), 'roughness': 0.2}),
+    'Wall': (build_glossy, {'color': (0.8, 0.8, 0.9), 'roughness': 0.4}),
+
+    # Scene 3 and the VJ loop: procedural materials
+    'Marble': (build_marble, {}),
+    'Lava': (build_lava, {}),
+    'Crystal': (build_crystal, {}),
+    'RustyMetal': (build_rusty_metal, {}),
+}
+
+
+def definition_hash(key):
+    """Hash of a material definition: builder source, parameters and Blender version."""
+    builder, params = MATERIALS[key]
+    payload = json.dumps({
+        'builder': inspect.getsource(builder),
+        'params': params,
+        'blender': list(bpy.app.version[:2]),
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def library_name(key):
+    """Datablock name of a compiled definition inside the library file."""
+    return f"{key}@{definition_hash(key)}"
+
+
+def _library_contents(path):
+    if not os.path.exists(path):
+        return set()
+    with bpy.data.libraries.load(path) as (data_from, _):
+        return set(data_from.materials)
+
+
+def build_library(path=LIBRARY_PATH, force=False):
+    """Compile stale or missing definitions into the library file.
+    Returns the keys that were (re)built.
+    """
+    wanted = {library_name(key): key for key in MATERIALS}
+    existing = set() if force else _library_contents(path)
+    missing = [key for name, key in wanted.items() if name not in existing]
+    if not missing:
+        return []
+
+    # Bring the up-to-date materials along so the rewritten file keeps them
+    materials = set()
+    keep = [name for name in wanted if name in existing]
+    if keep:
+        with bpy.data.libraries.load(path, link=False) as (_, data_to):
+            data_to.materials = keep
+        materials.update(data_to.materials)
+
+    for key in missing:
+        builder, params = MATERIALS[key]
+        materials.add(builder(library_name(key), **params))
+
+    bpy.data.libraries.write(path, materials, fake_user=True)
+    for mat in materials:
+        bpy.data.materials.remove(mat)
+    print(f"Material library: compiled {', '.join(missing)} into {path}")
+    return missing
+
+
+_library_checked = set()
+
+
+def load_material(key, name=None, link=False, path=LIBRARY_PATH):
+    """Return a material from the library, compiling the library first if it is stale.
+    - key: definition key in MATERIALS
+    - name: datablock name in the scene (defaults to the key); ignored when linking
+    - link: link instead of append; linked materials are shared and read-only,
+      so use append when the material gets keyframes
+    """
+    if path not in _library_checked:
+        build_library(path)
+        _library_checked.add(path)
+
+    with bpy.data.libraries.load(path, link=link) as (data_from, data_to):
+        data_to.materials = [library_name(key)]
+    mat = data_to.materials[0]
+    if not link:
+        mat.name = name or key
+        mat.use_fake_user = False
+    return mat
+
+
+if __name__ == "__main__":
+    build_library(force=True)
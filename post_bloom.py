@@ -0,0 +1,217 @@
+"""
+Bloom Post Pass
+Re-creates the VJ loop's compositor glow (Glare node, FOG_GLOW) on rendered HDR
+frames with vectorized NumPy, over whole sequences on a thread pool, so glow can
+be tuned and re-applied without path tracing.
+
+Same steps as the Glare node:
+  1. highlights: pixels whose luminance reaches the threshold, minus the threshold
+  2. fog glow: convolution with Blender's fog-glow kernel ((2^size + 1) px,
+     exp(-9 r^(1/8)) under a Hann window), here approximated by a weighted
+     multi-scale Gaussian pyramid fitted once to that kernel
+  3. mix: -1 keeps only the image, 0 adds the glow, 1 keeps only the glow
+
+Frames go through the scene's view transform on output, like the render.
+
+Usage:
+  # HDR frames without the compositor glow (EXR sequence)
+  blender --background --python post_bloom.py -- render outputs/vj_hdr [--preview]
+  # glow + view transform -> PNG frames (+ optional MP4)
+  blender --background --python post_bloom.py -- apply outputs/vj_hdr outputs/vj_glow --video outputs/vj_loop_glow.mp4 --mix 0.3
+"""
+
+import argparse
+import functools
+import glob
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import encode_image_sequence, load_image_array, save_render_array  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+LUMA = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+BINOMIAL = np.array([1, 4, 6, 4, 1], dtype=np.float32) / 16
+
+
+def fog_glow_kernel(size):
+    """Blender's normalized fog-glow kernel, (2^size + 1) pixels square."""
+    n = (1 << size) + 1
+    c = (np.arange(n) + 0.5) / n * 2.0 - 1.0
+    u, v = np.meshgrid(c, c)
+    r = (u * u + v * v) * 0.25 * n
+    kernel = np.exp(-np.sqrt(np.sqrt(np.sqrt(r))) * 9.0)
+    kernel *= (0.5 + 0.5 * np.cos(u * np.pi)) * (0.5 + 0.5 * np.cos(v * np.pi))
+    return kernel / kernel.sum()
+
+
+# --- Multi-scale pyramid ---
+
+def _blur(x):
+    """5-tap binomial blur (separable, edge-clamped)."""
+    h, w = x.shape[:2]
+    p = np.pad(x, ((2, 2), (2, 2)) + ((0, 0),) * (x.ndim - 2), mode='edge')
+    rows = sum(BINOMIAL[k] * p[k:k + h] for k in range(5))
+    return sum(BINOMIAL[k] * rows[:, k:k + w] for k in range(5))
+
+
+def _down(x):
+    h, w = x.shape[:2]
+    x = np.pad(x, ((0, h % 2), (0, w % 2)) + ((0, 0),) * (x.ndim - 2), mode='edge')
+    return 0.25 * (x[0::2, 0::2] + x[1::2, 0::2] + x[0::2, 1::2] + x[1::2, 1::2])
+
+
+def _up(x, shape):
+    return _blur(x.repeat(2, axis=0).repeat(2, axis=1)[:shape[0], :shape[1]])
+
+
+def pyramid_glow(x, weights):
+    """Sum over levels k of weights[k] * (blur at 1/2^k resolution, upsampled back)."""
+    levels = [x]
+    for _ in range(len(weights) - 1):
+        levels.append(_down(levels[-1]))
+    acc = weights[-1] * _blur(levels[-1])
+    for k in range(len(weights) - 2, -1, -1):
+        acc = _up(acc, levels[k].shape) + weights[k] * _blur(levels[k])
+    return acc
+
+
+def _nnls(A, b):
+    """Least squares with non-negative weights (active-set, small problems)."""
+    active = np.ones(A.shape[1], dtype=bool)
+    while True:
+        w = np.zeros(A.shape[1])
+        w[active] = np.linalg.lstsq(A[:, active], b, rcond=None)[0]
+        if np.all(w >= 0):
+            return w
+        active &= w > 0
+
+
+@functools.lru_cache(maxsize=None)
+def fitted_weights(size):
+    """(identity weight, pyramid weights) whose impulse response best matches the kernel.
+    The fog-glow kernel is mostly a central spike, which maps to the identity term."""
+    kernel = fog_glow_kernel(size)
+    n = kernel.shape[0]
+    half = n // 2
+    centre = n
+    impulse = np.zeros((2 * n + 1, 2 * n + 1))
+    impulse[centre, centre] = 1.0
+    target = np.zeros_like(impulse)
+    target[centre - half:centre + half + 1, centre - half:centre + half + 1] = kernel
+
+    basis = [impulse]
+    for k in range(size):
+        one_hot = np.zeros(size)
+        one_hot[k] = 1.0
+        basis.append(pyramid_glow(impulse, one_hot))
+    A = np.stack([b.ravel() for b in basis], axis=1)
+    w = _nnls(A, target.ravel())
+    return float(w[0]), w[1:].astype(np.float32)
+
+
+def highlights(rgb, threshold):
+    """Glare threshold: pixels with luminance >= threshold, minus threshold, clamped at zero."""
+    bright = (rgb @ LUMA) >= threshold
+    return np.where(bright[:, :, None], np.maximum(rgb - threshold, 0.0), 0.0).astype(np.float32)
+
+
+def mix_glare(image, glare, mix):
+    """Glare node mix: -1 image only, 0 image + glare, 1 glare only."""
+    value = 0.5 + 0.5 * float(np.clip(mix, -1.0, 1.0))
+    factor = 2.0 - 2.0 * abs(value - 0.5)
+    return factor * (image + value * (glare - image))
+
+
+def apply_bloom(pixels, threshold, size, mix):
+    """Fog glow on one scene-linear (h, w, 4) frame; alpha is kept."""
+    rgb = pixels[:, :, :3]
+    bright = highlights(rgb, threshold)
+    identity, weights = fitted_weights(size)
+    glare = identity * bright + pyramid_glow(bright, weights)
+    out = pixels.copy()
+    out[:, :, :3] = mix_glare(rgb, glare, mix)
+    return out
+
+
+def iter_bloomed(paths, threshold, size, mix, threads):
+    """Load frames on the main thread (bpy), bloom them on a pool, yield in order."""
+    fitted_weights(size)
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = []
+        for path in paths:
+            pixels = load_image_array(path, non_color=True)
+            pending.append(pool.submit(apply_bloom, pixels, threshold, size, mix))
+            if len(pending) >= threads * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def bloom_sequence(input_dir, output_dir, threshold, size, mix, threads=os.cpu_count() or 4, video=None, fps=30):
+    """Bloom every EXR in input_dir to PNGs in output_dir (through the view transform)."""
+    paths = sorted(glob.glob(os.path.join(input_dir, "*.exr")))
+    if not paths:
+        raise FileNotFoundError(f"No EXR frames in {input_dir}")
+    os.makedirs(output_dir, exist_ok=True)
+    scene = bpy.context.scene
+    scene.render.image_settings.file_format = 'PNG'
+    for i, pixels in enumerate(iter_bloomed(paths, threshold, size, mix, threads), start=1):
+        save_render_array(os.path.join(output_dir, f"{i:04d}.png"), pixels, scene)
+    print(f"Bloomed {len(paths)} frames to: {output_dir}")
+    if video:
+        encode_image_sequence(os.path.join(output_dir, "%04d.png"), video, fps)
+        print(f"Encoded: {video}")
+
+
+def render_hdr_frames(vj, output_dir, preview=False):
+    """Render the VJ loop to a linear EXR sequence with the compositor glow muted."""
+    vj.create_scene()
+    scene = bpy.context.scene
+    vj.apply_sample_profile(scene, preview)
+    if scene.use_nodes and scene.node_tree:
+        for node in scene.node_tree.nodes:
+            if node.type == 'GLARE':
+                node.mute = True
+    settings = scene.render.image_settings
+    settings.file_format = 'OPEN_EXR'
+    settings.color_depth = '16'
+    settings.exr_codec = 'ZIP'
+    scene.render.filepath = os.path.join(os.path.abspath(output_dir), "####")
+    print(f"Rendering HDR frames to: {output_dir}")
+    bpy.ops.render.render(animation=True)
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    vj = load_vj_module()
+    parser = argparse.ArgumentParser(description="Vectorized fog-glow post pass")
+    sub = parser.add_subparsers(dest='command', required=True)
+    render = sub.add_parser('render', help="Render HDR frames without compositor glow")
+    render.add_argument('output_dir')
+    render.add_argument('--preview', action='store_true')
+    apply = sub.add_parser('apply', help="Apply glow to an EXR sequence")
+    apply.add_argument('input_dir')
+    apply.add_argument('output_dir')
+    apply.add_argument('--threshold', type=float, default=vj.GLOW_THRESHOLD)
+    apply.add_argument('--size', type=int, default=vj.GLOW_SIZE)
+    apply.add_argument('--mix', type=float, default=vj.GLOW_MIX)
+    apply.add_argument('--threads', type=int, default=os.cpu_count() or 4)
+    apply.add_argument('--video', default=None, help="Also encode the PNGs to this MP4")
+    apply.add_argument('--fps', type=int, default=vj.FPS)
+    args = parser.parse_args(argv)
+
+    if args.command == 'render':
+        render_hdr_frames(vj, args.output_dir, args.preview)
+    else:
+        bloom_sequence(args.input_dir, args.output_dir, args.threshold, args.size, args.mix,
+                       args.threads, args.video, args.fps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Preflight Smoke Render for the 120 BPM VJ loop
+Checks a freshly built VJ scene before the expensive render starts. Several
+build steps swallow their errors (emission keyframes, the denoising toggle,
+the compositor glare, the .blend save), so a renamed node socket would
+otherwise show up hours later as a loop without the effect.
+
+Structural checks:
+- expected objects, material node inputs and world inputs exist
+- expected F-curves exist, carry enough keys and actually move; every
+  F-curve of every animated datablock still resolves to a property
+- Render Layers -> Glare -> Composite is linked, unmuted and set to the GLOW_* constants
+- denoising is on (Cycles) and the .blend was saved
+- EEVEE: every look setting render_vj_fast.py applies exists in this Blender
+
+Smoke render: three tiny frames (start, a mid-loop downbeat, end) checked for
+black, flat or blown-out images, and the end -> start loop seam checked for a jump
+against the loop's own motion: the median difference between adjacent frames at
+the start, around the downbeat and at the end.
+
+render_vj_final.py and render_vj_fast.py run this first and abort on failure.
+
+Usage:
+  blender --background --python preflight.py
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import load_image_array  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+SMOKE_WIDTH = 160
+SMOKE_SAMPLES = 4
+MIN_MEAN_LUMA = 0.02
+MIN_LUMA_STD = 0.01
+MAX_CLIPPED = 0.25
+# The end -> start seam may change as much as this many times the median step between adjacent frames
+SEAM_STEP_FACTOR = 3.0
+SEAM_SLACK = 0.005
+
+EXPECTED_OBJECTS = ['LavaSphere', 'KeyLight', 'FillLight', 'RimLight', 'CameraTarget', 'Props']
+# (material, node, input)
+EXPECTED_INPUTS = [
+    ('Marble', 'Mapping', 'Rotation'),
+    ('GroundMarble', 'Mapping', 'Rotation'),
+    ('Lava', 'Mapping', 'Location'),
+    ('Lava', 'Principled BSDF', 'Emission Strength'),
+]
+
+
+class Checks:
+    """Collects pass/fail lines; failures abort the render."""
+
+    def __init__(self):
+        self.failures = []
+
+    def check(self, ok, message):
+        print(f"  [{'ok' if ok else 'FAIL'}] {message}")
+        if not ok:
+            self.failures.append(message)
+        return ok
+
+
+def _node_input(tree, node_name, input_name):
+    node = tree.nodes.get(node_name) if tree else None
+    return node.inputs.get(input_name) if node else None
+
+
+def expected_fcurves(vj, scene):
+    """(label, id_block, data_path, index, min_keys) for every animation the loop depends on."""
+    beats = vj.TOTAL_BEATS + 1
+    objects = bpy.data.objects
+    materials = bpy.data.materials
+    expected = []
+    if 'LavaSphere' in objects:
+        expected += [(f"LavaSphere scale[{i}]", objects['LavaSphere'], 'scale', i, beats) for i in range(3)]
+    if 'FillLight' in objects:
+        expected.append(("FillLight energy", objects['FillLight'].data, 'energy', 0, beats))
+    if scene.camera:
+        expected += [(f"camera location[{i}]", scene.camera, 'location', i, vj.BARS + 1) for i in range(2)]
+    for material, node, name, index, keys in [('Lava', 'Principled BSDF', 'Emission Strength', 0, beats),
+                                              ('Lava', 'Mapping', 'Location', 2, 2),
+                                              ('Marble', 'Mapping', 'Rotation', 2, 2),
+                                              ('GroundMarble', 'Mapping', 'Rotation', 2, 2)]:
+        mat = materials.get(material)
+        socket = _node_input(mat.node_tree if mat else None, node, name)
+        if socket is not None:
+            expected.append((f"{material} {node} {name}", mat.node_tree, socket.path_from_id('default_value'),
+                             index, keys))
+    world = scene.world
+    socket = _node_input(world.node_tree if world else None, 'Background', 'Strength')
+    if socket is not None:
+        expected.append(("world Background Strength", world.node_tree, socket.path_from_id('default_value'),
+                         0, beats))
+    return expected
+
+
+def _animated_ids():
+    for collection in (bpy.data.objects, bpy.data.lights, bpy.data.cameras, bpy.data.meshes):
+        yield from collection
+    for collection in (bpy.data.materials, bpy.data.worlds, bpy.data.scenes):
+        for id_block in collection:
+            yield id_block
+            if id_block.node_tree:
+                yield id_block.node_tree
+
+
+def _glare_setting(glare, attr, label):
+    """A Glare option, whether this Blender exposes it as a property or as a node input."""
+    if hasattr(glare, attr):
+        return getattr(glare, attr)
+    socket = glare.inputs.get(label)
+    return socket.default_value if socket is not None else None
+
+
+def check_structure(vj, scene, checks, missing_settings=()):
+    """Objects, node inputs, F-curves, compositor links and build side effects."""
+    print("Structure:")
+    for name in EXPECTED_OBJECTS:
+        checks.check(name in bpy.data.objects, f"object {name}")
+    checks.check(scene.camera is not None, "scene camera")
+    for material, node, name in EXPECTED_INPUTS:
+        mat = bpy.data.materials.get(material)
+        checks.check(_node_input(mat.node_tree if mat else None, node, name) is not None,
+                     f"{material}: {node} input '{name}'")
+    world = scene.world
+    checks.check(_node_input(world.node_tree if world else None, 'Background', 'Strength') is not None,
+                 "world Background Strength")
+
+    for label, id_block, path, index, min_keys in expected_fcurves(vj, scene):
+        anim = id_block.animation_data
+        fcurve = anim.action.fcurves.find(path, index=index) if anim and anim.action else None
+        if not checks.check(fcurve is not None, f"F-curve {label}"):
+            continue
+        values = [kp.co[1] for kp in fcurve.keyframe_points]
+        checks.check(len(values) >= min_keys and max(values) > min(values),
+                     f"F-curve {label}: {len(values)} keys (need {min_keys}), range {min(values):.3g}..{max(values):.3g}")
+    broken = []
+    for id_block in _animated_ids():
+        anim = id_block.animation_data
+        if not (anim and anim.action):
+            continue
+        for fcurve in anim.action.fcurves:
+            try:
+                id_block.path_resolve(fcurve.data_path)
+            except ValueError:
+                broken.append(f"{id_block.name}: {fcurve.data_path}")
+    checks.check(not broken, f"all F-curves resolve{': ' + ', '.join(broken) if broken else ''}")
+
+    tree = scene.node_tree if scene.use_nodes else None
+    nodes = {n.type: n for n in tree.nodes} if tree else {}
+    glare = nodes.get('GLARE')
+    linked = bool(tree) and all(any(l.from_node.type == a and l.to_node.type == b for l in tree.links)
+                                for a, b in (('R_LAYERS', 'GLARE'), ('GLARE', 'COMPOSITE')))
+    checks.check(scene.render.use_compositing and linked, "compositor Render Layers -> Glare -> Composite")
+    if glare is not None:
+        checks.check(not glare.mute and _glare_setting(glare, 'glare_type', 'Type') == 'FOG_GLOW',
+                     "Glare active, fog glow")
+        expected = {'threshold': ('Threshold', vj.GLOW_THRESHOLD), 'size': ('Size', vj.GLOW_SIZE),
+                    'mix': ('Mix', vj.GLOW_MIX)}
+        for attr, (label, value) in expected.items():
+            found = _glare_setting(glare, attr, label)
+            checks.check(found is not None and np.isclose(found, value), f"Glare {attr} {found} (want {value})")
+
+    if scene.render.engine == 'CYCLES':
+        checks.check(bpy.context.view_layer.cycles.use_denoising, "Cycles denoising on")
+    else:
+        checks.check(not missing_settings,
+                     f"EEVEE look settings{': missing ' + ', '.join(missing_settings) if missing_settings else ''}")
+    checks.check(os.path.basename(bpy.data.filepath) == "scene_03_vj_loop.blend", ".blend saved")
+
+
+def _luma(pixels):
+    return pixels[:, :, 0] * 0.2126 + pixels[:, :, 1] * 0.7152 + pixels[:, :, 2] * 0.0722
+
+
+def _mean_diff(a, b):
+    return float(np.mean(np.abs(a[:, :, :3] - b[:, :, :3])))
+
+
+def smoke_render(vj, scene, checks):
+    """Render start, a mid-loop downbeat and end at thumbnail size; check stats and the seam."""
+    mid = vj.beat_frame((vj.BARS // 2) * vj.BEATS_PER_BAR)
+    frames = [vj.FRAME_START, mid, vj.FRAME_END]
+    steps = [(vj.FRAME_START, vj.FRAME_START + 1), (mid - 1, mid), (mid, mid + 1), (vj.FRAME_END - 1, vj.FRAME_END)]
+    rendered = sorted(set(frames) | {f for pair in steps for f in pair})
+    render = scene.render
+    saved = (render.resolution_percentage, render.filepath, render.image_settings.file_format,
+             scene.cycles.samples, scene.eevee.taa_render_samples, scene.frame_current)
+    render.resolution_percentage = max(1, round(100 * SMOKE_WIDTH / render.resolution_x))
+    render.image_settings.file_format = 'PNG'
+    scene.cycles.samples = SMOKE_SAMPLES
+    scene.eevee.taa_render_samples = SMOKE_SAMPLES
+    tmp = tempfile.mkdtemp(prefix="preflight_")
+    print(f"Smoke render: frames {rendered} at {render.resolution_percentage}%")
+    pixels = {}
+    try:
+        for frame in rendered:
+            scene.frame_set(frame)
+            render.filepath = os.path.join(tmp, f"{frame:04d}.png")
+            bpy.ops.render.render(write_still=True)
+            pixels[frame] = load_image_array(render.filepath)
+    finally:
+        (render.resolution_percentage, render.filepath, render.image_settings.file_format,
+         scene.cycles.samples, scene.eevee.taa_render_samples, frame) = saved
+        scene.frame_set(frame)
+
+    for frame in frames:
+        luma = _luma(pixels[frame])
+        clipped = float(np.mean(luma >= 0.999))
+        checks.check(luma.mean() >= MIN_MEAN_LUMA, f"frame {frame}: mean luma {luma.mean():.3f}")
+        checks.check(luma.std() >= MIN_LUMA_STD, f"frame {frame}: luma spread {luma.std():.3f}")
+        checks.check(clipped <= MAX_CLIPPED, f"frame {frame}: {clipped:.1%} clipped")
+    step = float(np.median([_mean_diff(pixels[a], pixels[b]) for a, b in steps]))
+    seam = _mean_diff(pixels[vj.FRAME_END], pixels[vj.FRAME_START])
+    limit = SEAM_STEP_FACTOR * step + SEAM_SLACK
+    checks.check(seam <= limit, f"loop seam {vj.FRAME_END} -> {vj.FRAME_START}: mean difference {seam:.3f} "
+                                f"(median adjacent step {step:.3f}, limit {limit:.3f})")
+
+
+def run_preflight(vj, scene, missing_settings=()):
+    """All checks on a built scene; returns the list of failures.
+    - missing_settings: EEVEE look settings configure_eevee_look could not apply
+    """
+    checks = Checks()
+    check_structure(vj, scene, checks, missing_settings)
+    smoke_render(vj, scene, checks)
+    return checks.failures
+
+
+def require_preflight(vj, scene, missing_settings=()):
+    """Abort (RuntimeError) before a full render when any preflight check fails."""
+    failures = run_preflight(vj, scene, missing_settings)
+    if failures:
+        raise RuntimeError(f"Preflight failed ({len(failures)} checks):\n  " + "\n  ".join(failures))
+    print("Preflight passed")
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Preflight checks and smoke render for the VJ loop")
+    parser.parse_args(argv)
+
+    vj = load_vj_module()
+    vj.create_scene()
+    failures = run_preflight(vj, bpy.context.scene)
+    print(f"Preflight {'FAILED' if failures else 'passed'}: {len(failures)} failure(s)")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
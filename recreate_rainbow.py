@@ -1,5 +1,10 @@
 import bpy
 import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from render_flat_emission import render_flat_still  # noqa: E402
 
 # Clear existing mesh objects
 bpy.ops.object.select_all(action='SELECT')
@@ -157,5 +162,8 @@ bg_node = world.node_tree.nodes['Background']
 bg_node.inputs['Color'].default_value = (0.02, 0.02, 0.02, 1)
 
 print("Setup complete. Starting render...")
-bpy.ops.render.render(write_still=True)
+# Flat emission plane under an ortho camera: evaluate the node graph in NumPy,
+# falling back to Cycles if the graph stops matching the fast path
+if not render_flat_still(scene):
+    bpy.ops.render.render(write_still=True)
 print("Render complete!")
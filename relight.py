@@ -0,0 +1,255 @@
+"""
+Light-Group Relighting for the 120 BPM VJ loop
+Renders the loop once with Cycles light groups, one denoised pass per group,
+and recombines the passes with new per-group intensities, colours and beat
+envelopes, so lighting and pulse variants of a finished loop take seconds per
+frame instead of a re-render.
+
+Groups: key (sun), fill (pulsing area), rim (area), lava (emissive sphere and
+its LOD copies) and world. The render stage also records each group's rendered
+strength per frame (light energy, emission strength, background strength) in
+envelopes.json; a new envelope rescales a group's pass by new / rendered
+strength. Light transport is linear per colour channel, so scaling a group's
+pass by an RGB factor is the same as re-rendering with that light tinted.
+
+Whatever the groups don't capture (denoiser differences) stays in the
+residual: the 'rendered' variant reproduces the beauty pass exactly.
+The compositor glow is re-applied with post_bloom.py after recombination.
+
+Usage:
+  blender --background --python relight.py -- render outputs/vj_lightgroups [--preview]
+  blender --background --python relight.py -- apply outputs/vj_lightgroups outputs/vj_warm_rim.mp4 --variant warm_rim
+  blender --background --python relight.py -- apply outputs/vj_lightgroups outputs/vj_custom.mp4 --spec look.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import (  # noqa: E402
+    add_pass_output, encode_image_sequence, find_pass_file, load_image_array, save_render_array,
+)
+from post_bloom import apply_bloom  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+# Light group -> object names (LOD copies named <name>_LOD<n> follow their original)
+LIGHT_GROUPS = {
+    'key': ['KeyLight'],
+    'fill': ['FillLight'],
+    'rim': ['RimLight'],
+    'lava': ['LavaSphere'],
+}
+WORLD_GROUP = 'world'
+
+# Per group: intensity (scalar), color (RGB factor) and envelope (pulse_envelope
+# arguments, in the group's own strength units: W for lights, emission strength)
+VARIANTS = {
+    'rendered': {},
+    'deep_fill': {
+        'fill': {'envelope': {'base': 60.0, 'peak': 320.0, 'decay': 0.25}},
+    },
+    'warm_rim': {
+        'rim': {'intensity': 1.6, 'color': (1.0, 0.55, 0.25)},
+        'key': {'intensity': 0.8},
+    },
+    'lava_drop': {
+        'lava': {'envelope': {'base': 0.5, 'peak': 6.0, 'downbeat_peak': 12.0, 'decay': 0.2}},
+        'key': {'intensity': 0.5},
+        'world': {'intensity': 0.6, 'color': (0.7, 0.8, 1.2)},
+    },
+}
+
+
+def group_members(scene, names):
+    return [o for o in scene.objects
+            if any(o.name == n or o.name.startswith(f"{n}_LOD") for n in names)]
+
+
+def _emission_input(obj):
+    for slot in obj.material_slots:
+        if slot.material and slot.material.use_nodes:
+            for node in slot.material.node_tree.nodes:
+                if node.type == 'BSDF_PRINCIPLED':
+                    return node.inputs['Emission Strength']
+                if node.type == 'EMISSION':
+                    return node.inputs['Strength']
+    return None
+
+
+def group_strength(scene, group):
+    """Current strength of a group: light energy, emission strength or background strength.
+    For several members, the first one sets the envelope (members pulse together)."""
+    if group == WORLD_GROUP:
+        background = scene.world.node_tree.nodes.get('Background')
+        return float(background.inputs['Strength'].default_value) if background else 1.0
+    for obj in group_members(scene, LIGHT_GROUPS[group]):
+        if obj.type == 'LIGHT':
+            return float(obj.data.energy)
+        emission = _emission_input(obj)
+        if emission is not None:
+            return float(emission.default_value)
+    return 1.0
+
+
+# --- Render stage ---
+
+def setup_light_groups(scene):
+    """Create the light groups and assign lights, emitters and the world to them."""
+    view_layer = bpy.context.view_layer
+    for group, names in LIGHT_GROUPS.items():
+        if group not in view_layer.lightgroups:
+            view_layer.lightgroups.add(name=group)
+        for obj in group_members(scene, names):
+            obj.lightgroup = group
+    if WORLD_GROUP not in view_layer.lightgroups:
+        view_layer.lightgroups.add(name=WORLD_GROUP)
+    scene.world.lightgroup = WORLD_GROUP
+    return list(LIGHT_GROUPS) + [WORLD_GROUP]
+
+
+def render_light_groups(vj, out_dir, preview=False):
+    """Render the loop's beauty and denoised light-group passes, plus envelopes.json."""
+    vj.create_scene()
+    scene = bpy.context.scene
+    vj.apply_sample_profile(scene, preview)
+    groups = setup_light_groups(scene)
+    bpy.context.view_layer.cycles.denoising_store_passes = True
+    for node in scene.node_tree.nodes:
+        if node.type == 'GLARE':
+            node.mute = True
+    passes = {'image': 'Image', **{g: f"Combined_{g}" for g in groups}}
+    add_pass_output(scene, out_dir, passes, denoise=groups)
+
+    frames = list(range(vj.FRAME_START, vj.FRAME_END + 1))
+    envelopes = {g: [] for g in groups}
+    for frame in frames:
+        scene.frame_set(frame)
+        for g in groups:
+            envelopes[g].append(group_strength(scene, g))
+        print(f"Rendering frame {frame} ({len(groups)} light groups)")
+        bpy.ops.render.render(write_still=False)
+    with open(os.path.join(out_dir, "envelopes.json"), 'w') as f:
+        json.dump({'frames': frames, 'groups': envelopes}, f)
+    print(f"Light-group passes written to: {out_dir}")
+
+
+# --- Recombination ---
+
+def pulse_envelope(vj, frames, base, peak, decay=0.35, downbeat_peak=None):
+    """Per-frame value of the loop's beat pulse (as keyed by the spec's pulse_keys: peak on
+    every beat, linear back to base after `decay` of a beat, linear rise to the next beat)."""
+    decay_frames = max(1, int(vj.FRAMES_PER_BEAT * decay))
+    keys = {}
+    for b in range(vj.TOTAL_BEATS + 1):
+        f = vj.beat_frame(b)
+        keys[f] = downbeat_peak if downbeat_peak is not None and vj.is_downbeat(b) else peak
+        keys[min(f + decay_frames, vj.FRAME_END)] = base
+    xs = sorted(keys)
+    return np.interp(frames, xs, [keys[x] for x in xs])
+
+
+def group_weights(vj, variant, frames, rendered):
+    """(F, G, 3) RGB weight per frame and group, relative to the rendered passes."""
+    groups = list(rendered)
+    weights = np.ones((len(frames), len(groups), 3))
+    for j, group in enumerate(groups):
+        settings = variant.get(group, {})
+        weights[:, j] *= settings.get('intensity', 1.0)
+        weights[:, j] *= np.asarray(settings.get('color', (1.0, 1.0, 1.0)))
+        if 'envelope' in settings:
+            new = pulse_envelope(vj, frames, **settings['envelope'])
+            old = np.asarray(rendered[group], dtype=np.float64)
+            weights[:, j] *= (new / np.maximum(old, 1e-6))[:, None]
+    return weights.astype(np.float32)
+
+
+def relight_frame(image, passes, weights):
+    """image + sum_g (w_g - 1) * pass_g; passes: (G, h, w, C), weights: (G, 3)."""
+    out = image.copy()
+    out[:, :, :3] += np.einsum('gc,ghwc->hwc', weights - 1.0, passes[:, :, :, :3])
+    return out
+
+
+def iter_relit(pass_dir, frames, groups, weights, threads, glow=None):
+    """Load each frame's passes on the main thread (bpy), recombine on a pool, yield in order."""
+    def work(image, passes, w):
+        pixels = relight_frame(image, passes, w)
+        return apply_bloom(pixels, *glow) if glow else pixels
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = []
+        for i, frame in enumerate(frames):
+            image = load_image_array(find_pass_file(pass_dir, "", 'image', frame), non_color=True)
+            passes = np.stack([load_image_array(find_pass_file(pass_dir, "", g, frame), non_color=True)
+                               for g in groups])
+            pending.append(pool.submit(work, image, passes, weights[i]))
+            if len(pending) >= threads * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def apply_variant(vj, pass_dir, output_path, variant, work_dir="outputs/relight", threads=os.cpu_count() or 4):
+    """Recombine rendered light-group passes with a variant and encode the loop."""
+    with open(os.path.join(pass_dir, "envelopes.json")) as f:
+        recorded = json.load(f)
+    frames = recorded['frames']
+    rendered = recorded['groups']
+    unknown = set(variant) - set(rendered)
+    if unknown:
+        raise ValueError(f"Unknown light groups in variant: {sorted(unknown)} (have {sorted(rendered)})")
+    weights = group_weights(vj, variant, frames, rendered)
+
+    frames_dir = os.path.abspath(os.path.join(work_dir, "frames"))
+    shutil.rmtree(frames_dir, ignore_errors=True)
+    os.makedirs(frames_dir)
+    scene = bpy.context.scene
+    scene.render.image_settings.file_format = 'PNG'
+    glow = (vj.GLOW_THRESHOLD, vj.GLOW_SIZE, vj.GLOW_MIX)
+    for frame, pixels in zip(frames, iter_relit(pass_dir, frames, list(rendered), weights, threads, glow)):
+        save_render_array(os.path.join(frames_dir, f"{frame:04d}.png"), pixels, scene)
+    encode_image_sequence(os.path.join(frames_dir, "%04d.png"), output_path, vj.FPS, start_number=frames[0])
+    print(f"Saved: {output_path}")
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Light-group passes and post-render relighting")
+    sub = parser.add_subparsers(dest='command', required=True)
+    render = sub.add_parser('render', help="Render light-group passes for the loop")
+    render.add_argument('pass_dir')
+    render.add_argument('--preview', action='store_true')
+    apply = sub.add_parser('apply', help="Recombine passes into a lighting variant")
+    apply.add_argument('pass_dir')
+    apply.add_argument('output')
+    look = apply.add_mutually_exclusive_group()
+    look.add_argument('--variant', choices=sorted(VARIANTS), default='rendered')
+    look.add_argument('--spec', default=None, help="JSON file: group -> {intensity, color, envelope}")
+    apply.add_argument('--work-dir', default="outputs/relight")
+    apply.add_argument('--threads', type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args(argv)
+
+    vj = load_vj_module()
+    if args.command == 'render':
+        out_dir = os.path.abspath(args.pass_dir)
+        os.makedirs(out_dir, exist_ok=True)
+        render_light_groups(vj, out_dir, args.preview)
+        return
+    if args.spec:
+        with open(args.spec) as f:
+            variant = json.load(f)
+    else:
+        variant = VARIANTS[args.variant]
+    apply_variant(vj, os.path.abspath(args.pass_dir), args.output, variant, args.work_dir, args.threads)
+
+
+if __name__ == "__main__":
+    main()
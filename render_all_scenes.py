@@ -18,7 +18,10 @@ import sys
 import os
 
 # Get the directory where this script is located
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sample_tuner import apply_tuned_settings  # noqa: E402
+from script_env import SCRIPT_DIR  # noqa: E402
 
 # Available scenes
 SCENES = {
@@ -55,6 +58,18 @@ def print_banner():
     """
     print(banner)
 
+def build_scene(scene_num):
+    """Load and execute a scene script, leaving its scene in bpy.context"""
+    scene_info = SCENES[scene_num]
+    script_path = os.path.join(SCRIPT_DIR, scene_info['script'])
+    if not os.path.exists(script_path):
+        print(f"Error: Script not found at {script_path}")
+        return False
+
+    print(f"Executing scene script: {scene_info['script']}")
+    exec(open(script_path).read(), {'__name__': '__main__', '__file__': script_path, 'bpy': bpy})
+    return True
+
 def render_scene(scene_num):
     """Render a specific scene"""
     if scene_num not in SCENES:
@@ -67,14 +82,10 @@ def render_scene(scene_num):
     print(f"Description: {scene_info['description']}")
     print(f"{'='*70}\n")
 
-    # Load and execute the scene script
-    script_path = os.path.join(SCRIPT_DIR, scene_info['script'])
-    if not os.path.exists(script_path):
-        print(f"Error: Script not found at {script_path}")
+    if not build_scene(scene_num):
         return False
-
-    print(f"Executing scene script: {scene_info['script']}")
-    exec(open(script_path).read(), {'__name__': '__main__', 'bpy': bpy})
+    # Samples from sample_tuner.py, when this scene has been tuned
+    apply_tuned_settings(bpy.context.scene, scene_num)
 
     # Set output path
     output_path = os.path.join(SCRIPT_DIR, scene_info['output'])
@@ -0,0 +1,266 @@
+"""
+Multi-Aspect Deliverables from One Overscan Render
+Renders the VJ loop once on an overscan canvas that holds every requested
+aspect ratio at the master's pixel scale, then crops (and resamples, for
+targets with a zoom) each deliverable out of that one frame sequence in bulk.
+
+Each target is a crop of the canvas: its size, a zoom (crop size / output
+size; 1.0 keeps the master's pixel scale), a centre offset in master pixels
+and a safe-area fraction. The canvas grows symmetrically around the master
+frame, so the camera keeps its framing: only the lens widens (or the ortho
+scale grows) by the canvas / master ratio along the sensor-fit axis, and the
+master crop of the canvas is pixel-identical to a plain render.
+
+Before rendering, every subject (mesh objects and instanced props smaller
+than the frame) is projected through the camera animation: a subject that
+sits inside the master's safe area but crosses a target's safe area is
+reported per target, and the camera's track target must stay inside every
+safe area. --strict aborts the render on any issue.
+
+Usage:
+  blender --background --python render_aspects.py -- --aspects 16x9,9x16,1x1
+  blender --background --python render_aspects.py -- --check-only
+  blender --background --python render_aspects.py -- --crop-only --work-dir outputs/aspects
+"""
+
+import argparse
+import glob
+import math
+import os
+import shutil
+import sys
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import encode_image_sequence, load_image_array, save_image_array  # noqa: E402
+from lod import focal_pixels, instancer_spheres, object_spheres, project, sample_matrices  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+# Deliverables: output size, zoom (crop = size * zoom), centre offset in master pixels, safe fraction
+ASPECTS = {
+    '16x9': {'size': (1920, 1080), 'zoom': 1.0, 'offset': (0, 0), 'safe': 0.9},
+    '9x16': {'size': (1080, 1920), 'zoom': 1.0, 'offset': (0, 0), 'safe': 0.9},
+    '1x1': {'size': (1080, 1080), 'zoom': 1.0, 'offset': (0, 0), 'safe': 0.9},
+}
+# Master frame of scene_03_vj_loop.py (used when cropping an existing overscan render)
+MASTER_SIZE = (1920, 1080)
+# Overscan frames per bulk crop (a 1920x1920 RGBA float frame is ~59 MB)
+BATCH = 4
+
+
+# --- Layout ---
+
+def crop_rects(master, aspects):
+    """Canvas size and each target's crop (x0, y0, w, h) in canvas pixels, top row first.
+    The canvas is centred on the master frame and keeps the master's parity, so the
+    master crop lands on whole pixels."""
+    half_w, half_h = master[0] / 2.0, master[1] / 2.0
+    crops = {}
+    for name, aspect in aspects.items():
+        w = int(round(aspect['size'][0] * aspect['zoom']))
+        h = int(round(aspect['size'][1] * aspect['zoom']))
+        cx, cy = aspect['offset']
+        crops[name] = (cx - w / 2.0, cy - h / 2.0, w, h)
+        half_w = max(half_w, abs(cx - w / 2.0), abs(cx + w / 2.0))
+        half_h = max(half_h, abs(cy - h / 2.0), abs(cy + h / 2.0))
+    width = int(math.ceil(2 * half_w))
+    height = int(math.ceil(2 * half_h))
+    width += (width - master[0]) % 2
+    height += (height - master[1]) % 2
+    rects = {name: (int(math.floor(x0 + width / 2.0)), int(math.floor(y0 + height / 2.0)), w, h)
+             for name, (x0, y0, w, h) in crops.items()}
+    return (width, height), rects
+
+
+def safe_rect(aspect, rect, canvas):
+    """A target's safe area as (x0, y0, x1, y1) in master-centred pixels."""
+    x0, y0, w, h = rect
+    inset = 0.5 * (1.0 - aspect['safe'])
+    left, top = x0 - canvas[0] / 2.0, y0 - canvas[1] / 2.0
+    return left + inset * w, top + inset * h, left + (1 - inset) * w, top + (1 - inset) * h
+
+
+def setup_overscan(scene, canvas):
+    """Render the canvas instead of the master frame, keeping the master's pixel scale."""
+    render = scene.render
+    master = (render.resolution_x, render.resolution_y)
+    cam = scene.camera.data
+    if cam.sensor_fit == 'AUTO':
+        cam.sensor_fit = 'HORIZONTAL' if master[0] >= master[1] else 'VERTICAL'
+    axis = 0 if cam.sensor_fit == 'HORIZONTAL' else 1
+    ratio = canvas[axis] / master[axis]
+    if cam.type == 'ORTHO':
+        cam.ortho_scale *= ratio
+    else:
+        cam.lens /= ratio
+    # Shift is in units of the fit axis; keep the same offset in pixels
+    cam.shift_x /= ratio
+    cam.shift_y /= ratio
+    render.resolution_x, render.resolution_y = canvas
+
+
+# --- Safe-area checks ---
+
+def subjects(scene, matrices):
+    """name -> (centres (F, N, 3), radii (F, N)) for everything that should stay framed."""
+    found = {}
+    for obj in scene.objects:
+        if obj.type != 'MESH' or "lod_of" in obj or not len(obj.data.vertices):
+            continue
+        if "Instancing" in obj.modifiers:
+            centres, radii = instancer_spheres(obj)
+            for i in range(len(centres)):
+                found[f"{obj.name}[{i}]"] = (centres[None, i:i + 1], np.full((1, 1), radii[i]))
+        elif obj.name in matrices:
+            centres, radii = object_spheres(obj, matrices[obj.name])
+            found[obj.name] = (centres[:, None], radii[:, None])
+    return found
+
+
+def _circles(camera, centres, radii, focal):
+    """Projected circles (x, y, r) in master-centred pixels (y down); r is inf behind the camera."""
+    x, y, z = project(camera, centres)
+    depth = np.maximum(z, 1e-6)
+    r = np.where(z > 0, np.broadcast_to(radii, z.shape) * focal / depth, np.inf)
+    return x * focal / depth, -y * focal / depth, r
+
+
+def _inside(x, y, r, rect):
+    x0, y0, x1, y1 = rect
+    return (x - r >= x0) & (x + r <= x1) & (y - r >= y0) & (y + r <= y1)
+
+
+def check_safe_areas(scene, aspects, rects, canvas, frames):
+    """Project subjects and the camera's track target through the loop; return issue strings."""
+    master = (scene.render.resolution_x, scene.render.resolution_y)
+    focal, _ = focal_pixels(scene, scene.camera)
+    tracked = [c.target for c in scene.camera.constraints
+               if c.type in ('TRACK_TO', 'DAMPED_TRACK', 'LOCKED_TRACK') and c.target]
+    meshes = [o for o in scene.objects if o.type == 'MESH' and "Instancing" not in o.modifiers]
+    camera, matrices = sample_matrices(scene, meshes + tracked, frames)
+    frames = np.asarray(frames)
+    master_safe = safe_rect({'safe': min(a['safe'] for a in aspects.values())},
+                            ((canvas[0] - master[0]) // 2, (canvas[1] - master[1]) // 2) + master, canvas)
+
+    issues = []
+    targets = {name: safe_rect(aspects[name], rects[name], canvas) for name in aspects}
+    for name, (centres, radii) in subjects(scene, matrices).items():
+        x, y, r = _circles(camera, centres, radii, focal)
+        # Larger than the frame (ground, backdrop): framing it is not the point
+        if np.all(2 * r > master[1]):
+            continue
+        framed = _inside(x, y, r, master_safe)
+        for target, rect in targets.items():
+            cut = np.any(framed & ~_inside(x, y, r, rect), axis=1)
+            if cut.any():
+                issues.append(f"{target}: {name} leaves the safe area on {int(cut.sum())}/{len(frames)} frames "
+                              f"(first at frame {frames[cut][0]})")
+    for obj in tracked:
+        point = matrices[obj.name][:, None, :3, 3]
+        x, y, _ = _circles(camera, point, np.zeros((1, 1)), focal)
+        for target, rect in targets.items():
+            out = ~_inside(x, y, 0.0, rect)[:, 0]
+            if out.any():
+                issues.append(f"{target}: camera target {obj.name} is outside the safe area on "
+                              f"{int(out.sum())} frames (first at frame {frames[out][0]})")
+    return issues
+
+
+# --- Output ---
+
+def resample_matrix(n_in, n_out):
+    """(n_out, n_in) linear resampling weights, widened to an area filter when shrinking."""
+    scale = n_in / n_out
+    support = max(1.0, scale)
+    centres = (np.arange(n_out) + 0.5) * scale - 0.5
+    taps = np.maximum(0.0, 1.0 - np.abs(np.arange(n_in)[None, :] - centres[:, None]) / support)
+    return (taps / taps.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+def crop_batch(batch, rect, size):
+    """Crop (B, H, W, C) frames to rect and resample to size = (width, height)."""
+    x0, y0, w, h = rect
+    crop = batch[:, y0:y0 + h, x0:x0 + w]
+    if (w, h) == tuple(size):
+        return crop
+    rows = resample_matrix(h, size[1])
+    cols = resample_matrix(w, size[0])
+    return np.einsum('pw,bowc->bopc', cols, np.einsum('oh,bhwc->bowc', rows, crop))
+
+
+def crop_sequence(overscan_dir, aspects, rects, out_dir, fps):
+    """Cut every target out of the overscan PNGs, BATCH frames at a time, and encode each."""
+    paths = sorted(glob.glob(os.path.join(overscan_dir, "*.png")))
+    if not paths:
+        raise FileNotFoundError(f"No overscan frames in {overscan_dir}")
+    for name in aspects:
+        target_dir = os.path.join(out_dir, name)
+        shutil.rmtree(target_dir, ignore_errors=True)
+        os.makedirs(target_dir)
+    for start in range(0, len(paths), BATCH):
+        batch = np.stack([load_image_array(p) for p in paths[start:start + BATCH]])
+        for name, aspect in aspects.items():
+            for i, frame in enumerate(crop_batch(batch, rects[name], aspect['size']), start=start + 1):
+                save_image_array(os.path.join(out_dir, name, f"{i:04d}.png"), frame)
+    outputs = {}
+    for name in aspects:
+        outputs[name] = os.path.join(out_dir, f"vj_loop_120bpm_{name}.mp4")
+        encode_image_sequence(os.path.join(out_dir, name, "%04d.png"), outputs[name], fps)
+        print(f"Saved: {outputs[name]}")
+    return outputs
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Render once with overscan, crop every aspect ratio")
+    parser.add_argument('--aspects', default=",".join(ASPECTS), help=f"Comma-separated, from {sorted(ASPECTS)}")
+    parser.add_argument('--work-dir', default="outputs/aspects")
+    parser.add_argument('--preview', action='store_true')
+    parser.add_argument('--strict', action='store_true', help="Abort on any safe-area issue")
+    parser.add_argument('--check-only', action='store_true', help="Only run the safe-area checks")
+    parser.add_argument('--crop-only', action='store_true', help="Crop an existing overscan render")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.aspects.split(",") if n.strip()]
+    unknown = [n for n in names if n not in ASPECTS]
+    if unknown:
+        parser.error(f"unknown aspects {unknown}; choose from {sorted(ASPECTS)}")
+    aspects = {n: ASPECTS[n] for n in names}
+
+    vj = load_vj_module()
+    work_dir = os.path.abspath(args.work_dir)
+    overscan_dir = os.path.join(work_dir, "overscan")
+    canvas, rects = crop_rects(MASTER_SIZE, aspects)
+    print(f"Overscan canvas {canvas[0]}x{canvas[1]} for {', '.join(names)}")
+
+    if not args.crop_only:
+        vj.create_scene()
+        scene = bpy.context.scene
+        master = (scene.render.resolution_x, scene.render.resolution_y)
+        canvas, rects = crop_rects(master, aspects)
+        issues = check_safe_areas(scene, aspects, rects, canvas, list(range(vj.FRAME_START, vj.FRAME_END + 1)))
+        for issue in issues:
+            print(f"  safe area: {issue}")
+        if not issues:
+            print("  safe areas: all subjects framed in every target")
+        if args.check_only:
+            return
+        if issues and args.strict:
+            sys.exit(1)
+
+        vj.apply_sample_profile(scene, args.preview)
+        setup_overscan(scene, canvas)
+        shutil.rmtree(overscan_dir, ignore_errors=True)
+        os.makedirs(overscan_dir)
+        scene.render.image_settings.file_format = 'PNG'
+        scene.render.filepath = os.path.join(overscan_dir, "####")
+        bpy.ops.render.render(animation=True)
+
+    crop_sequence(overscan_dir, aspects, rects, work_dir, vj.FPS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""
+Content-Addressed Frame Cache for the 120 BPM VJ loop
+Renders the loop frame by frame, keying every frame on a hash of what the
+renderer will see at that frame, and reuses any frame whose key is already in
+the cache instead of rendering it again. Variant runs and re-renders that only
+change things the camera never sees (an unseen material, encode settings)
+come back almost entirely from the cache; so do repeated states inside the loop.
+
+The key covers:
+- render, film, colour management, engine and view layer settings (output path excluded)
+- the compositor and world node trees
+- every evaluated object instance: transform, visibility, evaluated mesh
+  attributes and topology, data settings (lights, camera) and material node trees
+- evaluated F-curve values of every animated datablock
+- with motion blur, the same state at the shutter open and close subframes;
+  with an animated seed, the frame number
+
+The cache is a directory of <key><ext> files. Hits refresh the file's mtime,
+and the oldest files are evicted once the cache grows past its size limit (LRU).
+
+Usage:
+  blender --background --python render_cache.py -- outputs/vj_loop_120bpm.mp4 [--preview] [--max-gb 20]
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import encode_image_sequence  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+CACHE_DIR = "outputs/frame_cache"
+CACHE_VERSION = 1
+MAX_CACHE_GB = 20.0
+
+# Settings that never change the pixels
+SKIP_PROPS = {'rna_type', 'filepath', 'use_lock_interface', 'threads', 'threads_mode', 'use_persistent_data'}
+VALUE_TYPES = {'BOOLEAN', 'INT', 'FLOAT', 'STRING', 'ENUM'}
+# Node editor layout, not shading
+NODE_UI_PROPS = {'location', 'width', 'height', 'dimensions', 'select', 'hide', 'label', 'color',
+                 'use_custom_color', 'show_options', 'show_preview', 'show_texture'}
+
+# Mesh attribute type -> (foreach_get property, components, dtype)
+ATTRIBUTE_LAYOUT = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'FLOAT2': ('vector', 2, np.float32),
+    'INT32_2D': ('value', 2, np.int32),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+    'QUATERNION': ('value', 4, np.float32),
+    'FLOAT4X4': ('value', 16, np.float32),
+}
+
+
+# --- Scene state hashing ---
+
+def _feed(h, *values):
+    for value in values:
+        if isinstance(value, np.ndarray):
+            h.update(str(value.dtype).encode() + str(value.shape).encode())
+            h.update(np.ascontiguousarray(value).tobytes())
+        else:
+            h.update(repr(value).encode())
+        h.update(b"\0")
+
+
+def rna_values(struct, skip=()):
+    """[(identifier, value), ...] for the plain settings of an RNA struct."""
+    values = []
+    for prop in struct.bl_rna.properties:
+        if prop.identifier in SKIP_PROPS or prop.identifier in skip or prop.type not in VALUE_TYPES:
+            continue
+        try:
+            value = getattr(struct, prop.identifier)
+        except (AttributeError, RuntimeError):
+            continue
+        if isinstance(value, (set, frozenset)):
+            value = tuple(sorted(value))
+        elif prop.type != 'STRING' and getattr(prop, 'is_array', False):
+            value = tuple(np.asarray(value).ravel().tolist())
+        values.append((prop.identifier, value))
+    return values
+
+
+def _feed_node_tree(h, tree):
+    """Node types, settings, unlinked input values, colour ramps and links."""
+    if tree is None:
+        return
+    for node in tree.nodes:
+        _feed(h, node.name, node.bl_idname, rna_values(node, NODE_UI_PROPS))
+        for socket in node.inputs:
+            if not socket.is_linked and hasattr(socket, 'default_value'):
+                value = socket.default_value
+                _feed(h, socket.identifier, value if isinstance(value, (int, float, str, bool))
+                      else tuple(np.asarray(value).ravel().tolist()))
+        ramp = getattr(node, 'color_ramp', None)
+        if ramp is not None:
+            _feed(h, ramp.interpolation, [(e.position, tuple(e.color)) for e in ramp.elements])
+        if node.type == 'GROUP':
+            _feed_node_tree(h, node.node_tree)
+    for link in tree.links:
+        _feed(h, link.from_node.name, link.from_socket.identifier, link.to_node.name,
+              link.to_socket.identifier, link.is_muted)
+
+
+def _feed_mesh(h, mesh):
+    """Evaluated mesh attributes (positions included) and corner topology."""
+    _feed(h, len(mesh.vertices), len(mesh.loops), len(mesh.polygons))
+    for attr in mesh.attributes:
+        layout = ATTRIBUTE_LAYOUT.get(attr.data_type)
+        if layout is None:
+            continue
+        prop, components, dtype = layout
+        buf = np.empty(len(attr.data) * components, dtype=dtype)
+        attr.data.foreach_get(prop, buf)
+        _feed(h, attr.name, attr.domain, buf)
+    for collection, prop in ((mesh.loops, 'vertex_index'), (mesh.polygons, 'loop_start')):
+        buf = np.empty(len(collection), dtype=np.int32)
+        collection.foreach_get(prop, buf)
+        _feed(h, buf)
+
+
+def _animated_ids(scene):
+    ids = [scene, scene.node_tree, scene.world, scene.world.node_tree if scene.world else None]
+    for obj in scene.objects:
+        ids += [obj, obj.data]
+        ids += [slot.material for slot in obj.material_slots]
+        ids += [slot.material.node_tree for slot in obj.material_slots if slot.material]
+    seen = set()
+    for id_block in ids:
+        if id_block is not None and id_block.as_pointer() not in seen:
+            seen.add(id_block.as_pointer())
+            yield id_block
+
+
+def _feed_state(h, scene, depsgraph):
+    """Everything the renderer sees at the current (sub)frame."""
+    frame = scene.frame_current + scene.frame_subframe
+    for id_block in _animated_ids(scene):
+        anim = id_block.animation_data
+        if anim and anim.action:
+            _feed(h, id_block.name, [(fc.data_path, fc.array_index, fc.evaluate(frame))
+                                     for fc in anim.action.fcurves])
+    if scene.world:
+        _feed(h, rna_values(scene.world))
+        _feed_node_tree(h, scene.world.node_tree)
+
+    meshes = set()
+    materials = set()
+    for inst in depsgraph.object_instances:
+        obj = inst.object
+        original = obj.original
+        _feed(h, original.name, obj.type, inst.is_instance, original.hide_render,
+              np.array(inst.matrix_world, dtype=np.float32))
+        if original.name in meshes:
+            continue
+        meshes.add(original.name)
+        _feed(h, [slot.material.name if slot.material else None for slot in obj.material_slots])
+        materials.update(slot.material for slot in obj.material_slots if slot.material)
+        if obj.type == 'MESH':
+            _feed_mesh(h, obj.data)
+        elif obj.data is not None:
+            _feed(h, rna_values(obj.data))
+    for material in sorted(materials, key=lambda m: m.name):
+        _feed(h, material.name, rna_values(material))
+        _feed_node_tree(h, material.node_tree)
+
+
+def frame_key(scene, frame):
+    """Hex digest of the render settings and evaluated scene state at `frame`."""
+    h = hashlib.sha256()
+    _feed(h, CACHE_VERSION, bpy.app.version_string, scene.camera.name if scene.camera else None)
+    settings = [scene.render, scene.render.image_settings, scene.view_settings, scene.display_settings,
+                scene.cycles, scene.eevee, bpy.context.view_layer, bpy.context.view_layer.cycles]
+    for struct in settings:
+        _feed(h, rna_values(struct))
+    if scene.render.use_compositing and scene.use_nodes:
+        _feed_node_tree(h, scene.node_tree)
+    if scene.render.engine == 'CYCLES' and scene.cycles.use_animated_seed:
+        _feed(h, frame)
+
+    subframes = [0.0]
+    if scene.render.use_motion_blur:
+        half = scene.render.motion_blur_shutter / 2.0
+        subframes = [-half, 0.0, half]
+    for offset in subframes:
+        whole = int(np.floor(frame + offset))
+        scene.frame_set(whole, subframe=frame + offset - whole)
+        _feed_state(h, scene, bpy.context.evaluated_depsgraph_get())
+    if len(subframes) > 1:
+        scene.frame_set(frame)
+    return h.hexdigest()
+
+
+# --- Cache store ---
+
+class FrameCache:
+    """Directory of rendered frames named by key, evicted least recently used first."""
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key, ext):
+        return os.path.join(self.cache_dir, f"{key}{ext}")
+
+    def fetch(self, key, ext, dest):
+        """Copy a cached frame to `dest` and mark it as used; False on a miss."""
+        path = self.path(key, ext)
+        if not os.path.exists(path):
+            self.misses += 1
+            return False
+        os.utime(path)
+        shutil.copyfile(path, dest)
+        self.hits += 1
+        return True
+
+    def store(self, key, ext, src):
+        tmp = self.path(key, ext) + ".tmp"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, self.path(key, ext))
+
+    def evict(self):
+        """Remove the least recently used frames until the cache fits in max_bytes."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            st = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((st.st_mtime, st.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            removed += 1
+        return removed, total
+
+
+def render_cached(scene, frames, frames_dir, cache):
+    """Render `frames` to frames_dir/####<ext>, reusing cached frames with the same key."""
+    ext = scene.render.file_extension
+    os.makedirs(frames_dir, exist_ok=True)
+    for frame in frames:
+        key = frame_key(scene, frame)
+        dest = os.path.join(frames_dir, f"{frame:04d}{ext}")
+        if cache.fetch(key, ext, dest):
+            print(f"Frame {frame}: cached ({key[:12]})")
+            continue
+        print(f"Frame {frame}: rendering ({key[:12]})")
+        scene.render.filepath = dest
+        bpy.ops.render.render(write_still=True)
+        cache.store(key, ext, dest)
+    removed, total = cache.evict()
+    print(f"Cache: {cache.hits} hits, {cache.misses} misses; "
+          f"evicted {removed} frames, {total / 1e9:.2f} GB in {cache.cache_dir}")
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Render the VJ loop through a content-addressed frame cache")
+    parser.add_argument('output', nargs='?', default="outputs/vj_loop_120bpm.mp4")
+    parser.add_argument('--preview', action='store_true')
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--max-gb', type=float, default=MAX_CACHE_GB, help="Cache size limit")
+    parser.add_argument('--frames-dir', default="outputs/cached_frames")
+    args = parser.parse_args(argv)
+
+    vj = load_vj_module()
+    vj.create_scene()
+    scene = bpy.context.scene
+    vj.apply_sample_profile(scene, args.preview)
+    scene.render.image_settings.file_format = 'PNG'
+
+    frames = list(range(vj.FRAME_START, vj.FRAME_END + 1))
+    frames_dir = os.path.abspath(args.frames_dir)
+    cache = FrameCache(os.path.abspath(args.cache_dir), int(args.max_gb * 1e9))
+    render_cached(scene, frames, frames_dir, cache)
+    encode_image_sequence(os.path.join(frames_dir, "%04d.png"), args.output, vj.FPS, start_number=frames[0])
+    print(f"Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
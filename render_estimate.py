@@ -0,0 +1,218 @@
+"""
+Render-Time Estimator for the 120 BPM VJ loop
+Renders a stratified sample of frames at reduced resolution and samples, fits a
+cost model and predicts total wall time for a render profile, resolution and
+worker count. Optionally renders the loop afterwards with a live ETA that is
+corrected by the measured frame times.
+
+Strata: downbeats, other beat peaks and off-beats (emission pulses change the
+cost), each at several camera orbit angles (the viewpoint changes it too).
+
+Cost model per frame f at resolution P pixels and S samples:
+  t(f) = overhead + rate * P * S * weight(f)
+overhead and rate are fitted on one reference frame at three probe settings;
+weight(f) is measured per stratum and interpolated around the orbit.
+
+Usage:
+  blender --background --python render_estimate.py -- --profile final --workers 4
+  blender --background --python render_estimate.py -- --profile preview --render outputs/vj_loop_120bpm_preview.mp4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from script_env import load_vj_module  # noqa: E402
+
+# Sample counts used by render_animation
+PROFILES = {
+    'preview': lambda scene: 16,
+    'final': lambda scene: max(scene.cycles.samples, 128),
+}
+
+# Probe settings: (resolution percentage, samples)
+PROBE_SETTINGS = [(10, 4), (20, 8), (25, 16)]
+STRATUM_SETTING = (20, 8)
+
+
+def format_seconds(seconds):
+    minutes, sec = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{sec:02d}s" if hours else f"{minutes}m{sec:02d}s"
+
+
+def frame_stratum(vj, frame):
+    """(pulse class, orbit position in bars) for a frame of the loop."""
+    offset = frame - vj.FRAME_START
+    beat, into_beat = divmod(offset, vj.FRAMES_PER_BEAT)
+    if into_beat >= vj.FRAMES_PER_BEAT * 0.4:
+        kind = 'offbeat'
+    elif vj.is_downbeat(beat):
+        kind = 'downbeat'
+    else:
+        kind = 'beat'
+    return kind, offset / (vj.BEATS_PER_BAR * vj.FRAMES_PER_BEAT)
+
+
+def stratified_frames(vj, angles=4):
+    """Downbeat, beat and off-beat frames at `angles` evenly spaced orbit positions."""
+    frames = []
+    for k in range(angles):
+        bar = int(round(k * vj.BARS / angles))
+        downbeat = vj.beat_frame(bar * vj.BEATS_PER_BAR)
+        beat = vj.beat_frame(bar * vj.BEATS_PER_BAR + 1)
+        frames += [downbeat, beat, beat + vj.FRAMES_PER_BEAT // 2]
+    return frames
+
+
+def render_seconds(scene, frame, percentage, samples):
+    """Wall time of a single still render (nothing written)."""
+    scene.frame_set(frame)
+    scene.render.resolution_percentage = percentage
+    scene.cycles.samples = samples
+    start = time.perf_counter()
+    bpy.ops.render.render(write_still=False)
+    return time.perf_counter() - start
+
+
+def pixel_count(scene, percentage):
+    pct = percentage / 100.0
+    return int(scene.render.resolution_x * pct) * int(scene.render.resolution_y * pct)
+
+
+def measure(vj, scene, angles=4):
+    """Fit overhead/rate on a reference frame and measure stratum weights."""
+    saved = (scene.frame_current, scene.render.resolution_percentage, scene.cycles.samples)
+    try:
+        frames = stratified_frames(vj, angles)
+        reference = frames[0]
+        # Warm-up: BVH build and kernel loading happen once per process
+        render_seconds(scene, reference, *PROBE_SETTINGS[0])
+
+        work = np.array([pixel_count(scene, pct) * samples for pct, samples in PROBE_SETTINGS], dtype=np.float64)
+        times = np.array([render_seconds(scene, reference, pct, samples) for pct, samples in PROBE_SETTINGS])
+        rate, overhead = np.polyfit(work, times, 1)
+        rate = max(rate, 1e-12)
+        overhead = max(overhead, 0.0)
+
+        pct, samples = STRATUM_SETTING
+        stratum_work = rate * pixel_count(scene, pct) * samples
+        weights = {}
+        for frame in frames:
+            t = render_seconds(scene, frame, pct, samples)
+            weights[frame] = max(t - overhead, 0.05 * stratum_work) / stratum_work
+            kind, bars = frame_stratum(vj, frame)
+            print(f"  frame {frame:4d} {kind:8s} orbit {bars / vj.BARS * 360:5.1f} deg: {t:.2f}s "
+                  f"(weight {weights[frame]:.2f})")
+        return {'overhead': overhead, 'rate': rate, 'weights': weights}
+    finally:
+        scene.frame_current, scene.render.resolution_percentage, scene.cycles.samples = saved
+
+
+def frame_weights(vj, model):
+    """Per-frame weight for the whole loop: same pulse class, interpolated around the orbit."""
+    strata = {}
+    for frame, weight in model['weights'].items():
+        kind, bars = frame_stratum(vj, frame)
+        strata.setdefault(kind, []).append((bars, weight))
+    frames = np.arange(vj.FRAME_START, vj.FRAME_END + 1)
+    weights = np.empty(len(frames))
+    for i, frame in enumerate(frames):
+        kind, bars = frame_stratum(vj, frame)
+        samples = sorted(strata.get(kind) or [s for group in strata.values() for s in group])
+        xs = np.array([b for b, _ in samples])
+        ys = np.array([w for _, w in samples])
+        weights[i] = np.interp(bars, xs, ys, period=vj.BARS)
+    return frames, weights
+
+
+def predict(vj, scene, model, profile='final', percentage=100, workers=1, startup=0.0):
+    """Predicted per-frame seconds and total wall time for contiguous per-worker chunks."""
+    samples = PROFILES[profile](scene)
+    frames, weights = frame_weights(vj, model)
+    per_frame = model['overhead'] + model['rate'] * pixel_count(scene, percentage) * samples * weights
+    chunks = np.array_split(per_frame, max(1, workers))
+    wall = startup + max(chunk.sum() for chunk in chunks)
+    return frames, per_frame, wall
+
+
+class LiveEta:
+    """Per-frame ETA during an animation render, scaling the remaining prediction
+    by how the measured frames compare with their predicted times."""
+
+    def __init__(self, frames, predicted):
+        self.predicted = dict(zip((int(f) for f in frames), predicted))
+        self.done_measured = 0.0
+        self.done_predicted = 0.0
+        self.done = set()
+        self.start = None
+
+    def on_pre(self, scene, *args):
+        self.start = time.perf_counter()
+
+    def on_post(self, scene, *args):
+        if self.start is None:
+            return
+        elapsed = time.perf_counter() - self.start
+        frame = scene.frame_current
+        self.done.add(frame)
+        self.done_measured += elapsed
+        self.done_predicted += self.predicted.get(frame, elapsed)
+        correction = self.done_measured / max(self.done_predicted, 1e-6)
+        remaining = sum(t for f, t in self.predicted.items() if f not in self.done)
+        print(f"Frame {frame} ({len(self.done)}/{len(self.predicted)}): {elapsed:.1f}s, "
+              f"ETA {format_seconds(remaining * correction)} (x{correction:.2f} vs estimate)")
+
+    def install(self):
+        bpy.app.handlers.render_pre.append(self.on_pre)
+        bpy.app.handlers.render_post.append(self.on_post)
+
+    def remove(self):
+        for handlers, fn in ((bpy.app.handlers.render_pre, self.on_pre), (bpy.app.handlers.render_post, self.on_post)):
+            if fn in handlers:
+                handlers.remove(fn)
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Estimate VJ loop render time")
+    parser.add_argument('--profile', choices=sorted(PROFILES), default='final')
+    parser.add_argument('--percentage', type=int, default=100, help="Resolution percentage of the real render")
+    parser.add_argument('--workers', type=int, default=1, help="Machines/processes splitting the frame range")
+    parser.add_argument('--angles', type=int, default=4, help="Orbit angles to sample")
+    parser.add_argument('--render', default=None, help="Render the loop to this path with a live ETA")
+    args = parser.parse_args(argv)
+
+    vj = load_vj_module()
+    start = time.perf_counter()
+    vj.create_scene()
+    startup = time.perf_counter() - start
+    scene = bpy.context.scene
+
+    print(f"Sampling {args.angles * 3} frames...")
+    model = measure(vj, scene, args.angles)
+    frames, per_frame, wall = predict(vj, scene, model, args.profile, args.percentage, args.workers, startup)
+    print(f"Fit: overhead {model['overhead']:.2f}s/frame, "
+          f"{model['rate'] * 1e9:.2f}s per 1e9 pixel-samples")
+    print(f"Profile '{args.profile}' at {args.percentage}%: {per_frame.min():.1f}-{per_frame.max():.1f}s/frame, "
+          f"{format_seconds(per_frame.sum())} of render time")
+    print(f"Predicted wall time with {args.workers} worker(s): {format_seconds(wall)}")
+
+    if args.render:
+        scene.render.resolution_percentage = args.percentage
+        eta = LiveEta(frames, per_frame)
+        eta.install()
+        try:
+            vj.render_animation(output_path=args.render, preview=args.profile == 'preview')
+        finally:
+            eta.remove()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,638 @@
+"""
+Flat Emission Fast Path
+Scenes like recreate_rainbow.py are an orthographic camera looking at a single
+Emission plane, i.e. a pure 2D function of pixel coordinates. This module detects
+such flat, unlit emission graphs and evaluates them directly over the pixel grid
+with vectorized NumPy, falling back to a normal render for anything else.
+
+Supported nodes: Texture Coordinate (Object/Generated), Separate XYZ, Value, Math,
+ColorRamp, MixRGB / Mix (float and colour), Noise Texture (3D fBM) and Emission.
+
+Usage:
+  /Applications/Blender.app/Contents/MacOS/Blender --background scene.blend --python render_flat_emission.py -- [--animation] [--samples 2]
+  /Applications/Blender.app/Contents/MacOS/Blender --background --python render_flat_emission.py -- --check
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import encode_image_sequence, save_render_array  # noqa: E402
+
+# Rec.709 luminance, used when a colour socket feeds a float socket
+LUMINANCE = np.array([0.2126, 0.7152, 0.0722], dtype=np.float32)
+
+# Octaves finer than this many noise cells per sub-pixel sample average out to
+# their mean under Cycles' pixel filter, so they are skipped (but still normalised)
+NOISE_CUTOFF = 2.0
+
+
+class UnsupportedGraph(Exception):
+    """Raised when a scene or node graph needs the full renderer."""
+
+
+# --- Blender-compatible Perlin noise (Cycles kernel/svm/noise.h) ---
+
+def _rot(x, k):
+    return (x << np.uint32(k)) | (x >> np.uint32(32 - k))
+
+
+def _hash_uint3(kx, ky, kz):
+    """Bob Jenkins' lookup3 final mix, as used by Blender's hash_uint3."""
+    a = np.full(kx.shape, 0xdeadbeef + (3 << 2) + 13, dtype=np.uint32)
+    b = a.copy()
+    c = a.copy()
+    c += kz
+    b += ky
+    a += kx
+    c ^= b
+    c -= _rot(b, 14)
+    a ^= c
+    a -= _rot(c, 11)
+    b ^= a
+    b -= _rot(a, 25)
+    c ^= b
+    c -= _rot(b, 16)
+    a ^= c
+    a -= _rot(c, 4)
+    b ^= a
+    b -= _rot(a, 14)
+    c ^= b
+    c -= _rot(b, 24)
+    return c
+
+
+def _grad3(h, x, y, z):
+    h = h & np.uint32(15)
+    u = np.where(h < 8, x, y)
+    vt = np.where((h == 12) | (h == 14), x, z)
+    v = np.where(h < 4, y, vt)
+    return np.where(h & 1, -u, u) + np.where(h & 2, -v, v)
+
+
+def _fade(t):
+    return t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+
+
+def snoise_3d(p):
+    """Signed Perlin noise in [-1, 1] for points p of shape (..., 3)."""
+    floor = np.floor(p)
+    f = (p - floor).astype(np.float32)
+    cell = (floor.astype(np.int64) & 0xFFFFFFFF).astype(np.uint32)
+    X, Y, Z = cell[..., 0], cell[..., 1], cell[..., 2]
+    fx, fy, fz = f[..., 0], f[..., 1], f[..., 2]
+    one = np.uint32(1)
+
+    def corner(dx, dy, dz):
+        h = _hash_uint3(X + one if dx else X, Y + one if dy else Y, Z + one if dz else Z)
+        return _grad3(h, fx - dx, fy - dy, fz - dz)
+
+    def lerp_x(dy, dz):
+        g0 = corner(0, dy, dz)
+        return g0 + u * (corner(1, dy, dz) - g0)
+
+    u, v, w = _fade(fx), _fade(fy), _fade(fz)
+    x00, x10, x01, x11 = lerp_x(0, 0), lerp_x(1, 0), lerp_x(0, 1), lerp_x(1, 1)
+    y0 = x00 + v * (x10 - x00)
+    y1 = x01 + v * (x11 - x01)
+    return 0.9820 * (y0 + w * (y1 - y0))
+
+
+def fractal_noise_3d(p, detail, roughness, lacunarity, normalize, cells_per_sample):
+    """Blender's fBM noise. Octaves above NOISE_CUTOFF cells per sample contribute their
+    mean (zero) instead of being evaluated.
+    """
+    detail = float(np.clip(detail, 0.0, 15.0))
+    fscale = 1.0
+    amp = 1.0
+    maxamp = 0.0
+    total = np.zeros(p.shape[:-1], dtype=np.float32)
+
+    def octave(scale):
+        if cells_per_sample * scale > NOISE_CUTOFF:
+            return 0.0
+        return snoise_3d(p * scale)
+
+    for _ in range(int(detail) + 1):
+        total += octave(fscale) * amp
+        maxamp += amp
+        amp *= roughness
+        fscale *= lacunarity
+    rmd = detail - np.floor(detail)
+    if rmd != 0.0:
+        total2 = total + octave(fscale) * amp
+        if normalize:
+            return (1.0 - rmd) * (0.5 * total / maxamp + 0.5) + rmd * (0.5 * total2 / (maxamp + amp) + 0.5)
+        return (1.0 - rmd) * total + rmd * total2
+    return 0.5 * total / maxamp + 0.5 if normalize else total
+
+
+# --- Node graph evaluation ---
+
+def _is_color(value):
+    """A (3,) constant or (h, w, 3) field, as opposed to a scalar or (h, w) float field."""
+    return isinstance(value, np.ndarray) and value.ndim in (1, 3) and value.shape[-1] == 3
+
+
+def _as_float(value):
+    if _is_color(value):
+        return value @ LUMINANCE
+    return value
+
+
+def _as_color(value):
+    if _is_color(value):
+        return value
+    return np.asarray(value, dtype=np.float32)[..., None] * np.ones(3, dtype=np.float32)
+
+
+def _modulo(a, b):
+    """Truncated modulo, 0 where b == 0 (per pixel, like Blender)."""
+    b = np.asarray(b, dtype=np.float32)
+    return np.where(b != 0, np.fmod(a, np.where(b != 0, b, 1.0)), 0.0)
+
+
+def _pingpong(a, b):
+    """Blender's ping-pong: a bounced between 0 and b, 0 where b == 0."""
+    b = np.asarray(b, dtype=np.float32)
+    safe = np.where(b != 0, b, 1.0)
+    x = (np.asarray(a) - safe) / (2.0 * safe)
+    return np.where(b != 0, np.abs((x - np.floor(x)) * 2.0 * safe - safe), 0.0)
+
+
+def _default(socket):
+    value = socket.default_value
+    if hasattr(value, '__len__'):
+        return np.array(value[:3], dtype=np.float32)
+    return float(value)
+
+
+MATH_OPS = {
+    'ADD': lambda a, b, c: a + b,
+    'SUBTRACT': lambda a, b, c: a - b,
+    'MULTIPLY': lambda a, b, c: a * b,
+    'DIVIDE': lambda a, b, c: np.divide(a, b, out=np.zeros_like(np.broadcast_arrays(a, b)[0], dtype=np.float32), where=np.asarray(b) != 0),
+    'MULTIPLY_ADD': lambda a, b, c: a * b + c,
+    'POWER': lambda a, b, c: np.power(np.maximum(a, 0.0), b),
+    'MINIMUM': lambda a, b, c: np.minimum(a, b),
+    'MAXIMUM': lambda a, b, c: np.maximum(a, b),
+    'LESS_THAN': lambda a, b, c: (np.asarray(a) < b).astype(np.float32),
+    'GREATER_THAN': lambda a, b, c: (np.asarray(a) > b).astype(np.float32),
+    'ABSOLUTE': lambda a, b, c: np.abs(a),
+    'SQRT': lambda a, b, c: np.sqrt(np.maximum(a, 0.0)),
+    'ROUND': lambda a, b, c: np.floor(np.asarray(a) + 0.5),
+    'FLOOR': lambda a, b, c: np.floor(a),
+    'CEIL': lambda a, b, c: np.ceil(a),
+    'FRACT': lambda a, b, c: np.asarray(a) - np.floor(a),
+    'MODULO': lambda a, b, c: _modulo(a, b),
+    'SINE': lambda a, b, c: np.sin(a),
+    'COSINE': lambda a, b, c: np.cos(a),
+    'PINGPONG': lambda a, b, c: _pingpong(a, b),
+}
+
+
+def _mix_rgb(blend_type, fac, c1, c2):
+    """MixRGB blend modes following Blender's svm_mix."""
+    fac = np.asarray(fac, dtype=np.float32)
+    if fac.ndim == 2:
+        fac = fac[:, :, None]
+    if blend_type == 'MIX':
+        return c1 + fac * (c2 - c1)
+    if blend_type == 'ADD':
+        return c1 + fac * c2
+    if blend_type == 'MULTIPLY':
+        return c1 * (1.0 - fac + fac * c2)
+    if blend_type == 'SUBTRACT':
+        return c1 - fac * c2
+    if blend_type == 'SCREEN':
+        return 1.0 - (1.0 - fac + fac * (1.0 - c2)) * (1.0 - c1)
+    if blend_type == 'DIFFERENCE':
+        return c1 + fac * (np.abs(c1 - c2) - c1)
+    if blend_type == 'DARKEN':
+        return c1 + fac * (np.minimum(c1, c2) - c1)
+    if blend_type == 'LIGHTEN':
+        return c1 + fac * (np.maximum(c1, c2) - c1)
+    raise UnsupportedGraph(f"MixRGB blend type {blend_type}")
+
+
+def _color_ramp(ramp, fac):
+    """Evaluate a ColorRamp for a float array, returning (colour, alpha)."""
+    if ramp.color_mode != 'RGB' or ramp.interpolation not in {'LINEAR', 'CONSTANT', 'EASE'}:
+        raise UnsupportedGraph(f"ColorRamp {ramp.color_mode}/{ramp.interpolation}")
+    positions = np.array([e.position for e in ramp.elements], dtype=np.float32)
+    colors = np.array([tuple(e.color) for e in ramp.elements], dtype=np.float32)
+    fac = np.clip(np.asarray(fac, dtype=np.float32), positions[0], positions[-1])
+
+    i = np.clip(np.searchsorted(positions, fac, side='right') - 1, 0, len(positions) - 1)
+    if ramp.interpolation == 'CONSTANT' or len(positions) == 1:
+        rgba = colors[i]
+    else:
+        i = np.minimum(i, len(positions) - 2)
+        span = positions[i + 1] - positions[i]
+        t = np.divide(fac - positions[i], span, out=np.zeros_like(fac), where=span > 0)
+        if ramp.interpolation == 'EASE':
+            t = t * t * (3.0 - 2.0 * t)
+        rgba = colors[i] + t[..., None] * (colors[i + 1] - colors[i])
+    return rgba[..., :3], rgba[..., 3]
+
+
+def sample_spacing(vector):
+    """Median texture-space distance between horizontally adjacent samples."""
+    rows = vector[::max(1, vector.shape[0] // 64)]
+    return float(np.median(np.linalg.norm(np.diff(rows, axis=1), axis=-1)))
+
+
+class FlatGraphEvaluator:
+    """Evaluates a material node tree over a grid of shading points.
+    Results are cached by a signature of each node's settings and upstream inputs,
+    so across animation frames only the branches whose values changed are recomputed.
+    """
+
+    def __init__(self, object_coords, generated_coords):
+        self.coords = {'Object': object_coords, 'Generated': generated_coords}
+        self.cache = {}
+        self.used = set()
+
+    def begin_frame(self):
+        """Drop cached results that were not used by the previous frame."""
+        self.cache = {key: self.cache[key] for key in self.used if key in self.cache}
+        self.used = set()
+
+    def input(self, node, name_or_index):
+        socket = node.inputs[name_or_index]
+        if socket.is_linked:
+            link = socket.links[0]
+            return self.output(link.from_node, link.from_socket)
+        return _default(socket)
+
+    def _enabled_input(self, node, name):
+        for socket in node.inputs:
+            if socket.name == name and socket.enabled:
+                if socket.is_linked:
+                    link = socket.links[0]
+                    return self.output(link.from_node, link.from_socket)
+                return _default(socket)
+        raise UnsupportedGraph(f"{node.name} has no input {name}")
+
+    def signature(self, node):
+        """Hashable description of everything a node's outputs depend on."""
+        parts = [node.bl_idname]
+        for attr in ('operation', 'use_clamp', 'blend_type', 'data_type', 'clamp_factor',
+                     'noise_dimensions', 'noise_type', 'normalize'):
+            if hasattr(node, attr):
+                parts.append(getattr(node, attr))
+        if node.type == 'VALTORGB':
+            ramp = node.color_ramp
+            parts.append((ramp.interpolation, tuple((e.position, tuple(e.color)) for e in ramp.elements)))
+        if node.type == 'VALUE':
+            parts.append(node.outputs[0].default_value)
+        for socket in node.inputs:
+            if not socket.enabled:
+                continue
+            if socket.is_linked:
+                link = socket.links[0]
+                parts.append((self.signature(link.from_node), link.from_socket.identifier))
+            elif hasattr(socket, 'default_value'):
+                value = socket.default_value
+                parts.append(tuple(value) if hasattr(value, '__len__') else value)
+        return tuple(parts)
+
+    def output(self, node, socket):
+        key = (self.signature(node), socket.identifier)
+        self.used.add(key)
+        if key not in self.cache:
+            self.cache[key] = self._evaluate(node, socket)
+        return self.cache[key]
+
+    def _evaluate(self, node, socket):
+        kind = node.type
+        name = socket.name
+        if kind == 'TEX_COORD':
+            if name not in self.coords:
+                raise UnsupportedGraph(f"Texture Coordinate output {name}")
+            return self.coords[name]
+        if kind == 'SEPXYZ':
+            vector = _as_color(self.input(node, 'Vector'))
+            return vector[..., 'XYZ'.index(name)]
+        if kind == 'VALUE':
+            return float(node.outputs[0].default_value)
+        if kind == 'MATH':
+            op = MATH_OPS.get(node.operation)
+            if op is None:
+                raise UnsupportedGraph(f"Math operation {node.operation}")
+            a, b, c = (_as_float(self.input(node, i)) for i in range(3))
+            result = np.asarray(op(a, b, c), dtype=np.float32)
+            return np.clip(result, 0.0, 1.0) if node.use_clamp else result
+        if kind == 'VALTORGB':
+            color, alpha = _color_ramp(node.color_ramp, _as_float(self.input(node, 'Fac')))
+            return color if name == 'Color' else alpha
+        if kind == 'MIX_RGB':
+            fac = _as_float(self.input(node, 'Fac'))
+            result = _mix_rgb(node.blend_type, fac, _as_color(self.input(node, 'Color1')),
+                              _as_color(self.input(node, 'Color2')))
+            return np.clip(result, 0.0, 1.0) if node.use_clamp else result
+        if kind == 'MIX':
+            fac = _as_float(self._enabled_input(node, 'Factor'))
+            if node.clamp_factor:
+                fac = np.clip(fac, 0.0, 1.0)
+            if node.data_type == 'FLOAT':
+                a = _as_float(self._enabled_input(node, 'A'))
+                b = _as_float(self._enabled_input(node, 'B'))
+                return np.asarray(a + fac * (np.asarray(b) - a), dtype=np.float32)
+            if node.data_type == 'RGBA':
+                result = _mix_rgb(node.blend_type, fac, _as_color(self._enabled_input(node, 'A')),
+                                  _as_color(self._enabled_input(node, 'B')))
+                return np.clip(result, 0.0, 1.0) if node.clamp_result else result
+            raise UnsupportedGraph(f"Mix data type {node.data_type}")
+        if kind == 'TEX_NOISE':
+            return self._noise(node, name)
+        raise UnsupportedGraph(f"Node {node.bl_idname}")
+
+    def _noise(self, node, name):
+        if name != 'Fac' or node.noise_dimensions != '3D' or getattr(node, 'noise_type', 'FBM') != 'FBM':
+            raise UnsupportedGraph(f"Noise texture {node.noise_dimensions}/{name}")
+        if node.inputs['Distortion'].is_linked or node.inputs['Distortion'].default_value != 0.0:
+            raise UnsupportedGraph("Noise texture distortion")
+        vector_socket = node.inputs['Vector']
+        vector = self.input(node, 'Vector') if vector_socket.is_linked else self.coords['Generated']
+        scale = _as_float(self.input(node, 'Scale'))
+        if np.ndim(scale) != 0:
+            raise UnsupportedGraph("Per-pixel noise scale")
+        lacunarity = float(node.inputs['Lacunarity'].default_value) if 'Lacunarity' in node.inputs else 2.0
+        vector = _as_color(vector)
+        return fractal_noise_3d(
+            vector * scale,
+            _as_float(self.input(node, 'Detail')),
+            _as_float(self.input(node, 'Roughness')),
+            lacunarity,
+            getattr(node, 'normalize', True),
+            sample_spacing(vector) * scale,
+        ).astype(np.float32)
+
+    def emission(self, material):
+        """Evaluate Emission colour x strength feeding the material output."""
+        output = next((n for n in material.node_tree.nodes
+                       if n.type == 'OUTPUT_MATERIAL' and n.is_active_output), None)
+        if output is None or not output.inputs['Surface'].is_linked:
+            raise UnsupportedGraph("No surface output")
+        if output.inputs['Volume'].is_linked or output.inputs['Displacement'].is_linked:
+            raise UnsupportedGraph("Volume or displacement output")
+        shader = output.inputs['Surface'].links[0].from_node
+        if shader.type != 'EMISSION':
+            raise UnsupportedGraph(f"Surface shader {shader.bl_idname} is not Emission")
+        color = _as_color(self.input(shader, 'Color'))
+        strength = _as_float(self.input(shader, 'Strength'))
+        strength = strength[..., None] if np.ndim(strength) == 2 else strength
+        return color * strength
+
+
+# --- Scene matching ---
+
+def render_size(scene):
+    """Output resolution after the percentage scale."""
+    scale = scene.render.resolution_percentage / 100.0
+    return int(scene.render.resolution_x * scale), int(scene.render.resolution_y * scale)
+
+
+def match_flat_scene(scene):
+    """Return (plane_object, material) if the scene is a single emission plane under an
+    orthographic camera, otherwise raise UnsupportedGraph explaining why.
+    """
+    camera = scene.camera
+    if camera is None or camera.data.type != 'ORTHO':
+        raise UnsupportedGraph("Camera is not orthographic")
+    if scene.use_nodes and scene.node_tree and any(n.type not in {'R_LAYERS', 'COMPOSITE'} for n in scene.node_tree.nodes):
+        raise UnsupportedGraph("Compositor nodes in use")
+
+    meshes = [o for o in scene.objects if not o.hide_render and o.type not in {'CAMERA', 'LIGHT', 'EMPTY'}]
+    if len(meshes) != 1 or meshes[0].type != 'MESH':
+        raise UnsupportedGraph("Scene must contain exactly one renderable mesh")
+    plane = meshes[0]
+    mesh = plane.data
+    if plane.modifiers or len(mesh.materials) != 1 or mesh.materials[0] is None:
+        raise UnsupportedGraph("Plane must have one material and no modifiers")
+
+    zs = [v.co.z for v in mesh.vertices]
+    xs = [v.co.x for v in mesh.vertices]
+    ys = [v.co.y for v in mesh.vertices]
+    bbox_area = (max(xs) - min(xs)) * (max(ys) - min(ys))
+    if max(zs) - min(zs) > 1e-6 or abs(sum(p.area for p in mesh.polygons) - bbox_area) > 1e-4 * max(bbox_area, 1e-9):
+        raise UnsupportedGraph("Mesh is not a flat rectangle")
+
+    normal = plane.matrix_world.to_3x3() @ mesh.polygons[0].normal
+    view = camera.matrix_world.to_3x3().col[2]
+    if abs(normal.normalized().dot(view.normalized())) < 0.9999:
+        raise UnsupportedGraph("Plane does not face the camera")
+    return plane, mesh.materials[0]
+
+
+def shading_points(scene, plane, samples):
+    """Object and Generated coordinates of a regular grid of sub-pixel samples on the plane.
+    Returns (object_coords, generated_coords, inside_mask), each shaped
+    (samples * h, samples * w, ...).
+    """
+    res_x, res_y = render_size(scene)
+    cam = scene.camera.data
+    fit = cam.sensor_fit
+    if fit == 'AUTO':
+        fit = 'HORIZONTAL' if res_x >= res_y else 'VERTICAL'
+    if fit == 'HORIZONTAL':
+        width = cam.ortho_scale
+        height = width * res_y / res_x
+    else:
+        height = cam.ortho_scale
+        width = height * res_x / res_y
+
+    n = samples
+    sx = (np.arange(res_x * n, dtype=np.float64) + 0.5) / (res_x * n)
+    sy = (np.arange(res_y * n, dtype=np.float64) + 0.5) / (res_y * n)
+    cam_x = (sx - 0.5) * width + cam.shift_x * cam.ortho_scale
+    cam_y = (0.5 - sy) * height + cam.shift_y * cam.ortho_scale
+
+    to_object = np.array(plane.matrix_world.inverted() @ scene.camera.matrix_world)
+    origin = (cam_x[None, :, None] * to_object[:3, 0] + cam_y[:, None, None] * to_object[:3, 1] + to_object[:3, 3])
+    direction = -to_object[:3, 2]
+    # The plane is z = const in object space
+    plane_z = plane.data.vertices[0].co.z
+    t = (plane_z - origin[..., 2]) / direction[2]
+    coords = (origin + t[..., None] * direction).astype(np.float32)
+
+    vx = [v.co.x for v in plane.data.vertices]
+    vy = [v.co.y for v in plane.data.vertices]
+    inside = (coords[..., 0] >= min(vx)) & (coords[..., 0] <= max(vx)) & (coords[..., 1] >= min(vy)) & (coords[..., 1] <= max(vy))
+
+    loc = np.array(plane.data.texspace_location, dtype=np.float32)
+    size = np.maximum(np.array(plane.data.texspace_size, dtype=np.float32), 1e-6)
+    generated = (coords - (loc - size)) / (2.0 * size)
+    return coords, generated, inside
+
+
+def world_color(scene):
+    """Flat world background colour, or None if the world uses a texture."""
+    world = scene.world
+    if world is None:
+        return np.zeros(3, dtype=np.float32)
+    if not world.use_nodes:
+        return np.array(world.color, dtype=np.float32)
+    bg = world.node_tree.nodes.get('Background')
+    if bg is None or bg.inputs['Color'].is_linked or bg.inputs['Strength'].is_linked:
+        return None
+    return np.array(bg.inputs['Color'].default_value[:3], dtype=np.float32) * bg.inputs['Strength'].default_value
+
+
+class FlatEmissionRenderer:
+    """Renders a matched flat-emission scene frame by frame."""
+
+    def __init__(self, scene, samples=2):
+        self.scene = scene
+        self.samples = samples
+        self.plane, self.material = match_flat_scene(scene)
+        coords, generated, inside = shading_points(scene, self.plane, samples)
+        self.inside = inside
+        self.background = None
+        if not inside.all():
+            self.background = world_color(scene)
+            if self.background is None:
+                raise UnsupportedGraph("Textured world visible around the plane")
+        self.evaluator = FlatGraphEvaluator(coords, generated)
+
+    def render_frame(self):
+        """Evaluate the current frame and return scene-linear (h, w, 4) pixels."""
+        self.evaluator.begin_frame()
+        rgb = np.broadcast_to(self.evaluator.emission(self.material), self.inside.shape + (3,)).astype(np.float32)
+        alpha = np.ones(self.inside.shape, dtype=np.float32)
+        if self.background is not None:
+            rgb = np.where(self.inside[..., None], rgb, self.background)
+            if self.scene.render.film_transparent:
+                alpha = self.inside.astype(np.float32)
+        rgba = np.concatenate([rgb, alpha[..., None]], axis=-1)
+        n = self.samples
+        h, w = rgba.shape[0] // n, rgba.shape[1] // n
+        # Box-filter the sub-pixel samples down to the output resolution
+        return rgba.reshape(h, n, w, n, 4).mean(axis=(1, 3))
+
+
+def render_flat_still(scene=None, samples=2):
+    """Render the current frame through the fast path. Returns False if the scene is unsupported."""
+    scene = scene or bpy.context.scene
+    try:
+        renderer = FlatEmissionRenderer(scene, samples)
+        pixels = renderer.render_frame()
+    except UnsupportedGraph as exc:
+        print(f"Flat emission fast path unavailable ({exc}); using {scene.render.engine}")
+        return False
+    # Same path render(write_still=True) uses: no frame number, extension ensured
+    path = bpy.path.abspath(scene.render.filepath)
+    extension = scene.render.file_extension
+    if scene.render.use_file_extension and not path.lower().endswith(extension.lower()):
+        path += extension
+    save_render_array(path, pixels, scene)
+    print(f"Flat emission render saved to: {path}")
+    return True
+
+
+def render_flat_animation(scene=None, samples=2):
+    """Render the frame range through the fast path. Returns False if the scene is unsupported."""
+    scene = scene or bpy.context.scene
+    try:
+        renderer = FlatEmissionRenderer(scene, samples)
+    except UnsupportedGraph as exc:
+        print(f"Flat emission fast path unavailable ({exc}); using {scene.render.engine}")
+        return False
+
+    is_movie = scene.render.is_movie_format
+    movie_path = scene.render.frame_path(frame=scene.frame_start)
+    image_settings = scene.render.image_settings
+    saved_format = image_settings.file_format
+    frame_dir = tempfile.mkdtemp(prefix="flat_emission_") if is_movie else None
+    try:
+        if is_movie:
+            image_settings.file_format = 'PNG'
+        for frame in range(scene.frame_start, scene.frame_end + 1):
+            scene.frame_set(frame)
+            try:
+                pixels = renderer.render_frame()
+            except UnsupportedGraph as exc:
+                print(f"Flat emission fast path unavailable at frame {frame} ({exc})")
+                return False
+            path = os.path.join(frame_dir, f"{frame:04d}.png") if is_movie else scene.render.frame_path(frame=frame)
+            save_render_array(path, pixels, scene)
+        if is_movie:
+            encode_image_sequence(os.path.join(frame_dir, "%04d.png"), movie_path, scene.render.fps, scene.frame_start)
+    finally:
+        image_settings.file_format = saved_format
+        if frame_dir:
+            shutil.rmtree(frame_dir, ignore_errors=True)
+    print(f"Flat emission animation saved to: {movie_path if is_movie else scene.render.filepath}")
+    return True
+
+
+def check_constant_emission(color=(0.8, 0.2, 0.1), strength=1.5, samples=2):
+    """Render a plane with an unlinked Emission Color through the fast path in a scratch scene.
+    Returns True when every pixel equals color * strength.
+    """
+    scene = bpy.data.scenes.new("FlatEmissionCheck")
+    scene.render.resolution_x, scene.render.resolution_y = 64, 36
+    mesh = bpy.data.meshes.new("FlatEmissionCheck")
+    mesh.from_pydata([(-10, -10, 0), (10, -10, 0), (10, 10, 0), (-10, 10, 0)], [], [(0, 1, 2, 3)])
+    mat = bpy.data.materials.new("FlatEmissionCheck")
+    mat.use_nodes = True
+    nodes = mat.node_tree.nodes
+    nodes.clear()
+    emission = nodes.new(type='ShaderNodeEmission')
+    output = nodes.new(type='ShaderNodeOutputMaterial')
+    emission.inputs['Color'].default_value = (*color, 1.0)
+    emission.inputs['Strength'].default_value = strength
+    mat.node_tree.links.new(emission.outputs['Emission'], output.inputs['Surface'])
+    mesh.materials.append(mat)
+    plane = bpy.data.objects.new("FlatEmissionCheck", mesh)
+    camera = bpy.data.objects.new("FlatEmissionCheckCamera", bpy.data.cameras.new("FlatEmissionCheckCamera"))
+    camera.data.type = 'ORTHO'
+    camera.location = (0, 0, 5)
+    for obj in (plane, camera):
+        scene.collection.objects.link(obj)
+    scene.camera = camera
+    scene.view_layers[0].update()
+    try:
+        pixels = FlatEmissionRenderer(scene, samples).render_frame()
+        ok = np.allclose(pixels[..., :3], np.asarray(color) * strength, atol=1e-5)
+    finally:
+        bpy.data.scenes.remove(scene)
+        bpy.data.objects.remove(plane)
+        bpy.data.objects.remove(camera)
+        bpy.data.meshes.remove(mesh)
+        bpy.data.materials.remove(mat)
+    print(f"Constant-colour emission check: {'PASS' if ok else 'FAIL'}")
+    return ok
+
+
+def main():
+    argv = sys.argv
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="render_flat_emission.py")
+    parser.add_argument("--animation", action="store_true")
+    parser.add_argument("--samples", type=int, default=2, help="sub-pixel samples per axis")
+    parser.add_argument("--check", action="store_true", help="render a constant-colour emission plane and verify it")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        if not check_constant_emission(samples=args.samples):
+            sys.exit(1)
+        return
+
+    if args.animation:
+        if not render_flat_animation(samples=args.samples):
+            bpy.ops.render.render(animation=True)
+    elif not render_flat_still(samples=args.samples):
+        bpy.ops.render.render(write_still=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Half-Rate Rendering with Motion-Vector Interpolation
+Renders a high-frame-rate VJ loop (default 60 fps from the 30 fps timeline) by
+path tracing only every other output frame plus a vector pass, then synthesizing
+the in-betweens:
+
+  vectors       bidirectional motion-vector warp of the neighbouring renders,
+                weighted by a forward/backward consistency check so occluded
+                and disoccluded pixels come from the frame that actually sees them
+  minterpolate  ffmpeg's motion-compensated interpolation of the rendered frames
+
+The loop seam wraps: the in-between after FRAME_END blends FRAME_END with
+FRAME_START. Output frames on a beat of the tempo grid are always real renders
+(sub-frame renders when a beat falls between timeline frames).
+
+The compositor glow is re-applied after interpolation with post_bloom.py, so
+in-betweens glow exactly like the rendered frames.
+
+Usage:
+  blender --background --python render_halfrate.py -- outputs/vj_loop_60fps.mp4 [--method minterpolate] [--preview]
+"""
+
+import argparse
+import math
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import (  # noqa: E402
+    add_pass_output, encode_image_sequence, encode_minterpolated, find_pass_file, load_image_array,
+    save_render_array,
+)
+from post_bloom import apply_bloom  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+# Pixel distance at which a motion-vector disagreement halves a sample's weight
+CONSISTENCY_PX = 1.0
+
+
+# --- Frame planning ---
+
+def output_times(vj, factor):
+    """Timeline position (in 30 fps frames) of every output frame of the loop."""
+    count = (vj.FRAME_END - vj.FRAME_START + 1) * factor
+    return vj.FRAME_START + np.arange(count) / factor
+
+
+def real_frames(vj, times, factor):
+    """Output indices to path trace: every factor-th frame, plus the frame nearest each beat."""
+    real = set(range(0, len(times), factor))
+    for b in range(vj.TOTAL_BEATS):
+        real.add(int(round((vj.beat_frame(b) - vj.FRAME_START) * factor)) % len(times))
+    return sorted(real)
+
+
+# --- Rendering ---
+
+def setup_pass_output(scene, out_dir):
+    """Vector pass on, motion blur off, and a File Output node dumping Image + Vector as EXR."""
+    scene.render.use_motion_blur = False
+    bpy.context.view_layer.use_pass_vector = True
+    return add_pass_output(scene, out_dir, {'image': 'Image', 'vector': 'Vector'})
+
+
+def render_real_frames(scene, output, times, indices):
+    """Path trace the chosen output frames; pass files are tagged with the output index."""
+    for j in indices:
+        frame = int(math.floor(times[j]))
+        scene.frame_set(frame, subframe=float(times[j] - frame))
+        output.file_slots[0].path = f"{j:05d}_image_"
+        output.file_slots[1].path = f"{j:05d}_vector_"
+        print(f"Rendering output frame {j} (timeline {times[j]:g})")
+        bpy.ops.render.render(write_still=False)
+
+
+# --- Interpolation ---
+
+def _bilinear(img, x, y):
+    """Sample an (h, w, C) array at float pixel coordinates (edge-clamped)."""
+    h, w = img.shape[:2]
+    x = np.clip(x, 0.0, w - 1.001)
+    y = np.clip(y, 0.0, h - 1.001)
+    x0 = x.astype(np.int64)
+    y0 = y.astype(np.int64)
+    fx = (x - x0)[..., None]
+    fy = (y - y0)[..., None]
+    flat = img.reshape(h * w, -1)
+    i00 = y0 * w + x0
+
+    def take(idx):
+        return np.take(flat, idx, axis=0)
+
+    top = take(i00) * (1 - fx) + take(i00 + 1) * fx
+    bottom = take(i00 + w) * (1 - fx) + take(i00 + w + 1) * fx
+    return top * (1 - fy) + bottom * fy
+
+
+def motion_fields(vec_a, vec_b, seam=False):
+    """Per-pixel motion A->B in top-down pixel coordinates, as seen from A and from B.
+    Blender's vector pass holds (to previous frame) in xy and (to next frame) in zw, y up.
+    Across the loop seam B's backward vectors look before the loop start, where the
+    animation does not wrap, so B's forward motion stands in for them."""
+    forward = np.stack([vec_a[:, :, 2], -vec_a[:, :, 3]], axis=-1)
+    if seam:
+        backward = np.stack([vec_b[:, :, 2], -vec_b[:, :, 3]], axis=-1)
+    else:
+        backward = np.stack([vec_b[:, :, 0], -vec_b[:, :, 1]], axis=-1)
+    return forward, backward
+
+
+def interpolate(a, b, vec_a, vec_b, alpha, scale=1.0, seam=False):
+    """Synthesize the frame at fraction alpha between renders a and b, which are `scale`
+    timeline frames apart (vector passes hold motion per timeline frame).
+    Each pixel q tries two motion candidates m (A's forward and B's backward motion at q) and
+    keeps the one that best agrees with the motion stored at q - alpha * m in A and at
+    q + (1 - alpha) * m in B. A side that still disagrees is occluded there, so the other
+    frame provides the pixel."""
+    h, w = a.shape[:2]
+    forward, backward = motion_fields(vec_a, vec_b, seam)
+    forward = forward * scale
+    backward = backward * scale
+    ys, xs = np.mgrid[0:h, 0:w].astype(np.float32)
+
+    def fetch_error(motion):
+        ax, ay = xs - alpha * motion[:, :, 0], ys - alpha * motion[:, :, 1]
+        bx, by = xs + (1 - alpha) * motion[:, :, 0], ys + (1 - alpha) * motion[:, :, 1]
+        err_a = np.sum((_bilinear(forward, ax, ay) - motion) ** 2, axis=-1)
+        err_b = np.sum((_bilinear(backward, bx, by) - motion) ** 2, axis=-1)
+        err_a[(ax < 0) | (ax > w - 1) | (ay < 0) | (ay > h - 1)] = np.inf
+        err_b[(bx < 0) | (bx > w - 1) | (by < 0) | (by > h - 1)] = np.inf
+        return err_a, err_b
+
+    err_fa, err_fb = fetch_error(forward)
+    err_ba, err_bb = fetch_error(backward)
+    use_forward = np.minimum(err_fa, err_fb) + 0.01 * (err_fa + err_fb) <= \
+        np.minimum(err_ba, err_bb) + 0.01 * (err_ba + err_bb)
+    motion = np.where(use_forward[..., None], forward, backward)
+    err_a = np.where(use_forward, err_fa, err_ba)
+    err_b = np.where(use_forward, err_fb, err_bb)
+
+    weight_a = (1 - alpha) / (1.0 + err_a / CONSISTENCY_PX ** 2)
+    weight_b = alpha / (1.0 + err_b / CONSISTENCY_PX ** 2)
+    total = weight_a + weight_b
+    # Nothing trustworthy: plain cross-fade
+    none = total < 1e-6
+    weight_a = np.where(none, 1 - alpha, weight_a / np.maximum(total, 1e-6))[..., None]
+    weight_b = np.where(none, alpha, weight_b / np.maximum(total, 1e-6))[..., None]
+    sample_a = _bilinear(a, xs - alpha * motion[:, :, 0], ys - alpha * motion[:, :, 1])
+    sample_b = _bilinear(b, xs + (1 - alpha) * motion[:, :, 0], ys + (1 - alpha) * motion[:, :, 1])
+    return (weight_a * sample_a + weight_b * sample_b).astype(np.float32)
+
+
+def iter_output_frames(vj, times, real, out_dir, threads, glow):
+    """Yield every output frame (scene-linear) in order, synthesizing between real renders."""
+    count = len(times)
+    factor = int(round(1.0 / (times[1] - times[0])))
+    cache = {}
+
+    def load(j):
+        if j not in cache:
+            cache[j] = (load_image_array(find_pass_file(out_dir, f"{j:05d}_", 'image'), non_color=True),
+                        load_image_array(find_pass_file(out_dir, f"{j:05d}_", 'vector'), non_color=True))
+        return cache[j]
+
+    def finish(pixels):
+        return apply_bloom(pixels, *glow) if glow else pixels
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = []
+        for k, j in enumerate(real):
+            nxt = real[(k + 1) % len(real)]
+            wraps = nxt <= j
+            span = (nxt + count - j) if wraps else (nxt - j)
+            image_a, vec_a = load(j)
+            image_b, vec_b = load(nxt)
+            pending.append(pool.submit(finish, image_a))
+            for step in range(1, span):
+                pending.append(pool.submit(
+                    lambda a=image_a, b=image_b, va=vec_a, vb=vec_b, t=step / span:
+                    finish(interpolate(a, b, va, vb, t, span / factor, seam=wraps))))
+            for key in [key for key in cache if key != nxt]:
+                del cache[key]
+            while len(pending) > threads * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def glow_settings(vj, scene):
+    """Glow parameters when the scene's compositor has an active Glare node."""
+    if scene.use_nodes and scene.node_tree and any(
+            n.type == 'GLARE' and not n.mute for n in scene.node_tree.nodes):
+        return vj.GLOW_THRESHOLD, vj.GLOW_SIZE, vj.GLOW_MIX
+    return None
+
+
+def render_halfrate(vj, output_path, factor=2, preview=False, work_dir="outputs/halfrate",
+                    threads=os.cpu_count() or 4):
+    """Render at 1/factor of the output rate and synthesize the rest with motion vectors."""
+    vj.create_scene()
+    scene = bpy.context.scene
+    vj.apply_sample_profile(scene, preview)
+    glow = glow_settings(vj, scene)
+
+    passes_dir = os.path.abspath(os.path.join(work_dir, "passes"))
+    frames_dir = os.path.abspath(os.path.join(work_dir, "frames"))
+    for path in (passes_dir, frames_dir):
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+    times = output_times(vj, factor)
+    real = real_frames(vj, times, factor)
+    print(f"Path tracing {len(real)} of {len(times)} output frames ({vj.FPS * factor} fps)")
+    output = setup_pass_output(scene, passes_dir)
+    render_real_frames(scene, output, times, real)
+
+    scene.render.image_settings.file_format = 'PNG'
+    for i, pixels in enumerate(iter_output_frames(vj, times, real, passes_dir, threads, glow), start=1):
+        save_render_array(os.path.join(frames_dir, f"{i:04d}.png"), pixels, scene)
+    encode_image_sequence(os.path.join(frames_dir, "%04d.png"), output_path, vj.FPS * factor)
+    print(f"Saved: {output_path}")
+
+
+def render_minterpolate(vj, output_path, factor=2, preview=False, work_dir="outputs/halfrate"):
+    """Render the timeline frames as usual and let ffmpeg interpolate to fps * factor."""
+    vj.create_scene()
+    scene = bpy.context.scene
+    vj.apply_sample_profile(scene, preview)
+    frames_dir = os.path.abspath(os.path.join(work_dir, "frames"))
+    shutil.rmtree(frames_dir, ignore_errors=True)
+    os.makedirs(frames_dir)
+
+    scene.render.image_settings.file_format = 'PNG'
+    scene.render.filepath = os.path.join(frames_dir, "####")
+    bpy.ops.render.render(animation=True)
+
+    # Repeat the first frame after the last so interpolation wraps across the seam
+    count = vj.FRAME_END - vj.FRAME_START + 1
+    first = os.path.join(frames_dir, f"{vj.FRAME_START:04d}.png")
+    shutil.copyfile(first, os.path.join(frames_dir, f"{vj.FRAME_END + 1:04d}.png"))
+    encode_minterpolated(os.path.join(frames_dir, "%04d.png"), output_path, vj.FPS, factor, count,
+                         start_number=vj.FRAME_START)
+    print(f"Saved: {output_path}")
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Half-rate rendering with frame interpolation")
+    parser.add_argument('output', nargs='?', default="outputs/vj_loop_120bpm_60fps.mp4")
+    parser.add_argument('--method', choices=('vectors', 'minterpolate'), default='vectors')
+    parser.add_argument('--factor', type=int, default=2, help="Output frames per timeline frame")
+    parser.add_argument('--preview', action='store_true')
+    parser.add_argument('--work-dir', default="outputs/halfrate")
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args(argv)
+
+    vj = load_vj_module()
+    if args.method == 'vectors':
+        render_halfrate(vj, args.output, args.factor, args.preview, args.work_dir, args.threads)
+    else:
+        render_minterpolate(vj, args.output, args.factor, args.preview, args.work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+2.5D Layer-Stack Renderer
+Renders multi-plane parallax loops (idea 2) without path tracing. Each layer is a
+flat image plane; per frame we project its corners through the animated camera,
+build the layer-to-screen homography and composite the stack with vectorized
+NumPy warps, piping frames straight into ffmpeg.
+
+Usage:
+  /Applications/Blender.app/Contents/MacOS/Blender --background parallax.blend --python render_parallax.py -- outputs/parallax.mp4 [--threads 8]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+import numpy as np
+from bpy_extras.object_utils import world_to_camera_view
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import encode_frames, image_to_array, linear_to_srgb  # noqa: E402
+
+
+def find_layer_image(obj):
+    """Return the image driving a layer plane's material, or None."""
+    for slot in obj.material_slots:
+        mat = slot.material
+        if mat is None or not mat.use_nodes:
+            continue
+        for node in mat.node_tree.nodes:
+            if node.type == 'TEX_IMAGE' and node.image is not None:
+                return node.image
+    return None
+
+
+def collect_layers(scene):
+    """Gather the image planes of a parallax scene.
+    Each layer is a dict with the object, its premultiplied RGBA pixels and the
+    image-space position of its four vertices (from the UV map).
+    Raises ValueError when the scene holds anything this renderer cannot reproduce.
+    """
+    layers = []
+    unsupported = []
+    for obj in scene.objects:
+        if obj.hide_render or obj.type in {'CAMERA', 'LIGHT', 'EMPTY'}:
+            continue
+        image = find_layer_image(obj) if obj.type == 'MESH' else None
+        mesh = obj.data if obj.type == 'MESH' else None
+        if image is None or len(mesh.vertices) != 4 or not mesh.uv_layers or obj.modifiers:
+            unsupported.append(obj.name)
+            continue
+
+        pixels = image_to_array(image)
+        pixels[:, :, :3] *= pixels[:, :, 3:]
+        # Transparent 1px border so bilinear sampling fades out at the plane edges
+        pixels = np.pad(pixels, ((1, 1), (1, 1), (0, 0)))
+        h, w = image.size[1], image.size[0]
+
+        uv_of_vertex = {}
+        uv_data = mesh.uv_layers.active.data
+        for loop in mesh.loops:
+            uv_of_vertex[loop.vertex_index] = tuple(uv_data[loop.index].uv)
+        src = np.array([(u * w, (1.0 - v) * h) for u, v in (uv_of_vertex[i] for i in range(4))])
+
+        layers.append({'object': obj, 'pixels': pixels, 'src': src})
+
+    if unsupported:
+        raise ValueError(f"Not flat image layers, render with Cycles instead: {', '.join(unsupported)}")
+    return layers
+
+
+def homography(src, dst):
+    """3x3 matrix mapping the four src points onto the four dst points."""
+    A = np.zeros((8, 8))
+    b = np.zeros(8)
+    for i, ((x, y), (u, v)) in enumerate(zip(src, dst)):
+        A[2 * i] = [x, y, 1, 0, 0, 0, -u * x, -u * y]
+        A[2 * i + 1] = [0, 0, 0, x, y, 1, -v * x, -v * y]
+        b[2 * i] = u
+        b[2 * i + 1] = v
+    return np.append(np.linalg.solve(A, b), 1.0).reshape(3, 3)
+
+
+def frame_homographies(scene, layers):
+    """Evaluate the timeline once and return, per frame, [(layer_index, H)] sorted back to front."""
+    res_x, res_y = render_size(scene)
+    camera = scene.camera
+    frames = []
+    for frame in range(scene.frame_start, scene.frame_end + 1):
+        scene.frame_set(frame)
+        visible = []
+        for i, layer in enumerate(layers):
+            obj = layer['object']
+            ndc = [world_to_camera_view(scene, camera, obj.matrix_world @ v.co) for v in obj.data.vertices]
+            if any(p.z <= camera.data.clip_start for p in ndc):
+                continue
+            dst = [(p.x * res_x, (1.0 - p.y) * res_y) for p in ndc]
+            depth = sum(p.z for p in ndc) / 4.0
+            visible.append((depth, i, homography(layer['src'], dst)))
+        visible.sort(key=lambda item: -item[0])
+        frames.append([(i, H) for _, i, H in visible])
+    return frames
+
+
+def render_size(scene):
+    """Output resolution after the percentage scale."""
+    scale = scene.render.resolution_percentage / 100.0
+    return int(scene.render.resolution_x * scale), int(scene.render.resolution_y * scale)
+
+
+def warp_over(canvas, pixels, src, H):
+    """Inverse-warp one premultiplied layer through H and composite it over canvas in place."""
+    out_h, out_w = canvas.shape[:2]
+    corners = np.column_stack([src, np.ones(4)]) @ H.T
+    corners = corners[:, :2] / corners[:, 2:]
+    x0, y0 = np.maximum(np.floor(corners.min(axis=0)).astype(int), 0)
+    x1 = min(int(np.ceil(corners[:, 0].max())) + 1, out_w)
+    y1 = min(int(np.ceil(corners[:, 1].max())) + 1, out_h)
+    if x0 >= x1 or y0 >= y1:
+        return
+
+    Hinv = np.linalg.inv(H).astype(np.float32)
+    xs = np.arange(x0, x1, dtype=np.float32)[None, :] + 0.5
+    ys = np.arange(y0, y1, dtype=np.float32)[:, None] + 0.5
+    denom = Hinv[2, 0] * xs + Hinv[2, 1] * ys + Hinv[2, 2]
+    # +0.5 shifts from pixel centres into the padded layer's index space
+    sx = (Hinv[0, 0] * xs + Hinv[0, 1] * ys + Hinv[0, 2]) / denom + 0.5
+    sy = (Hinv[1, 0] * xs + Hinv[1, 1] * ys + Hinv[1, 2]) / denom + 0.5
+
+    ph, pw = pixels.shape[:2]
+    sx = np.clip(sx, 0.0, pw - 1.001)
+    sy = np.clip(sy, 0.0, ph - 1.001)
+    ix = sx.astype(np.int32)
+    iy = sy.astype(np.int32)
+    fx = (sx - ix)[:, :, None]
+    fy = (sy - iy)[:, :, None]
+
+    flat = pixels.reshape(-1, 4)
+    base = iy * pw + ix
+    # np.take is several times faster than fancy indexing for row gathers
+    top = np.take(flat, base, axis=0)
+    top += (np.take(flat, base + 1, axis=0) - top) * fx
+    bottom = np.take(flat, base + pw, axis=0)
+    bottom += (np.take(flat, base + pw + 1, axis=0) - bottom) * fx
+    sample = top
+    sample += (bottom - top) * fy
+
+    region = canvas[y0:y1, x0:x1]
+    region *= 1.0 - sample[:, :, 3:]
+    region += sample[:, :, :3]
+
+
+def composite_frame(layers, stack, size, background):
+    """Composite one frame's layer stack and return (h, w, 3) pixels."""
+    width, height = size
+    canvas = np.empty((height, width, 3), dtype=np.float32)
+    canvas[:] = background
+    for i, H in stack:
+        warp_over(canvas, layers[i]['pixels'], layers[i]['src'], H)
+    return canvas
+
+
+def world_background(scene):
+    """Background colour of the world shader (black if none), display-encoded like the layer pixels."""
+    world = scene.world
+    if world and world.use_nodes and 'Background' in world.node_tree.nodes:
+        background = world.node_tree.nodes['Background'].inputs
+        color = np.array(background['Color'].default_value[:3], dtype=np.float32) * background['Strength'].default_value
+        # The world is scene-linear; the layers are sRGB-encoded image pixels written without a view transform
+        return linear_to_srgb(color)
+    return np.zeros(3, dtype=np.float32)
+
+
+def iter_frames(layers, stacks, size, background, threads):
+    """Composite frames on a thread pool, yielding them in order with a bounded look-ahead."""
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = []
+        for stack in stacks:
+            pending.append(pool.submit(composite_frame, layers, stack, size, background))
+            if len(pending) >= threads * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+def render_parallax(output_path: str, threads: int = os.cpu_count() or 4):
+    """Render the current scene's layer stack over its frame range to an MP4."""
+    scene = bpy.context.scene
+    layers = collect_layers(scene)
+    stacks = frame_homographies(scene, layers)
+    frames = iter_frames(layers, stacks, render_size(scene), world_background(scene), threads)
+    print(f"Compositing {len(stacks)} frames from {len(layers)} layers to: {output_path}")
+    encode_frames(frames, output_path, scene.render.fps)
+
+
+def main():
+    argv = sys.argv
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="render_parallax.py")
+    parser.add_argument("output", nargs="?", default="outputs/parallax_loop.mp4")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args(argv)
+    render_parallax(args.output, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Coarse-to-Fine Frame Order for the 120 BPM VJ loop
+Renders the loop's frames hierarchically instead of front to back: every 32nd
+frame, then the frames halfway between (every 16th), and so on down to every
+frame. After the first pass the whole loop can be reviewed as a draft; each
+further pass halves the gaps, and a render that is cut short still leaves a
+usable draft of the full loop.
+
+Drafts fill missing frames from the nearest rendered ones, wrapping around the
+loop seam: 'hold' repeats the previous rendered frame, 'blend' cross-fades
+between the rendered frames on either side. Frames already on disk are
+skipped, so an interrupted render resumes where it stopped: a manifest next to
+the frames records each frame's render_cache.frame_key (sample profile and
+scene state), and frames rendered with a different key are removed and
+rendered again. Frames are written under a temporary name and renamed into
+place, so a frame cut off mid-write never counts as done.
+
+Usage:
+  blender --background --python render_progressive.py -- render --draft outputs/vj_loop_draft.mp4 [--preview]
+  blender --background --python render_progressive.py -- draft outputs/vj_loop_draft.mp4 --fill hold
+"""
+
+import argparse
+import bisect
+import json
+import os
+import sys
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import encode_frames, load_image_array  # noqa: E402
+from render_cache import frame_key  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+FRAMES_DIR = "outputs/progressive"
+MANIFEST = "manifest.json"
+
+
+def coarse_to_fine(frames, top=32):
+    """[(stride, frames new at that stride), ...] from every `top`-th frame down to every frame."""
+    levels = []
+    seen = set()
+    stride = top
+    while stride >= 1:
+        new = [frames[i] for i in range(0, len(frames), stride) if i not in seen]
+        seen.update(range(0, len(frames), stride))
+        if new:
+            levels.append((stride, new))
+        stride //= 2
+    return levels
+
+
+def frame_path(frames_dir, frame):
+    return os.path.join(frames_dir, f"{frame:04d}.png")
+
+
+def rendered_frames(frames_dir, frames):
+    return [f for f in frames if os.path.exists(frame_path(frames_dir, f))]
+
+
+def load_manifest(frames_dir):
+    """{frame: key} of the frames rendered into frames_dir."""
+    path = os.path.join(frames_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {int(frame): key for frame, key in json.load(f).items()}
+
+
+def save_manifest(frames_dir, manifest):
+    path = os.path.join(frames_dir, MANIFEST)
+    with open(path + ".tmp", 'w') as f:
+        json.dump({str(frame): key for frame, key in sorted(manifest.items())}, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def remove_stale_frames(frames_dir, keys, manifest):
+    """Delete frames on disk whose recorded key differs from the current one; returns how many."""
+    stale = [f for f in keys if os.path.exists(frame_path(frames_dir, f)) and manifest.get(f) != keys[f]]
+    for frame in stale:
+        os.remove(frame_path(frames_dir, frame))
+        manifest.pop(frame, None)
+    return len(stale)
+
+
+# --- Drafts ---
+
+def gap_sources(frames, rendered, fill='blend'):
+    """Per frame: [(rendered frame, weight), ...] from the nearest rendered frames, cyclic over the loop."""
+    if not rendered:
+        raise ValueError("No rendered frames yet")
+    count = len(frames)
+    position = {f: i for i, f in enumerate(frames)}
+    done = sorted(position[f] for f in rendered)
+    sources = []
+    for i, frame in enumerate(frames):
+        k = bisect.bisect_right(done, i) - 1
+        prev = done[k]  # k == -1 wraps to the last rendered frame
+        if prev == i:
+            sources.append([(frame, 1.0)])
+            continue
+        nxt = done[(k + 1) % len(done)]
+        if fill == 'hold' or nxt == prev:
+            sources.append([(frames[prev], 1.0)])
+            continue
+        before = (i - prev) % count
+        span = (nxt - prev) % count
+        t = before / span
+        sources.append([(frames[prev], 1.0 - t), (frames[nxt], t)])
+    return sources
+
+
+def iter_draft(frames_dir, frames, fill='blend'):
+    """Yield every frame of the loop (display-referred), filling gaps from rendered frames."""
+    sources = gap_sources(frames, rendered_frames(frames_dir, frames), fill)
+    cache = {}
+    for i, parts in enumerate(sources):
+        for f, _ in parts:
+            if f not in cache:
+                cache[f] = load_image_array(frame_path(frames_dir, f), non_color=True)
+        yield sum(w * cache[f] for f, w in parts)
+        # Keep only what the next frame still needs
+        upcoming = {f for f, _ in sources[i + 1]} if i + 1 < len(sources) else set()
+        for f in [f for f in cache if f not in upcoming]:
+            del cache[f]
+
+
+def encode_draft(frames_dir, frames, output_path, fps, fill='blend'):
+    done = len(rendered_frames(frames_dir, frames))
+    encode_frames(iter_draft(frames_dir, frames, fill), output_path, fps)
+    print(f"Draft with {done}/{len(frames)} rendered frames ({fill}): {output_path}")
+
+
+# --- Rendering ---
+
+def render_progressive(vj, frames_dir, top=32, preview=False, draft=None, fill='blend'):
+    """Render the loop coarse to fine, skipping up-to-date frames on disk; refresh the draft after each pass."""
+    vj.create_scene()
+    scene = bpy.context.scene
+    vj.apply_sample_profile(scene, preview)
+    scene.render.image_settings.file_format = 'PNG'
+    os.makedirs(frames_dir, exist_ok=True)
+    frames = list(range(vj.FRAME_START, vj.FRAME_END + 1))
+
+    keys = {frame: frame_key(scene, frame) for frame in frames}
+    manifest = load_manifest(frames_dir)
+    stale = remove_stale_frames(frames_dir, keys, manifest)
+    if stale:
+        print(f"WARNING: removed {stale} frame(s) rendered with a different profile or scene")
+    save_manifest(frames_dir, manifest)
+
+    for stride, level in coarse_to_fine(frames, top):
+        todo = [f for f in level if not os.path.exists(frame_path(frames_dir, f))]
+        print(f"Pass every {stride} frame(s): {len(todo)} of {len(level)} frames to render")
+        for frame in todo:
+            partial = os.path.join(frames_dir, f"{frame:04d}.partial.png")
+            scene.frame_set(frame)
+            scene.render.filepath = partial
+            bpy.ops.render.render(write_still=True)
+            os.replace(partial, frame_path(frames_dir, frame))
+            manifest[frame] = keys[frame]
+            save_manifest(frames_dir, manifest)
+        if draft and todo:
+            encode_draft(frames_dir, frames, draft, vj.FPS, fill)
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Coarse-to-fine loop rendering with gap-filled drafts")
+    sub = parser.add_subparsers(dest='command', required=True)
+    render = sub.add_parser('render', help="Render the loop coarse to fine")
+    render.add_argument('--top', type=int, default=32, help="Stride of the first pass (power of two)")
+    render.add_argument('--preview', action='store_true')
+    render.add_argument('--draft', default=None, help="Re-encode this draft MP4 after every pass")
+    draft = sub.add_parser('draft', help="Encode a draft from the frames rendered so far")
+    draft.add_argument('output')
+    for p in (render, draft):
+        p.add_argument('--frames-dir', default=FRAMES_DIR)
+        p.add_argument('--fill', choices=('hold', 'blend'), default='blend')
+    args = parser.parse_args(argv)
+
+    vj = load_vj_module()
+    frames_dir = os.path.abspath(args.frames_dir)
+    if args.command == 'render':
+        render_progressive(vj, frames_dir, args.top, args.preview, args.draft, args.fill)
+    else:
+        frames = list(range(vj.FRAME_START, vj.FRAME_END + 1))
+        encode_draft(frames_dir, frames, args.output, vj.FPS, args.fill)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Region-Tiled Still Rendering
+Splits a high-sample still into border regions rendered by parallel Blender
+processes (locally, or on render-farm workers sharing the output directory),
+then stitches the tiles and denoises the stitched image once, so no seams
+appear at tile edges.
+
+Cycles samples every pixel the same way whether it is rendered as part of a
+border region or the full frame, so the stitched noisy image matches a
+single-process render; only denoising needs the whole frame.
+
+Tiles are written as 32-bit EXR (noisy image, denoising albedo and normal).
+The final denoise and any compositor effects of the scene run in this process.
+
+Usage:
+  blender --background --python render_tiled.py -- 2 --tiles 4x2 --jobs 4
+  # render farm: print one command per tile, run them anywhere, then stitch
+  blender --background --python render_tiled.py -- 2 --tiles 4x2 --emit-commands
+  blender --background tiles_2/scene.blend --python render_tiled.py -- --stitch --tiles 4x2
+"""
+
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import add_pass_output, find_pass_file, load_image_array  # noqa: E402
+from render_all_scenes import SCENES, build_scene  # noqa: E402
+from script_env import SCRIPT_DIR  # noqa: E402
+
+# Tile passes: file tag -> Render Layers output
+PASSES = {
+    'image': 'Image',
+    'albedo': 'Denoising Albedo',
+    'normal': 'Denoising Normal',
+}
+
+
+def parse_tiles(spec):
+    """'4x2' -> (4 columns, 2 rows)"""
+    cols, rows = (int(v) for v in spec.lower().split('x'))
+    return cols, rows
+
+
+def render_size(scene):
+    pct = scene.render.resolution_percentage / 100.0
+    return int(scene.render.resolution_x * pct), int(scene.render.resolution_y * pct)
+
+
+def tile_rects(width, height, cols, rows):
+    """Pixel rects (x0, x1, r0, r1) in reading order; rows counted from the top."""
+    xs = [round(i * width / cols) for i in range(cols + 1)]
+    rs = [round(i * height / rows) for i in range(rows + 1)]
+    return [(xs[c], xs[c + 1], rs[r], rs[r + 1]) for r in range(rows) for c in range(cols)]
+
+
+def render_tile(scene, index, cols, rows, out_dir):
+    """Render one border region without denoising, writing its passes as EXR."""
+    width, height = render_size(scene)
+    x0, x1, r0, r1 = tile_rects(width, height, cols, rows)[index]
+    render = scene.render
+    render.use_border = True
+    render.use_crop_to_border = True
+    # Border is bottom-up in [0, 1]; the quarter-pixel bias keeps Blender's
+    # rounding on the intended pixel edge
+    render.border_min_x = (x0 + 0.25) / width
+    render.border_max_x = (x1 + 0.25) / width
+    render.border_min_y = (height - r1 + 0.25) / height
+    render.border_max_y = (height - r0 + 0.25) / height
+
+    scene.cycles.use_denoising = False
+    view_layer = bpy.context.view_layer
+    view_layer.cycles.denoising_store_passes = True
+
+    # Replace the compositor with a plain pass dump; effects run after stitching
+    scene.use_nodes = True
+    scene.node_tree.nodes.clear()
+    add_pass_output(scene, out_dir, PASSES, prefix=f"tile_{index:03d}_")
+    scene.node_tree.nodes.new(type='CompositorNodeComposite')
+
+    start = time.time()
+    bpy.ops.render.render(write_still=False)
+    print(f"Tile {index}: {x1 - x0}x{r1 - r0} px in {time.time() - start:.1f}s")
+
+
+def worker_commands(blend_path, cols, rows, out_dir, threads=0):
+    """Blender command lines, one per tile, rendering from the saved scene (threads=0: all cores)."""
+    return [
+        [
+            bpy.app.binary_path, '--background', blend_path, '--threads', str(threads),
+            '--python', os.path.abspath(__file__), '--',
+            '--worker', str(index), '--tiles', f"{cols}x{rows}", '--out-dir', out_dir,
+        ]
+        for index in range(cols * rows)
+    ]
+
+
+def run_local(commands, jobs):
+    """Run worker commands with at most `jobs` Blender processes at once."""
+    def run(cmd):
+        return subprocess.run(cmd, stdout=subprocess.DEVNULL).returncode
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        codes = list(pool.map(run, commands))
+    failed = [i for i, code in enumerate(codes) if code != 0]
+    if failed:
+        raise RuntimeError(f"Tile workers failed: {failed}")
+
+
+def stitch_tiles(scene, cols, rows, out_dir):
+    """Paste tile passes into full-frame arrays (bit-exact, no blending)."""
+    width, height = render_size(scene)
+    passes = {tag: np.zeros((height, width, 4), dtype=np.float32) for tag in PASSES}
+    for index, (x0, x1, r0, r1) in enumerate(tile_rects(width, height, cols, rows)):
+        for tag, full in passes.items():
+            tile = load_image_array(find_pass_file(out_dir, f"tile_{index:03d}_", tag), non_color=True)
+            if tile.shape[:2] != (r1 - r0, x1 - x0):
+                raise RuntimeError(f"Tile {index} {tag} is {tile.shape[1]}x{tile.shape[0]}, "
+                                   f"expected {x1 - x0}x{r1 - r0}")
+            full[r0:r1, x0:x1] = tile
+    return passes
+
+
+def _float_image(name, pixels, non_color):
+    height, width = pixels.shape[:2]
+    img = bpy.data.images.new(name, width, height, alpha=True, float_buffer=True)
+    if non_color:
+        img.colorspace_settings.name = 'Non-Color'
+    img.pixels.foreach_set(np.ascontiguousarray(pixels[::-1]).ravel())
+    img.update()
+    return img
+
+
+def finish_still(scene, passes, output_path):
+    """Denoise the stitched frame and run the scene's compositor in place of Render Layers.
+    With no Render Layers node left, Blender composites without rendering the scene again.
+    """
+    scene.render.use_border = False
+    scene.render.use_compositing = True
+    scene.use_nodes = True
+    tree = scene.node_tree
+    nodes = tree.nodes
+    links = tree.links
+
+    images = {tag: _float_image(f"Tiled_{tag}", pixels, non_color=tag != 'image')
+              for tag, pixels in passes.items()}
+    sources = {}
+    for tag, img in images.items():
+        node = nodes.new(type='CompositorNodeImage')
+        node.image = img
+        sources[tag] = node
+    color = sources['image'].outputs['Image']
+    if scene.cycles.use_denoising:
+        denoise = nodes.new(type='CompositorNodeDenoise')
+        links.new(color, denoise.inputs['Image'])
+        links.new(sources['albedo'].outputs['Image'], denoise.inputs['Albedo'])
+        links.new(sources['normal'].outputs['Image'], denoise.inputs['Normal'])
+        color = denoise.outputs['Image']
+
+    replacements = {'Image': color, 'Alpha': sources['image'].outputs['Alpha']}
+    for layers in [n for n in nodes if n.type == 'R_LAYERS']:
+        for output in layers.outputs:
+            for link in list(output.links):
+                if output.name in replacements:
+                    links.new(replacements[output.name], link.to_socket)
+        nodes.remove(layers)
+    composite = next((n for n in nodes if n.type == 'COMPOSITE'), None)
+    if composite is None:
+        composite = nodes.new(type='CompositorNodeComposite')
+    if not composite.inputs['Image'].is_linked:
+        links.new(color, composite.inputs['Image'])
+
+    scene.render.filepath = output_path
+    bpy.ops.render.render(write_still=True)
+    print(f"Stitched still saved to: {output_path}")
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Region-tiled parallel still rendering")
+    parser.add_argument('scene', nargs='?', type=int, help="Scene number from render_all_scenes.py")
+    parser.add_argument('--tiles', default='2x2', help="Columns x rows, e.g. 4x2")
+    parser.add_argument('--jobs', type=int, default=None, help="Parallel local Blender processes (default: tile count)")
+    parser.add_argument('--out-dir', default=None, help="Tile directory (default: tiles_<scene>)")
+    parser.add_argument('--output', default=None, help="Final still path (default: the scene's render output)")
+    parser.add_argument('--emit-commands', action='store_true', help="Print worker commands for a farm and exit")
+    parser.add_argument('--stitch', action='store_true', help="Only stitch and denoise existing tiles")
+    parser.add_argument('--worker', type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    cols, rows = parse_tiles(args.tiles)
+    scene = bpy.context.scene
+
+    if args.worker is not None:
+        render_tile(scene, args.worker, cols, rows, os.path.abspath(args.out_dir))
+        return
+
+    if args.stitch:
+        out_dir = os.path.abspath(args.out_dir or os.path.dirname(bpy.data.filepath))
+        output_path = os.path.abspath(args.output or scene.render.filepath)
+        finish_still(scene, stitch_tiles(scene, cols, rows, out_dir), output_path)
+        return
+
+    if args.scene not in SCENES:
+        parser.error(f"scene must be one of {sorted(SCENES)}")
+    out_dir = os.path.abspath(args.out_dir or os.path.join(SCRIPT_DIR, f"tiles_{args.scene}"))
+    output_path = os.path.abspath(args.output or os.path.join(SCRIPT_DIR, SCENES[args.scene]['output']))
+    os.makedirs(out_dir, exist_ok=True)
+
+    build_scene(args.scene)
+    scene = bpy.context.scene
+    scene.render.filepath = output_path
+    blend_path = os.path.join(out_dir, "scene.blend")
+    bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True)
+
+    if args.emit_commands:
+        for cmd in worker_commands(blend_path, cols, rows, out_dir):
+            print(shlex.join(cmd))
+        return
+
+    # Split the local cores between the concurrent processes
+    jobs = args.jobs or cols * rows
+    threads = max(1, (os.cpu_count() or 1) // jobs)
+    commands = worker_commands(blend_path, cols, rows, out_dir, threads)
+
+    start = time.time()
+    print(f"Rendering {cols * rows} tiles with {jobs} Blender processes...")
+    run_local(commands, jobs)
+    print(f"Tiles done in {time.time() - start:.1f}s")
+    finish_still(scene, stitch_tiles(scene, cols, rows, out_dir), output_path)
+    print(f"Total: {time.time() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Render-Low-Then-Upscale for 4K Deliverables
+Path traces a scene at a fraction of the deliverable resolution (default half:
+1920x1080 for 3840x2160) and upscales on the CPU with a joint bilateral
+upsampler guided by full-resolution albedo and normal passes.
+
+The guides come from a second render at the target resolution with a handful
+of samples and no denoising; albedo and normal converge in a few samples, so
+it costs a small fraction of the beauty render. The beauty image is split into
+albedo x shading: shading is smooth almost everywhere and is upsampled with
+weights that drop across albedo/normal edges, then re-modulated by the
+full-resolution albedo, so texture and silhouette detail come from the guides
+instead of being interpolated. Pixels with no usable albedo (emission, world
+background) are upsampled directly.
+
+Frames are upscaled on a thread pool in frame order. The VJ loop's compositor
+glow is muted during the pass renders and re-applied at the target resolution
+with post_bloom.py, its kernel grown with the upscale factor so the glow keeps
+the look of the low-resolution master.
+
+--report also renders one frame natively at the target resolution and compares
+it with the upscaled frame and with a plain (unguided) upscale: SSIM and PSNR
+on display-referred pixels, plus measured render and upscale times.
+
+Usage:
+  blender --background --python render_upscale.py -- vj_loop --target 3840x2160 --output outputs/vj_loop_4k.mp4
+  blender --background --python render_upscale.py -- 2 --fraction 0.5 --report
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import (  # noqa: E402
+    add_pass_output, encode_image_sequence, find_pass_file, load_image_array, save_render_array,
+)
+from post_bloom import apply_bloom  # noqa: E402
+from render_all_scenes import SCENES, build_scene  # noqa: E402
+from sample_tuner import apply_tuned_settings, psnr, ssim  # noqa: E402
+from script_env import SCRIPT_DIR, load_vj_module  # noqa: E402
+
+BEAUTY_PASSES = {
+    'image': 'Image',
+    'albedo': 'Denoising Albedo',
+    'normal': 'Denoising Normal',
+}
+GUIDE_PASSES = {
+    'albedo': 'Denoising Albedo',
+    'normal': 'Denoising Normal',
+}
+GUIDE_SAMPLES = 8
+
+# Guide differences at which a low-res sample's weight falls to exp(-1/2)
+ALBEDO_SIGMA = 0.08
+NORMAL_SIGMA = 0.2
+# Spatial falloff, in low-res pixels
+SPATIAL_SIGMA = 0.8
+# Below this albedo luminance shading is not recovered from image / albedo
+ALBEDO_FLOOR = 0.02
+BAND_ROWS = 96
+
+
+def parse_size(spec):
+    """'3840x2160' -> (3840, 2160)"""
+    width, height = (int(v) for v in spec.lower().split('x'))
+    return width, height
+
+
+# --- Upscaling ---
+
+def _guide(albedo, normal):
+    """Stack albedo and normal, scaled so a unit distance is one sigma."""
+    return np.concatenate([albedo[:, :, :3] / ALBEDO_SIGMA, normal[:, :, :3] / NORMAL_SIGMA], axis=-1)
+
+
+def joint_bilateral_upsample(low, size, guide_low=None, guide_high=None, band=BAND_ROWS):
+    """Upsample an (h, w, C) array to size = (width, height). Each output pixel averages the
+    4x4 nearest low-res pixels by distance and, with guides, by how closely each one's
+    low-res guide matches the output pixel's full-resolution guide. Without guides this is
+    a plain Gaussian-weighted upscale."""
+    width, height = size
+    h, w, channels = low.shape
+    fy = (np.arange(height) + 0.5) * h / height - 0.5
+    fx = (np.arange(width) + 0.5) * w / width - 0.5
+    y0 = np.floor(fy).astype(np.int64) - 1
+    x0 = np.floor(fx).astype(np.int64) - 1
+    taps_x = []
+    for dx in range(4):
+        ix = x0 + dx
+        wx = np.exp(-0.5 * ((fx - ix) / SPATIAL_SIGMA) ** 2).astype(np.float32)
+        taps_x.append((np.clip(ix, 0, w - 1), wx))
+
+    # Planar (C, h, w) layout keeps the per-tap arithmetic on contiguous planes;
+    # guide channels ride along with the values so each tap is one gather
+    if guide_low is not None:
+        low = np.concatenate([low, guide_low], axis=-1)
+        guide_high = np.ascontiguousarray(np.moveaxis(guide_high, -1, 0))
+    low = np.ascontiguousarray(np.moveaxis(low, -1, 0))
+    out = np.empty((channels, height, width), dtype=np.float32)
+    for r0 in range(0, height, band):
+        r1 = min(r0 + band, height)
+        acc = np.zeros((channels, r1 - r0, width), dtype=np.float32)
+        total = np.zeros((r1 - r0, width), dtype=np.float32)
+        for dy in range(4):
+            iy = y0[r0:r1] + dy
+            wy = np.exp(-0.5 * ((fy[r0:r1] - iy) / SPATIAL_SIGMA) ** 2).astype(np.float32)
+            low_rows = low[:, np.clip(iy, 0, h - 1)]
+            for ix, wx in taps_x:
+                taps = np.take(low_rows, ix, axis=2)
+                weight = wy[:, None] * wx[None, :]
+                if guide_high is not None:
+                    diff = guide_high[:, r0:r1] - taps[channels:]
+                    diff *= diff
+                    # The floor keeps a spatial fallback where no neighbour matches
+                    weight *= np.exp(-0.5 * diff.sum(axis=0)) + 1e-3
+                acc += weight * taps[:channels]
+                total += weight
+        out[:, r0:r1] = acc / total
+    return np.moveaxis(out, 0, -1)
+
+
+def upscale_frame(image, albedo, normal, albedo_high, normal_high):
+    """Upscale one scene-linear (h, w, 4) frame to the guides' resolution."""
+    height, width = albedo_high.shape[:2]
+    luma = albedo[:, :, :3].mean(axis=-1, keepdims=True)
+    valid = (luma >= ALBEDO_FLOOR).astype(np.float32)
+    shading = image[:, :, :3] / np.maximum(albedo[:, :, :3], 1e-3) * valid
+    # One sweep for image, masked shading and the mask itself
+    stacked = np.concatenate([image, shading, valid], axis=-1)
+    up = joint_bilateral_upsample(stacked, (width, height), _guide(albedo, normal), _guide(albedo_high, normal_high))
+    image_up, shading_up, valid_up = up[:, :, :4], up[:, :, 4:7], up[:, :, 7:8]
+    shading_up = shading_up / np.maximum(valid_up, 1e-6)
+    modulated = albedo_high[:, :, :3].mean(axis=-1, keepdims=True) >= ALBEDO_FLOOR
+    use_shading = modulated & (valid_up > 0.5)
+    image_up[:, :, :3] = np.where(use_shading, shading_up * albedo_high[:, :, :3], image_up[:, :, :3])
+    return image_up
+
+
+def iter_upscaled(frames, low_dir, guide_dir, threads, glow=None):
+    """Load each frame's passes on the main thread (bpy), upscale on a pool, yield in order."""
+    def work(passes):
+        pixels = upscale_frame(*passes)
+        return apply_bloom(pixels, *glow) if glow else pixels
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = []
+        for frame in frames:
+            passes = [load_image_array(find_pass_file(low_dir, "", tag, frame), non_color=True)
+                      for tag in BEAUTY_PASSES]
+            passes += [load_image_array(find_pass_file(guide_dir, "guide_", tag, frame), non_color=True)
+                       for tag in GUIDE_PASSES]
+            pending.append(pool.submit(work, passes))
+            if len(pending) >= threads * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+# --- Rendering ---
+
+def prepare_scene(scene):
+    """Denoising passes on, compositor glow muted (re-applied after upscaling)."""
+    bpy.context.view_layer.cycles.denoising_store_passes = True
+    if scene.use_nodes and scene.node_tree:
+        for node in scene.node_tree.nodes:
+            if node.type == 'GLARE':
+                node.mute = True
+
+
+def render_passes(scene, frames, size, passes, out_dir, prefix=""):
+    """Render frames at size = (width, height), dumping passes to out_dir. Returns seconds/frame."""
+    scene.render.resolution_x, scene.render.resolution_y = size
+    scene.render.resolution_percentage = 100
+    output = add_pass_output(scene, out_dir, passes, prefix)
+    start = time.perf_counter()
+    try:
+        for frame in frames:
+            scene.frame_set(frame)
+            bpy.ops.render.render(write_still=False)
+    finally:
+        scene.node_tree.nodes.remove(output)
+    return (time.perf_counter() - start) / len(frames)
+
+
+def render_guides(scene, frames, size, out_dir, samples=GUIDE_SAMPLES):
+    """Full-resolution albedo/normal at a few samples. Returns seconds/frame."""
+    saved = (scene.cycles.samples, scene.cycles.use_adaptive_sampling, scene.cycles.use_denoising)
+    scene.cycles.samples = samples
+    scene.cycles.use_adaptive_sampling = False
+    scene.cycles.use_denoising = False
+    try:
+        return render_passes(scene, frames, size, GUIDE_PASSES, out_dir, "guide_")
+    finally:
+        scene.cycles.samples, scene.cycles.use_adaptive_sampling, scene.cycles.use_denoising = saved
+
+
+def display_pixels(pixels, scene, path):
+    """Scene-linear pixels as written by a render (view transform applied), read back in 0..1."""
+    save_render_array(path, pixels, scene)
+    return load_image_array(path)
+
+
+def quality_report(scene, frame, target, low_dir, guide_dir, work_dir, timings, glow=None):
+    """Render `frame` natively at the target size and score the guided and plain upscales against it."""
+    native_dir = os.path.join(work_dir, "native")
+    timings['native'] = render_passes(scene, [frame], target, {'image': 'Image'}, native_dir, "native_")
+    native = load_image_array(find_pass_file(native_dir, "native_", 'image', frame), non_color=True)
+    image = load_image_array(find_pass_file(low_dir, "", 'image', frame), non_color=True)
+
+    start = time.perf_counter()
+    guided = next(iter_upscaled([frame], low_dir, guide_dir, threads=1, glow=glow))
+    timings['upscale'] = time.perf_counter() - start
+    plain = joint_bilateral_upsample(image, target)
+    if glow:
+        native, plain = apply_bloom(native, *glow), apply_bloom(plain, *glow)
+
+    reference = display_pixels(native, scene, os.path.join(native_dir, "native.png"))
+    report = {'frame': frame, 'target': list(target), 'seconds_per_frame': timings}
+    for name, pixels in (('guided', guided), ('plain', plain)):
+        shown = display_pixels(pixels, scene, os.path.join(native_dir, f"{name}.png"))
+        report[name] = {'ssim': ssim(shown, reference), 'psnr': psnr(shown, reference)}
+    upscaled_cost = timings['low'] + timings['guide'] + timings['upscale']
+    report['cost_vs_native'] = upscaled_cost / timings['native']
+
+    print(f"Quality at frame {frame} vs native {target[0]}x{target[1]}:")
+    for name in ('guided', 'plain'):
+        print(f"  {name:6s} SSIM {report[name]['ssim']:.4f}  PSNR {report[name]['psnr']:.2f} dB")
+    print(f"  low {timings['low']:.1f}s + guides {timings['guide']:.1f}s + upscale {timings['upscale']:.1f}s "
+          f"per frame vs native {timings['native']:.1f}s ({report['cost_vs_native']:.0%})")
+    with open(os.path.join(work_dir, "report.json"), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def build(key, preview=False):
+    """Build the scene for `key`. Returns (frames, glow settings or None, fps)."""
+    if key == 'vj_loop':
+        vj = load_vj_module()
+        vj.create_scene()
+        scene = bpy.context.scene
+        vj.apply_sample_profile(scene, preview)
+        glow = None
+        if scene.use_nodes and scene.node_tree and any(
+                n.type == 'GLARE' and not n.mute for n in scene.node_tree.nodes):
+            glow = (vj.GLOW_THRESHOLD, vj.GLOW_SIZE, vj.GLOW_MIX)
+        return list(range(vj.FRAME_START, vj.FRAME_END + 1)), glow, vj.FPS
+    build_scene(int(key))
+    scene = bpy.context.scene
+    apply_tuned_settings(scene, int(key))
+    if preview and scene.render.engine == 'CYCLES':
+        scene.cycles.samples = 16
+    return [scene.frame_current], None, scene.render.fps
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Render at reduced resolution and upscale with guide passes")
+    parser.add_argument('scene', help="Scene number from render_all_scenes.py, or 'vj_loop'")
+    parser.add_argument('--target', default="3840x2160", help="Deliverable resolution, e.g. 3840x2160")
+    parser.add_argument('--fraction', type=float, default=0.5, help="Render resolution as a fraction of the target")
+    parser.add_argument('--guide-samples', type=int, default=GUIDE_SAMPLES)
+    parser.add_argument('--output', default=None, help="PNG for stills, MP4 for the VJ loop")
+    parser.add_argument('--work-dir', default="outputs/upscale")
+    parser.add_argument('--report', action='store_true', help="Compare against a native-resolution render")
+    parser.add_argument('--report-frame', type=int, default=None)
+    parser.add_argument('--preview', action='store_true')
+    parser.add_argument('--threads', type=int, default=os.cpu_count() or 4)
+    args = parser.parse_args(argv)
+
+    if args.scene != 'vj_loop' and int(args.scene) not in SCENES:
+        parser.error(f"scene must be 'vj_loop' or one of {sorted(SCENES)}")
+    target = parse_size(args.target)
+    low = (max(1, round(target[0] * args.fraction)), max(1, round(target[1] * args.fraction)))
+    frames, glow, fps = build(args.scene, args.preview)
+    scene = bpy.context.scene
+    if glow:
+        threshold, size, mix = glow
+        glow = (threshold, min(9, size + int(round(math.log2(1.0 / args.fraction)))), mix)
+
+    work_dir = os.path.abspath(args.work_dir)
+    low_dir = os.path.join(work_dir, "low")
+    guide_dir = os.path.join(work_dir, "guide")
+    frames_dir = os.path.join(work_dir, "frames")
+    shutil.rmtree(work_dir, ignore_errors=True)
+    for path in (low_dir, guide_dir, frames_dir):
+        os.makedirs(path)
+
+    prepare_scene(scene)
+    timings = {}
+    print(f"Rendering {len(frames)} frame(s) at {low[0]}x{low[1]}...")
+    timings['low'] = render_passes(scene, frames, low, BEAUTY_PASSES, low_dir)
+    print(f"Rendering guides at {target[0]}x{target[1]}, {args.guide_samples} samples...")
+    timings['guide'] = render_guides(scene, frames, target, guide_dir, args.guide_samples)
+
+    scene.render.image_settings.file_format = 'PNG'
+    start = time.perf_counter()
+    for frame, pixels in zip(frames, iter_upscaled(frames, low_dir, guide_dir, args.threads, glow)):
+        save_render_array(os.path.join(frames_dir, f"{frame:04d}.png"), pixels, scene)
+    print(f"Upscaled {len(frames)} frame(s) in {time.perf_counter() - start:.1f}s")
+
+    if args.scene == 'vj_loop':
+        output = args.output or "outputs/vj_loop_120bpm_4k.mp4"
+        encode_image_sequence(os.path.join(frames_dir, "%04d.png"), output, fps, start_number=frames[0])
+    else:
+        name = os.path.splitext(SCENES[int(args.scene)]['output'])[0]
+        output = args.output or os.path.join(SCRIPT_DIR, f"{name}_{target[0]}x{target[1]}.png")
+        shutil.copyfile(os.path.join(frames_dir, f"{frames[0]:04d}.png"), output)
+    print(f"Saved: {output}")
+
+    if args.report:
+        frame = args.report_frame if args.report_frame is not None else frames[len(frames) // 2]
+        if frame not in frames:
+            parser.error(f"--report-frame must be one of the rendered frames ({frames[0]}-{frames[-1]})")
+        quality_report(scene, frame, target, low_dir, guide_dir, work_dir, timings, glow)
+
+
+if __name__ == "__main__":
+    main()
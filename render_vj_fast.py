@@ -1,40 +1,196 @@
 """
-Render the 120 BPM VJ loop quickly using EEVEE with bloom.
+Render the 120 BPM VJ loop quickly using EEVEE Next, look-matched to Cycles.
+EEVEE Next dropped the legacy bloom settings, so the look is mapped onto what it has:
+- glow: the compositor Glare node from create_scene (the same glow Cycles renders get)
+- emission and denoised lighting: ray tracing with denoising, plus fast GI for
+  bounce light from the emitters
+- glass crystals: dithered materials with ray-traced refraction and sphere thickness
+- soft shadows: jittered light shadows with more shadow rays and steps
+Settings missing from the running Blender are reported, never skipped silently.
+
+--check renders stratified loop frames with Cycles (kept as references, keyed
+on resolution and scene state) and with EEVEE, and fails when the worst-frame SSIM drops below the threshold.
+
 Usage:
-  /Applications/Blender.app/Contents/MacOS/Blender --background --python render_vj_fast.py
+  /Applications/Blender.app/Contents/MacOS/Blender --background --python render_vj_fast.py [-- --preview]
+  /Applications/Blender.app/Contents/MacOS/Blender --background --python render_vj_fast.py -- --check [--ssim 0.95]
 """
 
-import bpy  # noqa: F401
-import importlib.util
+import argparse
+import glob
+import json
 import os
+import sys
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import load_image_array  # noqa: E402
+from preflight import require_preflight  # noqa: E402
+from render_cache import frame_key  # noqa: E402
+from render_estimate import stratified_frames  # noqa: E402
+from sample_tuner import ssim  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
+
+EEVEE_SAMPLES = 64
+PREVIEW_SAMPLES = 16
+CHECK_SSIM = 0.95
+CHECK_PERCENTAGE = 50
+CHECK_DIR = "outputs/eevee_check"
+
+EEVEE_SETTINGS = {
+    'use_shadows': True,
+    'shadow_ray_count': 2,
+    'shadow_step_count': 8,
+    'use_raytracing': True,
+    'ray_tracing_method': 'SCREEN',
+    'fast_gi_method': 'GLOBAL_ILLUMINATION',
+    'fast_gi_step_count': 8,
+    'fast_gi_distance': 4.0,
+    'clamp_surface_indirect': 10.0,
+}
+RAYTRACE_SETTINGS = {
+    'resolution_scale': '1',
+    'trace_max_roughness': 0.5,
+    'use_denoise': True,
+    'denoise_spatial': True,
+    'denoise_temporal': True,
+    'denoise_bilateral': True,
+}
+GLASS_SETTINGS = {
+    'surface_render_method': 'DITHERED',
+    'use_raytrace_refraction': True,
+    'thickness_mode': 'SPHERE',
+}
+
+
+def set_props(struct, settings):
+    """Apply settings that exist on `struct`; return the names this Blender doesn't have."""
+    missing = []
+    for name, value in settings.items():
+        if hasattr(struct, name):
+            setattr(struct, name, value)
+        else:
+            missing.append(name)
+    return missing
+
+
+def is_glass(material):
+    """True for materials that refract: Glass/Refraction BSDFs or Principled transmission."""
+    if not material or not material.use_nodes:
+        return False
+    for node in material.node_tree.nodes:
+        if node.type in ('BSDF_GLASS', 'BSDF_REFRACTION'):
+            return True
+        if node.type == 'BSDF_PRINCIPLED':
+            weight = node.inputs.get('Transmission Weight')
+            if weight is not None and (weight.is_linked or weight.default_value > 0.0):
+                return True
+    return False
+
+
+def configure_eevee_look(scene, samples=EEVEE_SAMPLES):
+    """Switch the VJ scene to EEVEE Next with the Cycles look mapped onto its settings.
+    Returns the settings this Blender doesn't have."""
+    scene.render.engine = 'BLENDER_EEVEE_NEXT'
+    eevee = scene.eevee
+    eevee.taa_render_samples = samples
+    missing = set_props(eevee, EEVEE_SETTINGS)
+    missing += set_props(eevee.ray_tracing_options, RAYTRACE_SETTINGS)
+    for light in bpy.data.lights:
+        missing += set_props(light, {'use_shadow_jitter': True})
+    glass = [m for m in bpy.data.materials if is_glass(m)]
+    for material in glass:
+        missing += set_props(material, GLASS_SETTINGS)
+
+    glare = [n for n in scene.node_tree.nodes if n.type == 'GLARE'] if scene.use_nodes and scene.node_tree else []
+    if not glare or all(n.mute for n in glare):
+        raise RuntimeError("No active compositor Glare node: EEVEE Next renders would have no glow")
+    if missing:
+        print(f"EEVEE settings not available in Blender {bpy.app.version_string}: {sorted(set(missing))}")
+    print(f"EEVEE Next look: {samples} samples, {len(glass)} glass material(s), glow from compositor Glare")
+    return sorted(set(missing))
+
+
+# --- Look check against Cycles ---
 
+def render_check_frames(scene, frames, out_dir, tag, reuse=False):
+    """Render `frames` to <out_dir>/<tag>_####_<pct>pct_<key>.png and load them display-referred.
+    The key (render_cache.frame_key) covers the settings and evaluated scene, so with `reuse`
+    a kept frame is only used when nothing it depends on has changed; stale ones are removed.
+    """
+    pixels = {}
+    percentage = scene.render.resolution_percentage
+    for frame in frames:
+        key = frame_key(scene, frame)
+        path = os.path.join(out_dir, f"{tag}_{frame:04d}_{percentage}pct_{key[:16]}.png")
+        if not (reuse and os.path.exists(path)):
+            for stale in glob.glob(os.path.join(out_dir, f"{tag}_{frame:04d}_*.png")):
+                os.remove(stale)
+            scene.frame_set(frame)
+            scene.render.filepath = path
+            bpy.ops.render.render(write_still=True)
+        pixels[frame] = load_image_array(path)
+    return pixels
 
-def load_vj_module():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    vj_path = os.path.join(script_dir, "scene_03_vj_loop.py")
-    spec = importlib.util.spec_from_file_location("scene_03_vj_loop", vj_path)
-    vj = importlib.util.module_from_spec(spec)
-    assert spec and spec.loader
-    spec.loader.exec_module(vj)
-    return vj
+
+def check_against_cycles(vj, threshold=CHECK_SSIM, percentage=CHECK_PERCENTAGE, out_dir=CHECK_DIR,
+                         refresh=False):
+    """SSIM of EEVEE frames against Cycles references; report dict with 'passed'."""
+    vj.create_scene()
+    scene = bpy.context.scene
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    scene.render.resolution_percentage = percentage
+    scene.render.image_settings.file_format = 'PNG'
+    frames = stratified_frames(vj, angles=2)
+
+    vj.apply_sample_profile(scene, preview=False)
+    print(f"Cycles references for frames {frames} at {percentage}%...")
+    references = render_check_frames(scene, frames, out_dir, "cycles", reuse=not refresh)
+    configure_eevee_look(scene)
+    print("EEVEE frames...")
+    fast = render_check_frames(scene, frames, out_dir, "eevee")
+
+    scores = {frame: ssim(fast[frame], references[frame]) for frame in frames}
+    worst = min(scores, key=scores.get)
+    report = {'threshold': threshold, 'percentage': percentage, 'ssim': scores,
+              'worst_frame': worst, 'worst_ssim': scores[worst], 'passed': scores[worst] >= threshold}
+    with open(os.path.join(out_dir, "report.json"), 'w') as f:
+        json.dump(report, f, indent=2)
+    for frame, score in scores.items():
+        print(f"  frame {frame}: SSIM {score:.4f}")
+    verdict = "PASS" if report['passed'] else "FAIL"
+    print(f"{verdict}: worst SSIM {scores[worst]:.4f} (frame {worst}) vs threshold {threshold}")
+    return report
 
 
 def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Look-matched EEVEE Next render of the VJ loop")
+    parser.add_argument('--output', default="outputs/vj_loop_120bpm_final.mp4")
+    parser.add_argument('--preview', action='store_true')
+    parser.add_argument('--check', action='store_true', help="Compare EEVEE against Cycles instead of rendering")
+    parser.add_argument('--ssim', type=float, default=CHECK_SSIM, help="Worst-frame SSIM the check requires")
+    parser.add_argument('--percentage', type=int, default=CHECK_PERCENTAGE, help="Resolution percentage for the check")
+    parser.add_argument('--refresh-references', action='store_true', help="Re-render the Cycles references")
+    parser.add_argument('--skip-preflight', action='store_true', help="Render without the preflight checks")
+    args = parser.parse_args(argv)
+
     vj = load_vj_module()
-    vj.create_scene()
+    if args.check:
+        report = check_against_cycles(vj, args.ssim, args.percentage, refresh=args.refresh_references)
+        if not report['passed']:
+            sys.exit(1)
+        return
 
+    vj.create_scene()
     scene = bpy.context.scene
-    # Blender 4.5 uses EEVEE Next identifier
-    scene.render.engine = 'BLENDER_EEVEE_NEXT'
-    try:
-        scene.eevee.use_bloom = True
-        scene.eevee.bloom_intensity = 0.08
-        scene.eevee.bloom_threshold = 0.6
-        scene.eevee.bloom_radius = 6.5
-    except Exception:
-        pass
-
-    vj.render_animation(output_path="outputs/vj_loop_120bpm_final.mp4", preview=False)
+    missing = configure_eevee_look(scene, PREVIEW_SAMPLES if args.preview else EEVEE_SAMPLES)
+    if not args.skip_preflight:
+        require_preflight(vj, scene, missing)
+    vj.render_animation(output_path=args.output, preview=args.preview)
 
 
 if __name__ == "__main__":
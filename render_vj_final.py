@@ -1,27 +1,26 @@
 """
 Render the 120 BPM VJ loop to a final MP4 with higher quality.
+Runs preflight.py's checks and smoke render first and aborts if any fail.
 Usage:
-  /Applications/Blender.app/Contents/MacOS/Blender --background --python render_vj_final.py
+  /Applications/Blender.app/Contents/MacOS/Blender --background --python render_vj_final.py [-- --skip-preflight]
 """
 
-import bpy  # noqa: F401
-import importlib.util
+import bpy
 import os
+import sys
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-def load_vj_module():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    vj_path = os.path.join(script_dir, "scene_03_vj_loop.py")
-    spec = importlib.util.spec_from_file_location("scene_03_vj_loop", vj_path)
-    vj = importlib.util.module_from_spec(spec)
-    assert spec and spec.loader
-    spec.loader.exec_module(vj)
-    return vj
+from preflight import require_preflight  # noqa: E402
+from script_env import load_vj_module  # noqa: E402
 
 
 def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
     vj = load_vj_module()
     vj.create_scene()
+    if "--skip-preflight" not in argv:
+        require_preflight(vj, bpy.context.scene)
     vj.render_animation(output_path="outputs/vj_loop_120bpm_final.mp4", preview=False)
 
 
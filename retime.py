@@ -0,0 +1,161 @@
+"""
+Tempo Retiming for the 120 BPM VJ loop
+Builds the loop once, stores its animation in beat space and retimes it to any
+BPM / frame rate without rebuilding. FRAMES_PER_BEAT is rounded to whole
+frames, which is only exact for tempos that divide the frame rate (128 BPM at
+30 fps needs 14.0625 frames per beat); here beats can land between frames.
+
+`build` moves every action (objects, lights, camera, materials, world, LOD
+mesh attributes) into an NLA strip on a "BeatSpace" track, records the base
+timing on the scene and saves the .blend. `retime` then only scales strips:
+each strip maps scene frame f to origin + (f - origin) / scale in its action,
+so beat b lands on frame origin + b * frames_per_beat, fractional included,
+and motion-blur subframes see the same beat phase. The Geometry Nodes
+instancer's loop and beat lengths (instancing.py) are rescaled to match.
+
+The loop stays seamless: its length is rounded to whole frames and the tempo
+adjusted by the difference (127 BPM at 30 fps renders at 126.87 BPM); --exact keeps
+the requested tempo and lets the loop seam drift by a fraction of a frame.
+
+Usage:
+  blender --background --python retime.py -- build [--blend outputs/vj_loop_beats.blend]
+  blender --background --python retime.py -- render --bpm 122 124 126 128 [--fps 30] [--preview]
+  blender --background --python retime.py -- retime --bpm 128 --fps 60 --save outputs/vj_loop_128bpm.blend
+"""
+
+import argparse
+import os
+import sys
+
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from script_env import load_vj_module  # noqa: E402
+
+BEAT_TRACK = "BeatSpace"
+BEATS_BLEND = "outputs/vj_loop_beats.blend"
+
+
+def animated_ids():
+    """Every datablock that can carry the loop's animation, embedded node trees included."""
+    for collection in (bpy.data.objects, bpy.data.meshes, bpy.data.lights, bpy.data.cameras):
+        yield from collection
+    for collection in (bpy.data.materials, bpy.data.worlds, bpy.data.scenes):
+        for id_block in collection:
+            yield id_block
+            if id_block.node_tree:
+                yield id_block.node_tree
+
+
+def to_beat_space(scene, bpm, fps, origin, beats):
+    """Move every active action into a BeatSpace NLA strip and record the base timing on the scene."""
+    strips = 0
+    for id_block in animated_ids():
+        anim = id_block.animation_data
+        if anim is None or anim.action is None:
+            continue
+        action = anim.action
+        track = anim.nla_tracks.new()
+        track.name = BEAT_TRACK
+        strip = track.strips.new(action.name, int(action.frame_range[0]), action)
+        if hasattr(strip, 'action_slot') and anim.action_slot:
+            strip.action_slot = anim.action_slot
+        anim.action = None
+        strips += 1
+    scene["beat_timing"] = {'bpm': float(bpm), 'fps': float(fps), 'origin': float(origin), 'beats': int(beats),
+                            'frames_per_beat': fps * 60.0 / bpm}
+    print(f"{strips} actions moved to beat-space NLA strips ({bpm} BPM at {fps} fps)")
+    return strips
+
+
+def loop_timing(base, bpm, fps, exact=False):
+    """(frames per beat, loop frames) for a tempo; seamless unless exact."""
+    frames_per_beat = fps * 60.0 / bpm
+    frames = max(1, int(round(base['beats'] * frames_per_beat)))
+    if not exact:
+        frames_per_beat = frames / base['beats']
+    return frames_per_beat, frames
+
+
+def retime(scene, bpm, fps, exact=False):
+    """Scale the BeatSpace strips and instancer timing to `bpm` at `fps`; returns the effective BPM."""
+    base = scene.get("beat_timing")
+    if base is None:
+        raise RuntimeError("Scene is not in beat space; run `retime.py -- build` first")
+    origin = base['origin']
+    frames_per_beat, frames = loop_timing(base, bpm, fps, exact)
+    scale = frames_per_beat / base['frames_per_beat']
+
+    for id_block in animated_ids():
+        anim = id_block.animation_data
+        if anim is None:
+            continue
+        for track in anim.nla_tracks:
+            if track.name != BEAT_TRACK:
+                continue
+            for strip in track.strips:
+                # Scaling recomputes the end from the start; then move the start into place
+                strip.scale = scale
+                strip.frame_start_ui = origin + (strip.action_frame_start - origin) * scale
+    for group in bpy.data.node_groups:
+        timing = group.get("beat_timing")
+        if timing:
+            for name, frames_base in timing.items():
+                group.nodes[name].inputs[1].default_value = frames_base * scale
+
+    scene.render.fps = int(round(fps))
+    scene.render.fps_base = scene.render.fps / fps
+    scene.frame_start = int(origin)
+    scene.frame_end = int(origin) + frames - 1
+    effective = fps * 60.0 / frames_per_beat
+    print(f"Retimed to {effective:.3f} BPM at {fps:g} fps: {frames_per_beat:.4f} frames per beat, "
+          f"{frames} frames per loop")
+    return effective
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Beat-space NLA retiming of the VJ loop")
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Build the loop once and save it in beat space")
+    render = sub.add_parser('render', help="Render the loop at one or more tempos from the beat-space build")
+    render.add_argument('--bpm', type=float, nargs='+', required=True)
+    render.add_argument('--preview', action='store_true')
+    render.add_argument('--output-dir', default="outputs")
+    single = sub.add_parser('retime', help="Retime the beat-space build and save it")
+    single.add_argument('--bpm', type=float, required=True)
+    single.add_argument('--save', required=True)
+    for p in (build, render, single):
+        p.add_argument('--blend', default=BEATS_BLEND)
+    for p in (render, single):
+        p.add_argument('--fps', type=float, default=None, help="Frame rate (default: the build's)")
+        p.add_argument('--exact', action='store_true', help="Exact tempo; the loop seam may land between frames")
+    args = parser.parse_args(argv)
+
+    vj = load_vj_module()
+    blend = os.path.abspath(args.blend)
+    if args.command == 'build':
+        vj.create_scene()
+        to_beat_space(bpy.context.scene, vj.BPM, vj.FPS, vj.FRAME_START, vj.TOTAL_BEATS)
+        os.makedirs(os.path.dirname(blend), exist_ok=True)
+        bpy.ops.wm.save_as_mainfile(filepath=blend)
+        print(f"Beat-space build saved to: {blend}")
+        return
+
+    bpy.ops.wm.open_mainfile(filepath=blend)
+    scene = bpy.context.scene
+    fps = args.fps or scene["beat_timing"]['fps']
+    if args.command == 'retime':
+        retime(scene, args.bpm, fps, args.exact)
+        bpy.ops.wm.save_as_mainfile(filepath=os.path.abspath(args.save))
+        print(f"Saved: {args.save}")
+        return
+    for bpm in args.bpm:
+        retime(scene, bpm, fps, args.exact)
+        output = os.path.join(args.output_dir, f"vj_loop_{bpm:g}bpm_{fps:g}fps.mp4")
+        vj.render_animation(output_path=output, fps=scene.render.fps, preview=args.preview)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Sample-Count Tuner
+Renders a few representative frames of a scene at a very high sample count as
+a reference, then searches Cycles sample counts and adaptive-sampling noise
+thresholds (with denoising on) for either:
+  - the cheapest settings whose worst frame meets a target SSIM or PSNR, or
+  - the best quality whose predicted full-resolution frame time fits a budget.
+
+The chosen settings are stored per scene in render_settings.json and applied by
+render_all_scenes.py and the VJ loop's final render in place of the hard-coded
+sample counts. Adaptive sampling then spends the sample cap only where a frame
+needs it, so easy frames stop early and caustic-heavy ones still converge.
+
+Comparisons run on display-referred pixels (the scene's view transform).
+
+Usage:
+  blender --background --python sample_tuner.py -- 2 --ssim 0.985
+  blender --background --python sample_tuner.py -- vj_loop --budget 12
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from frame_io import load_image_array  # noqa: E402
+from script_env import SCRIPT_DIR, load_vj_module  # noqa: E402
+
+SETTINGS_PATH = os.path.join(SCRIPT_DIR, "render_settings.json")
+
+SAMPLE_LADDER = [16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512, 768, 1024]
+THRESHOLDS = [0.1, 0.05, 0.02, 0.01]
+
+
+def load_settings(path=SETTINGS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def store_settings(key, settings, path=SETTINGS_PATH):
+    data = load_settings(path)
+    data[str(key)] = settings
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def apply_tuned_settings(scene, key, path=SETTINGS_PATH):
+    """Apply stored settings for `key` to a Cycles scene. Returns False if none are stored."""
+    settings = load_settings(path).get(str(key))
+    if not settings or scene.render.engine != 'CYCLES':
+        return False
+    scene.cycles.samples = settings['samples']
+    scene.cycles.use_adaptive_sampling = True
+    scene.cycles.adaptive_threshold = settings['adaptive_threshold']
+    scene.cycles.use_denoising = True
+    print(f"Using tuned settings for {key}: {settings['samples']} samples, "
+          f"noise threshold {settings['adaptive_threshold']}")
+    return True
+
+
+# --- Image metrics ---
+
+def _luma(pixels):
+    return pixels[:, :, 0] * 0.2126 + pixels[:, :, 1] * 0.7152 + pixels[:, :, 2] * 0.0722
+
+
+def _gaussian_blur(x, sigma=1.5, radius=5):
+    """Separable Gaussian over the valid region (shrinks each axis by 2 * radius)."""
+    taps = np.exp(-0.5 * (np.arange(-radius, radius + 1) / sigma) ** 2)
+    taps /= taps.sum()
+    size = 2 * radius
+    rows = sum(w * x[k:x.shape[0] - size + k] for k, w in enumerate(taps))
+    return sum(w * rows[:, k:x.shape[1] - size + k] for k, w in enumerate(taps))
+
+
+def ssim(a, b):
+    """Mean SSIM of the luminance of two display-referred images in 0..1."""
+    x = _luma(a).astype(np.float64)
+    y = _luma(b).astype(np.float64)
+    c1, c2 = 0.01 ** 2, 0.03 ** 2
+    mx, my = _gaussian_blur(x), _gaussian_blur(y)
+    sxx = _gaussian_blur(x * x) - mx * mx
+    syy = _gaussian_blur(y * y) - my * my
+    sxy = _gaussian_blur(x * y) - mx * my
+    num = (2 * mx * my + c1) * (2 * sxy + c2)
+    den = (mx * mx + my * my + c1) * (sxx + syy + c2)
+    return float(np.mean(num / den))
+
+
+def psnr(a, b):
+    mse = float(np.mean((np.asarray(a)[:, :, :3] - np.asarray(b)[:, :, :3]) ** 2))
+    return float('inf') if mse == 0 else 10.0 * np.log10(1.0 / mse)
+
+
+METRICS = {'ssim': ssim, 'psnr': psnr}
+
+
+# --- Rendering ---
+
+class FrameRenderer:
+    """Renders the chosen frames at the tuning resolution, keeping results per setting."""
+
+    def __init__(self, scene, frames, percentage):
+        self.scene = scene
+        self.frames = frames
+        self.percentage = percentage
+        self.tmp = tempfile.mkdtemp(prefix="sample_tuner_")
+        self.cache = {}
+        self.full_pixels_ratio = (100.0 / percentage) ** 2
+        self.overhead = 0.0
+
+    def render(self, frame, samples, threshold, denoise=True):
+        scene = self.scene
+        scene.frame_set(frame)
+        scene.render.resolution_percentage = self.percentage
+        scene.render.image_settings.file_format = 'PNG'
+        scene.cycles.samples = samples
+        scene.cycles.use_adaptive_sampling = threshold is not None
+        if threshold is not None:
+            scene.cycles.adaptive_threshold = threshold
+        scene.cycles.use_denoising = denoise
+        scene.render.filepath = os.path.join(self.tmp, f"f{frame}_{samples}_{threshold}.png")
+        start = time.perf_counter()
+        bpy.ops.render.render(write_still=True)
+        elapsed = time.perf_counter() - start
+        return load_image_array(scene.render.filepath), elapsed
+
+    def calibrate(self):
+        """Per-frame overhead (sync, BVH, denoise setup) from a 1-sample render, after a warm-up."""
+        self.render(self.frames[0], 1, None, denoise=False)
+        self.overhead = self.render(self.frames[0], 1, None)[1]
+
+    def full_res_seconds(self, seconds):
+        """Predict a full-resolution frame time from one measured at the tuning resolution."""
+        return self.overhead + max(seconds - self.overhead, 0.0) * self.full_pixels_ratio
+
+    def evaluate(self, samples, threshold, references, metric):
+        key = (samples, threshold)
+        if key not in self.cache:
+            scores, times = [], []
+            for frame in self.frames:
+                pixels, seconds = self.render(frame, samples, threshold)
+                scores.append(METRICS[metric](pixels, references[frame]))
+                times.append(self.full_res_seconds(seconds))
+            self.cache[key] = (min(scores), float(np.mean(times)))
+            print(f"  {samples:5d} samples, threshold {threshold}: worst {metric} {min(scores):.4f}, "
+                  f"~{np.mean(times):.1f}s/frame at full resolution")
+        return self.cache[key]
+
+
+def _search(ladder, passes):
+    """Index of the first ladder entry for which passes() holds (monotone), or None."""
+    lo, hi = 0, len(ladder) - 1
+    if not passes(ladder[hi]):
+        return None
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if passes(ladder[mid]):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def tune(renderer, references, metric='ssim', target=None, budget=None, ladder=SAMPLE_LADDER, thresholds=THRESHOLDS):
+    """Search samples x threshold. With `target`: cheapest settings meeting it on the worst frame.
+    With `budget` (seconds per full-resolution frame): best worst-frame quality within it."""
+    best = None
+    for threshold in thresholds:
+        if target is not None:
+            index = _search(ladder, lambda s: renderer.evaluate(s, threshold, references, metric)[0] >= target)
+            if index is None:
+                continue
+            samples = ladder[index]
+        else:
+            # Largest sample count within budget: search the ladder from the top down
+            descending = ladder[::-1]
+            index = _search(descending, lambda s: renderer.evaluate(s, threshold, references, metric)[1] <= budget)
+            if index is None:
+                continue
+            samples = descending[index]
+        quality, seconds = renderer.evaluate(samples, threshold, references, metric)
+        if target is not None:
+            better = best is None or seconds < best['seconds_per_frame']
+        else:
+            better = best is None or quality > best['quality']
+        if better:
+            best = {'samples': samples, 'adaptive_threshold': threshold,
+                    'quality': quality, 'seconds_per_frame': seconds}
+    return best
+
+
+def representative_frames(key):
+    """Build the scene for `key` and return the frames to tune on."""
+    if key == 'vj_loop':
+        from render_estimate import stratified_frames
+        vj = load_vj_module()
+        vj.create_scene()
+        return stratified_frames(vj, angles=2)
+    from render_all_scenes import build_scene
+    build_scene(int(key))
+    return [bpy.context.scene.frame_current]
+
+
+def main():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Tune Cycles samples to a quality target or time budget")
+    parser.add_argument('scene', help="Scene number from render_all_scenes.py, or 'vj_loop'")
+    goal = parser.add_mutually_exclusive_group(required=True)
+    goal.add_argument('--ssim', type=float, help="Target worst-frame SSIM against the reference")
+    goal.add_argument('--psnr', type=float, help="Target worst-frame PSNR (dB) against the reference")
+    goal.add_argument('--budget', type=float, help="Seconds per full-resolution frame")
+    parser.add_argument('--budget-metric', choices=sorted(METRICS), default='ssim')
+    parser.add_argument('--reference-samples', type=int, default=2048)
+    parser.add_argument('--percentage', type=int, default=50, help="Resolution percentage for tuning renders")
+    args = parser.parse_args(argv)
+
+    frames = representative_frames(args.scene)
+    scene = bpy.context.scene
+    saved = (scene.render.filepath, scene.render.resolution_percentage, scene.render.image_settings.file_format)
+
+    renderer = FrameRenderer(scene, frames, args.percentage)
+    print(f"Rendering {len(frames)} reference frame(s) at {args.reference_samples} samples...")
+    references = {frame: renderer.render(frame, args.reference_samples, None)[0] for frame in frames}
+    renderer.calibrate()
+
+    if args.budget is not None:
+        metric, target = args.budget_metric, None
+    else:
+        metric = 'ssim' if args.ssim is not None else 'psnr'
+        target = args.ssim if args.ssim is not None else args.psnr
+    best = tune(renderer, references, metric, target=target, budget=args.budget)
+
+    scene.render.filepath, scene.render.resolution_percentage, scene.render.image_settings.file_format = saved
+    if best is None:
+        print("No setting on the ladder meets the goal; nothing stored.")
+        return
+    best.update({'metric': metric, 'target': target, 'budget': args.budget,
+                 'frames': frames, 'reference_samples': args.reference_samples})
+    store_settings(args.scene, best)
+    print(f"Stored for {args.scene}: {best['samples']} samples, noise threshold "
+          f"{best['adaptive_threshold']} (worst {metric} {best['quality']:.4f}, "
+          f"~{best['seconds_per_frame']:.1f}s/frame)")
+
+
+if __name__ == "__main__":
+    main()
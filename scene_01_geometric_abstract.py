@@ -3,9 +3,19 @@ Scene 1: Geometric Abstract
 Demonstrates AI assembly of a geometric abstract scene with randomized shapes and materials
 """
 
+import argparse
 import bpy
 import random
 import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from instancing import build_instancer, make_prototypes  # noqa: E402
+import layout  # noqa: E402
+from material_library import load_material  # noqa: E402
 
 def clear_scene():
     """Remove all objects from the scene"""
@@ -16,30 +26,6 @@ def clear_scene():
     for material in bpy.data.materials:
         bpy.data.materials.remove(material)
 
-def create_material(name, color, metallic=0.0, roughness=0.5, emission_strength=0.0):
-    """Create a principled BSDF material"""
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-
-    # Clear default nodes
-    nodes.clear()
-
-    # Create nodes
-    node_bsdf = nodes.new(type='ShaderNodeBsdfPrincipled')
-    node_output = nodes.new(type='ShaderNodeOutputMaterial')
-
-    # Set material properties
-    node_bsdf.inputs['Base Color'].default_value = (*color, 1.0)
-    node_bsdf.inputs['Metallic'].default_value = metallic
-    node_bsdf.inputs['Roughness'].default_value = roughness
-    node_bsdf.inputs['Emission Strength'].default_value = emission_strength
-
-    # Link nodes
-    mat.node_tree.links.new(node_bsdf.outputs['BSDF'], node_output.inputs['Surface'])
-
-    return mat
-
 def add_geometric_object(obj_type, location, scale, rotation, material):
     """Add a geometric object to the scene"""
     if obj_type == 'CUBE':
@@ -60,6 +46,50 @@ def add_geometric_object(obj_type, location, scale, rotation, material):
 
     return obj
 
+PRIMITIVES = {'CUBE': 'cube', 'SPHERE': 'uv_sphere', 'CYLINDER': 'cylinder', 'TORUS': 'torus', 'CONE': 'cone'}
+# Circumradius of each primitive at scale 1 (bpy.ops.mesh.primitive_* defaults)
+BOUNDING_RADIUS = {'cube': math.sqrt(3), 'uv_sphere': 1.0, 'cylinder': math.sqrt(2), 'torus': 1.25, 'cone': math.sqrt(2)}
+
+def add_instanced_objects(name, placements):
+    """Add (shape, location, scale, rotation, material) placements as one point-instanced object,
+    with one prototype per shape/material combination"""
+    variants = sorted({(shape, material.name) for shape, _, _, _, material in placements})
+    lookup = {variant: i for i, variant in enumerate(variants)}
+    prototypes = make_prototypes(name, [(PRIMITIVES[shape], bpy.data.materials[mat]) for shape, mat in variants])
+    return build_instancer(
+        name, prototypes,
+        locations=[p[1] for p in placements],
+        scales=[p[2] for p in placements],
+        rotations=[p[3] for p in placements],
+        proto_index=[lookup[(p[0], p[4].name)] for p in placements],
+    )
+
+def add_dense_field(count, materials, seed=42):
+    """Scatter `count` small shapes on the ground around the composition.
+    Poisson-disk spacing keeps them apart; shapes whose bounding spheres still touch
+    a neighbour's are dropped, from a slightly oversampled set, so none overlap."""
+    r_min, r_max = 5.5, 14.0
+    area = math.pi * (r_max ** 2 - r_min ** 2)
+    spacing = math.sqrt(0.5 * area / count)
+    # Sample the bounding square until it holds enough points for the annulus, plus room for rejections
+    target = int(1.15 * count * (2 * r_max) ** 2 / area * 1.05) + 1
+    points = layout.poisson_disk(spacing, ((-r_max, -r_max), (r_max, r_max)), count=target, seed=seed)
+    radius = np.hypot(points[:, 0], points[:, 1])
+    points = points[(radius > r_min) & (radius < r_max)]
+
+    rng = np.random.default_rng(seed)
+    variants = [(PRIMITIVES[shape], material) for shape in sorted(PRIMITIVES) for material in materials]
+    attrs = layout.scatter_attributes(len(points), len(variants), scale_range=(0.3 * spacing, 0.4 * spacing), seed=rng)
+    # Rest each shape roughly on the ground
+    locations = np.column_stack([points, attrs['scales'][:, 0]])
+    bounds = np.array([BOUNDING_RADIUS[primitive] for primitive, _ in variants])
+    keep = np.nonzero(layout.reject_overlaps(locations, bounds[attrs['proto_index']] * attrs['scales'][:, 0]))[0][:count]
+    locations = locations[keep]
+    attrs = {key: value[keep] for key, value in attrs.items()}
+    prototypes = make_prototypes("Field", variants)
+    print(f"Dense field: {len(locations)} shapes")
+    return build_instancer("Field", prototypes, locations, **attrs)
+
 def setup_lighting():
     """Setup three-point lighting"""
     # Key light
@@ -92,20 +122,16 @@ def setup_camera():
     bpy.context.scene.camera = camera
     return camera
 
-def create_scene():
-    """Main scene assembly function"""
+def create_scene(dense=0):
+    """Main scene assembly function (dense > 0 adds that many instanced shapes around it)"""
     print("Assembling Geometric Abstract Scene...")
 
     clear_scene()
 
-    # Create vibrant materials
+    # Vibrant materials from the shared library
     materials = [
-        create_material("Red_Glossy", (0.8, 0.1, 0.1), metallic=0.8, roughness=0.2),
-        create_material("Blue_Matte", (0.1, 0.3, 0.9), metallic=0.0, roughness=0.8),
-        create_material("Gold", (1.0, 0.766, 0.336), metallic=1.0, roughness=0.3),
-        create_material("Cyan_Emit", (0.0, 0.8, 0.8), metallic=0.0, roughness=0.5, emission_strength=2.0),
-        create_material("Purple", (0.6, 0.1, 0.8), metallic=0.5, roughness=0.4),
-        create_material("Orange", (1.0, 0.5, 0.0), metallic=0.0, roughness=0.3),
+        load_material(key)
+        for key in ("Red_Glossy", "Blue_Matte", "Gold", "Cyan_Emit", "Purple", "Orange")
     ]
 
     # Shape types
@@ -118,6 +144,7 @@ def create_scene():
     add_geometric_object('SPHERE', (0, 0, 1), (1.5, 1.5, 1.5), (0, 0, 0), materials[0])
 
     # Surrounding objects in a circular pattern
+    placements = []
     num_objects = 8
     radius = 4
     for i in range(num_objects):
@@ -131,7 +158,7 @@ def create_scene():
         rotation = (random.uniform(0, math.pi), random.uniform(0, math.pi), random.uniform(0, math.pi))
         material = random.choice(materials)
 
-        add_geometric_object(shape, (x, y, z), (scale_factor, scale_factor, scale_factor), rotation, material)
+        placements.append((shape, (x, y, z), (scale_factor, scale_factor, scale_factor), rotation, material))
 
     # Add some floating elements
     for i in range(5):
@@ -144,14 +171,17 @@ def create_scene():
         rotation = (random.uniform(0, math.pi), random.uniform(0, math.pi), random.uniform(0, math.pi))
         material = random.choice(materials)
 
-        add_geometric_object(shape, (x, y, z), (scale_factor, scale_factor, scale_factor), rotation, material)
+        placements.append((shape, (x, y, z), (scale_factor, scale_factor, scale_factor), rotation, material))
+
+    add_instanced_objects("Shapes", placements)
+    if dense:
+        add_dense_field(dense, materials)
 
     # Add a ground plane
     bpy.ops.mesh.primitive_plane_add(location=(0, 0, 0))
     plane = bpy.context.active_object
     plane.scale = (15, 15, 1)
-    ground_mat = create_material("Ground", (0.2, 0.2, 0.25), metallic=0.9, roughness=0.1)
-    plane.data.materials.append(ground_mat)
+    plane.data.materials.append(load_material("Ground"))
 
     # Setup lighting and camera
     setup_lighting()
@@ -174,4 +204,8 @@ def create_scene():
     print("Scene assembly complete!")
 
 if __name__ == "__main__":
-    create_scene()
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description="Geometric abstract scene")
+    parser.add_argument('--dense', type=int, default=0, help="Add N instanced shapes around the composition")
+    args, _ = parser.parse_known_args(argv)
+    create_scene(dense=args.dense)
@@ -0,0 +1,117 @@
+"""
+Scene 3: VJ Loop (120 BPM) as a declarative spec
+The single description of the VJ loop: scene_03_vj_loop.create_scene() applies
+this spec (then keys detail levels and saves), and scene_spec.py applies it
+incrementally. Edit a value and save while
+`scene_spec.py -- scene_03_vj_loop_spec.py --watch` is running to see only that
+datablock update.
+"""
+
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from scene_03_vj_loop import (  # noqa: E402
+    BARS, BEATS_PER_BAR, FPS, FRAME_END, FRAME_START, FRAMES_PER_BEAT, GLOW_MIX, GLOW_SIZE, GLOW_THRESHOLD,
+    TOTAL_BEATS, beat_frame, is_downbeat,
+)
+
+
+def pulse_keys(base, peak, decay=0.4, downbeat_peak=None):
+    """Quarter-note pulse keyframes: `peak` on each beat (`downbeat_peak` on downbeats), back to `base` after `decay` of a beat."""
+    decay_frames = max(1, int(FRAMES_PER_BEAT * decay))
+    keys = []
+    for b in range(TOTAL_BEATS + 1):
+        f = beat_frame(b)
+        keys.append((f, downbeat_peak if downbeat_peak is not None and is_downbeat(b) else peak))
+        keys.append((min(f + decay_frames, FRAME_END), base))
+    return keys
+
+
+def vector_keys(keys):
+    """Expand scalar pulse keys to uniform XYZ keys (for scale)."""
+    return [(f, (v, v, v)) for f, v in keys]
+
+
+def build_spec():
+    marble_flow = [{'node': 'Mapping', 'input': 'Rotation', 'index': 2,
+                    'keys': [(FRAME_START, 0.0), (FRAME_END, math.radians(360 * BARS))]}]
+
+    materials = {
+        'Marble': {'key': 'Marble', 'keys': marble_flow},
+        'GroundMarble': {'key': 'Marble', 'keys': marble_flow},
+        'Lava': {'key': 'Lava', 'keys': [
+            {'node': 'Mapping', 'input': 'Location', 'index': 2,
+             'keys': [(FRAME_START, 0.0), (FRAME_END, 5.0)]},
+            {'node': 'Principled BSDF', 'input': 'Emission Strength',
+             'keys': pulse_keys(base=2.0, peak=4.0, decay=0.3, downbeat_peak=6.0)},
+        ]},
+        'Crystal': {'key': 'Crystal'},
+        'RustyMetal': {'key': 'RustyMetal'},
+    }
+
+    objects = {
+        'Column': {'primitive': 'cylinder', 'location': (0, 0, 2), 'scale': (0.8, 0.8, 2), 'material': 'Marble'},
+        'LavaSphere': {
+            'primitive': 'ico_sphere', 'primitive_args': {'subdivisions': 4},
+            'location': (-3, -2, 1.2), 'scale': (1.2, 1.2, 1.2), 'material': 'Lava',
+            'keys': [{'data_path': 'scale', 'keys': vector_keys(pulse_keys(base=1.0, peak=1.35, decay=0.35))}],
+        },
+        'Ground': {'primitive': 'plane', 'location': (0, 0, 0), 'scale': (8, 8, 1), 'material': 'GroundMarble'},
+    }
+
+    # Crystal formation and rusty metal cubes: one point-instanced object spinning
+    # across the loop in Geometry Nodes, with per-instance detail levels
+    props = []
+    for i in range(5):
+        scale = 0.3 + (i * 0.15)
+        props.append({'variant': 0, 'location': (3 + (i * 0.4) - 0.8, -2 + (i % 2) * 0.3, 0.5 + (i * 0.4)),
+                      'rotation': (0, 0, i * 0.5), 'scale': (scale, scale, scale * 2),
+                      'spin': (0, 0, math.radians(360))})
+    for i in range(3):
+        props.append({'variant': 1, 'location': (-2 + (i * 2), 2.5, 0.6),
+                      'rotation': (math.radians(45), 0, math.radians(45 * i)), 'scale': (0.6, 0.6, 0.6),
+                      'spin': (math.radians(360), math.radians(180), math.radians(360))})
+    instancers = {'Props': {'variants': [('cone', 'Crystal'), ('cube', 'RustyMetal')], 'lod': True,
+                            'frame_range': (FRAME_START, FRAME_END), 'instances': props}}
+
+    # Three-point lighting, fill pulses on the beat
+    objects['KeyLight'] = {'light': 'SUN', 'location': (5, -5, 10),
+                           'rotation': (math.radians(45), 0, math.radians(45)), 'data': {'energy': 2.8}}
+    objects['FillLight'] = {'light': 'AREA', 'location': (-4, -3, 6), 'data': {'energy': 180, 'size': 4},
+                            'data_keys': [{'data_path': 'energy', 'keys': pulse_keys(base=120.0, peak=240.0, decay=0.35)}]}
+    objects['RimLight'] = {'light': 'AREA', 'location': (2, 5, 4), 'data': {'energy': 140, 'size': 3}}
+
+    # Camera orbit: full 360 over the loop, tracking the scene centre
+    radius = 8.5
+    height = 4
+    orbit = []
+    for bar in range(BARS + 1):
+        angle = (bar / BARS) * 2 * math.pi
+        orbit.append((beat_frame(bar * BEATS_PER_BAR), (radius * math.cos(angle), radius * math.sin(angle), height)))
+    objects['CameraTarget'] = {'empty': 'PLAIN_AXES', 'location': (0, 0, 1.5)}
+    objects['Camera'] = {'camera': True, 'location': (6, -6, 4), 'rotation': (math.radians(70), 0, math.radians(45)),
+                         'track': 'CameraTarget', 'keys': [{'data_path': 'location', 'keys': orbit}]}
+
+    world_pulse = []
+    decay_frames = int(FRAMES_PER_BEAT * 0.4)
+    for b in range(TOTAL_BEATS + 1):
+        f = beat_frame(b)
+        world_pulse.append((f, 0.45 if is_downbeat(b) else 0.3))
+        world_pulse.append((min(f + decay_frames, FRAME_END), 0.25))
+
+    return {
+        'render': {'engine': 'CYCLES', 'samples': 64, 'denoise': True, 'resolution': (1920, 1080), 'fps': FPS,
+                   'frame_range': (FRAME_START, FRAME_END)},
+        'world': {'color': (0.04, 0.04, 0.09, 1.0), 'strength': 0.25,
+                  'keys': [{'node': 'Background', 'input': 'Strength', 'keys': world_pulse}]},
+        # Gentle bloom for emissive hits (post_bloom.py reproduces it on HDR frames)
+        'compositor': {'glare': {'glare_type': 'FOG_GLOW', 'quality': 'HIGH', 'size': GLOW_SIZE, 'mix': GLOW_MIX,
+                                 'threshold': GLOW_THRESHOLD}},
+        'materials': materials,
+        'objects': objects,
+        'instancers': instancers,
+        'camera': 'Camera',
+        'interpolation': 'LINEAR',
+    }
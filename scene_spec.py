@@ -0,0 +1,527 @@
+"""
+Declarative Scene Specs
+Describes a scene (render settings, world, materials, objects, lights, camera and
+keyframes) as plain data and applies it incrementally: every datablock the spec
+creates is tagged with hashes of its spec sections, so re-applying only touches
+the sections that changed. In a warm Blender session with --watch, saving the
+spec file re-applies it in a fraction of a second instead of a full rebuild.
+
+Spec layout (all sections optional):
+  render:     engine, samples, denoise, resolution, fps, frame_range
+  world:      color, strength, keys (Background input keyframes)
+  compositor: glare: {glare_type, quality, size, mix, threshold} (Render Layers -> Glare -> Composite)
+  materials:  name -> {key: material_library key, keys: node input keyframes}
+  objects:    name -> {primitive | light | camera | empty, transform, material,
+                       data (light/camera settings), track, keys, data_keys}
+  instancers: name -> {variants: [(primitive, material), ...], lod, frame_range,
+                       instances: [{variant, location, rotation, scale, spin}, ...]}
+              (instancing.py point instancing; lod builds lod.py prototype levels,
+              whose per-frame keys lod.apply_lod adds after the spec is applied)
+  camera:     name of the active camera object
+  interpolation: keyframe interpolation applied to rebuilt animation
+
+Keyframe lists are dicts like
+  {'data_path': 'scale', 'keys': [(frame, value), ...]}            (objects, light data)
+  {'node': 'Mapping', 'input': 'Rotation', 'index': 2, 'keys': [...]}  (materials, world)
+
+Usage:
+  /Applications/Blender.app/Contents/MacOS/Blender --python scene_spec.py -- scene_03_vj_loop_spec.py [--watch]
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+
+import bmesh
+import bpy
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from material_library import load_material  # noqa: E402
+from script_env import SCRIPT_DIR  # noqa: E402
+
+TAG = "spec"
+
+# Source mtimes of repo modules as of the last load_spec
+_module_mtimes = {}
+
+# Sections of an object spec that are diffed independently
+OBJECT_SECTIONS = {
+    'kind': ('primitive', 'primitive_args', 'light', 'camera', 'empty'),
+    'transform': ('location', 'rotation', 'scale'),
+    'material': ('material',),
+    'data': ('data',),
+    'track': ('track',),
+    'keys': ('keys',),
+    'data_keys': ('data_keys',),
+}
+
+
+def spec_hash(value):
+    """Stable short hash of a JSON-serialisable spec fragment."""
+    payload = json.dumps(value, sort_keys=True, default=list)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def section_hashes(entry, sections):
+    return {
+        section: spec_hash({key: entry.get(key) for key in keys})
+        for section, keys in sections.items()
+    }
+
+
+def _read_tag(id_block):
+    raw = id_block.get(TAG)
+    return json.loads(raw) if raw else None
+
+
+def _write_tag(id_block, hashes):
+    id_block[TAG] = json.dumps(hashes, sort_keys=True)
+
+
+# --- Datablock construction ---
+
+def primitive_mesh(name, kind, **args):
+    """Build primitive mesh data with bmesh, matching the bpy.ops.mesh.primitive_* defaults."""
+    if kind == 'torus':
+        # No bmesh operator for tori; borrow the operator's mesh
+        bpy.ops.mesh.primitive_torus_add(**args)
+        temp = bpy.context.active_object
+        mesh = temp.data
+        bpy.data.objects.remove(temp)
+        mesh.name = name
+        return mesh
+
+    bm = bmesh.new()
+    bm.loops.layers.uv.new("UVMap")
+    if kind == 'cube':
+        bmesh.ops.create_cube(bm, size=args.get('size', 2.0), calc_uvs=True)
+    elif kind == 'plane':
+        bmesh.ops.create_grid(bm, x_segments=1, y_segments=1, size=args.get('size', 2.0) / 2.0, calc_uvs=True)
+    elif kind == 'uv_sphere':
+        bmesh.ops.create_uvsphere(bm, u_segments=args.get('segments', 32), v_segments=args.get('ring_count', 16),
+                                  radius=args.get('radius', 1.0), calc_uvs=True)
+    elif kind == 'ico_sphere':
+        bmesh.ops.create_icosphere(bm, subdivisions=args.get('subdivisions', 2), radius=args.get('radius', 1.0),
+                                   calc_uvs=True)
+    elif kind in {'cylinder', 'cone'}:
+        radius1 = args.get('radius', args.get('radius1', 1.0))
+        radius2 = radius1 if kind == 'cylinder' else args.get('radius2', 0.0)
+        bmesh.ops.create_cone(bm, cap_ends=True, segments=args.get('vertices', 32), radius1=radius1,
+                              radius2=radius2, depth=args.get('depth', 2.0), calc_uvs=True)
+    else:
+        bm.free()
+        raise ValueError(f"Unknown primitive: {kind}")
+
+    mesh = bpy.data.meshes.new(name)
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
+
+
+def _new_object(name, entry, collection):
+    if 'primitive' in entry:
+        data = primitive_mesh(name, entry['primitive'], **entry.get('primitive_args', {}))
+    elif 'light' in entry:
+        data = bpy.data.lights.new(name, entry['light'])
+    elif 'camera' in entry:
+        data = bpy.data.cameras.new(name)
+    else:
+        data = None
+    obj = bpy.data.objects.new(name, data)
+    if data is None:
+        obj.empty_display_type = entry.get('empty', 'PLAIN_AXES')
+    collection.objects.link(obj)
+    return obj
+
+
+def _remove_object(obj):
+    data = obj.data
+    bpy.data.objects.remove(obj)
+    if data is None or data.users:
+        return
+    if isinstance(data, bpy.types.Mesh):
+        bpy.data.meshes.remove(data)
+    elif isinstance(data, bpy.types.Light):
+        bpy.data.lights.remove(data)
+    elif isinstance(data, bpy.types.Camera):
+        bpy.data.cameras.remove(data)
+
+
+def _set_value(owner, attr, value):
+    if hasattr(value, '__len__') and not isinstance(value, str):
+        setattr(owner, attr, tuple(value))
+    else:
+        setattr(owner, attr, value)
+
+
+def _insert_keys(owner, keyframes):
+    """Insert keyframes on an ID or struct (objects, light data)."""
+    for track in keyframes:
+        path = track['data_path']
+        index = track.get('index', -1)
+        for frame, value in track['keys']:
+            if index >= 0:
+                getattr(owner, path)[index] = value
+            else:
+                _set_value(owner, path, value)
+            owner.keyframe_insert(data_path=path, frame=frame, index=index)
+
+
+def _insert_node_keys(node_tree, keyframes):
+    """Insert keyframes on node input default values."""
+    for track in keyframes:
+        socket = node_tree.nodes[track['node']].inputs[track['input']]
+        index = track.get('index', -1)
+        for frame, value in track['keys']:
+            if index >= 0:
+                socket.default_value[index] = value
+            else:
+                socket.default_value = value
+            socket.keyframe_insert(data_path="default_value", frame=frame, index=index)
+
+
+def _set_interpolation(anim_owner, interpolation):
+    anim = anim_owner.animation_data
+    if interpolation and anim and anim.action:
+        for fcurve in anim.action.fcurves:
+            for kp in fcurve.keyframe_points:
+                kp.interpolation = interpolation
+
+
+# --- Section appliers ---
+
+def _apply_transform(obj, entry):
+    obj.location = entry.get('location', (0, 0, 0))
+    obj.rotation_euler = entry.get('rotation', (0, 0, 0))
+    obj.scale = entry.get('scale', (1, 1, 1))
+
+
+def _apply_material(obj, entry):
+    if obj.type != 'MESH':
+        return
+    obj.data.materials.clear()
+    if entry.get('material'):
+        obj.data.materials.append(bpy.data.materials[entry['material']])
+
+
+def _apply_data(obj, entry):
+    for attr, value in entry.get('data', {}).items():
+        _set_value(obj.data, attr, value)
+
+
+def _apply_track(obj, entry):
+    for constraint in [c for c in obj.constraints if c.type == 'TRACK_TO']:
+        obj.constraints.remove(constraint)
+    target = entry.get('track')
+    if target:
+        constraint = obj.constraints.new(type='TRACK_TO')
+        constraint.target = bpy.data.objects[target]
+        constraint.track_axis = 'TRACK_NEGATIVE_Z'
+        constraint.up_axis = 'UP_Y'
+
+
+def _apply_keys(obj, entry, interpolation):
+    obj.animation_data_clear()
+    _apply_transform(obj, entry)
+    _insert_keys(obj, entry.get('keys', []))
+    _set_interpolation(obj, interpolation)
+
+
+def _apply_data_keys(obj, entry, interpolation):
+    if obj.data is None:
+        return
+    obj.data.animation_data_clear()
+    _apply_data(obj, entry)
+    _insert_keys(obj.data, entry.get('data_keys', []))
+    _set_interpolation(obj.data, interpolation)
+
+
+# --- Top-level apply ---
+
+def apply_render(scene, render):
+    changed = []
+    settings = {
+        'engine': (scene.render, 'engine'),
+        'fps': (scene.render, 'fps'),
+    }
+    for key, (owner, attr) in settings.items():
+        if key in render and getattr(owner, attr) != render[key]:
+            setattr(owner, attr, render[key])
+            changed.append(key)
+    if 'samples' in render and scene.cycles.samples != render['samples']:
+        scene.cycles.samples = render['samples']
+        changed.append('samples')
+    if 'resolution' in render and (scene.render.resolution_x, scene.render.resolution_y) != tuple(render['resolution']):
+        scene.render.resolution_x, scene.render.resolution_y = render['resolution']
+        changed.append('resolution')
+    if 'frame_range' in render and (scene.frame_start, scene.frame_end) != tuple(render['frame_range']):
+        scene.frame_start, scene.frame_end = render['frame_range']
+        changed.append('frame_range')
+    if 'denoise' in render and any(layer.cycles.use_denoising != render['denoise'] for layer in scene.view_layers):
+        for layer in scene.view_layers:
+            layer.cycles.use_denoising = render['denoise']
+        changed.append('denoise')
+    return changed
+
+
+def _set_node_setting(node, attr, label, value):
+    """Set a node option that newer Blenders expose as an input socket instead of a property."""
+    if hasattr(node, attr):
+        setattr(node, attr, value)
+    elif label in node.inputs:
+        node.inputs[label].default_value = value
+    else:
+        print(f"{node.name}: no setting {attr!r} in Blender {bpy.app.version_string}")
+
+
+def apply_compositor(scene, compositor_spec):
+    """Rebuild the compositor as Render Layers -> Glare -> Composite when its spec changed."""
+    scene.use_nodes = True
+    scene.render.use_compositing = True
+    tree = scene.node_tree
+    digest = spec_hash(compositor_spec)
+    if _read_tag(tree) == {'compositor': digest}:
+        return False
+    tree.nodes.clear()
+    layers = tree.nodes.new(type='CompositorNodeRLayers')
+    composite = tree.nodes.new(type='CompositorNodeComposite')
+    image = layers.outputs['Image']
+    glare_spec = compositor_spec.get('glare')
+    if glare_spec:
+        glare = tree.nodes.new(type='CompositorNodeGlare')
+        labels = {'glare_type': 'Type', 'quality': 'Quality', 'size': 'Size', 'mix': 'Mix', 'threshold': 'Threshold'}
+        for attr, value in glare_spec.items():
+            _set_node_setting(glare, attr, labels.get(attr, attr), value)
+        tree.links.new(image, glare.inputs['Image'])
+        image = glare.outputs['Image']
+    tree.links.new(image, composite.inputs['Image'])
+    _write_tag(tree, {'compositor': digest})
+    return True
+
+
+def apply_world(scene, world_spec, interpolation):
+    world = scene.world or bpy.data.worlds.new("World")
+    scene.world = world
+    digest = spec_hash(world_spec)
+    if _read_tag(world) == {'world': digest}:
+        return False
+    world.use_nodes = True
+    bg = world.node_tree.nodes['Background']
+    world.node_tree.animation_data_clear()
+    bg.inputs['Color'].default_value = tuple(world_spec.get('color', (0.05, 0.05, 0.05, 1.0)))
+    bg.inputs['Strength'].default_value = world_spec.get('strength', 1.0)
+    _insert_node_keys(world.node_tree, world_spec.get('keys', []))
+    _set_interpolation(world.node_tree, interpolation)
+    _write_tag(world, {'world': digest})
+    return True
+
+
+def apply_materials(materials, interpolation):
+    changed = []
+    for name, entry in materials.items():
+        digest = {'material': spec_hash(entry)}
+        existing = bpy.data.materials.get(name)
+        if existing is not None and _read_tag(existing) == digest:
+            continue
+        mat = load_material(entry['key'], name)
+        _insert_node_keys(mat.node_tree, entry.get('keys', []))
+        _set_interpolation(mat.node_tree, interpolation)
+        _write_tag(mat, digest)
+        if existing is not None:
+            # Re-point every object slot at the new material before dropping the old one
+            existing.user_remap(mat)
+            bpy.data.materials.remove(existing)
+        mat.name = name
+        changed.append(name)
+    return changed
+
+
+def _remove_instancer(obj):
+    """Remove an instancer object with its node group and prototype collection."""
+    modifier = obj.modifiers.get("Instancing")
+    group = modifier.node_group if modifier else None
+    prototypes = bpy.data.collections.get(f"{obj.name}_Prototypes")
+    _remove_object(obj)
+    if group is not None:
+        bpy.data.node_groups.remove(group)
+    if prototypes is not None:
+        for proto in list(prototypes.objects):
+            _remove_object(proto)
+        bpy.data.collections.remove(prototypes)
+
+
+def apply_instancers(scene, instancers, materials):
+    """Rebuild every instancer whose spec (or one of its variant materials' spec) changed."""
+    from instancing import build_instancer, make_prototypes
+    from lod import LEVELS, make_lod_prototypes
+
+    changed = []
+    for name, entry in instancers.items():
+        digest = {'instancer': spec_hash({'entry': entry,
+                                          'materials': [materials.get(m) for _, m in entry['variants']]})}
+        obj = bpy.data.objects.get(name)
+        if obj is not None and _read_tag(obj) == digest:
+            continue
+        if obj is not None:
+            _remove_instancer(obj)
+        variants = [(primitive, bpy.data.materials[material]) for primitive, material in entry['variants']]
+        lod = entry.get('lod', False)
+        prototypes = make_lod_prototypes(name, variants) if lod else make_prototypes(name, variants)
+        instances = entry['instances']
+        animation = {'lod_levels': LEVELS} if lod else {}
+        if entry.get('frame_range'):
+            animation['frame_range'] = tuple(entry['frame_range'])
+        obj = build_instancer(
+            name, prototypes,
+            locations=[i['location'] for i in instances],
+            rotations=[i.get('rotation', (0, 0, 0)) for i in instances],
+            scales=[i.get('scale', (1, 1, 1)) for i in instances],
+            proto_index=[i.get('variant', 0) for i in instances],
+            spin=[i.get('spin', (0, 0, 0)) for i in instances],
+            collection=scene.collection, **animation)
+        _write_tag(obj, digest)
+        changed.append(name)
+    return changed
+
+
+def apply_objects(scene, objects, interpolation, prune_untagged, keep=()):
+    """Create, update and prune spec objects; names in `keep` are managed elsewhere (instancers)."""
+    stats = {'created': [], 'updated': [], 'removed': []}
+    collection = scene.collection
+
+    for obj in list(scene.objects):
+        tagged = _read_tag(obj) is not None
+        if obj.name not in objects and obj.name not in keep and (tagged or prune_untagged):
+            stats['removed'].append(obj.name)
+            (_remove_instancer if "Instancing" in obj.modifiers else _remove_object)(obj)
+
+    # Empties first and trackers last, so track constraints can find their targets
+    order = sorted(objects.items(), key=lambda item: ('empty' not in item[1], bool(item[1].get('track'))))
+    recreated = set()
+    for name, entry in order:
+        hashes = section_hashes(entry, OBJECT_SECTIONS)
+        obj = bpy.data.objects.get(name)
+        old = _read_tag(obj) if obj is not None else None
+        if obj is not None and (old is None or old.get('kind') != hashes['kind']):
+            _remove_object(obj)
+            obj = None
+        if obj is None:
+            obj = _new_object(name, entry, collection)
+            old = {}
+            stats['created'].append(name)
+            recreated.add(name)
+        dirty = [section for section in OBJECT_SECTIONS if old.get(section) != hashes[section]]
+        if entry.get('track') in recreated and 'track' not in dirty:
+            # The target was replaced this pass; the old constraint points at the deleted object
+            dirty.append('track')
+        if not dirty:
+            continue
+
+        if 'transform' in dirty or 'keys' in dirty:
+            _apply_keys(obj, entry, interpolation)
+        if 'material' in dirty:
+            _apply_material(obj, entry)
+        if 'data' in dirty or 'data_keys' in dirty:
+            _apply_data_keys(obj, entry, interpolation)
+        if 'track' in dirty:
+            _apply_track(obj, entry)
+        _write_tag(obj, hashes)
+        if name not in stats['created']:
+            stats['updated'].append(f"{name} ({', '.join(dirty)})")
+    return stats
+
+
+def apply_spec(spec, scene=None, prune_untagged=True):
+    """Bring the scene in line with a spec, touching only the sections that changed.
+    - prune_untagged: also remove objects the spec did not create (e.g. the startup cube)
+    Returns a dict describing what changed.
+    """
+    scene = scene or bpy.context.scene
+    interpolation = spec.get('interpolation')
+    stats = {'render': apply_render(scene, spec.get('render', {}))}
+    stats['world'] = apply_world(scene, spec['world'], interpolation) if 'world' in spec else False
+    stats['compositor'] = apply_compositor(scene, spec['compositor']) if 'compositor' in spec else False
+    stats['materials'] = apply_materials(spec.get('materials', {}), interpolation)
+    instancers = spec.get('instancers', {})
+    stats.update(apply_objects(scene, spec.get('objects', {}), interpolation, prune_untagged, keep=instancers))
+    stats['instancers'] = apply_instancers(scene, instancers, spec.get('materials', {}))
+    if spec.get('camera'):
+        scene.camera = bpy.data.objects[spec['camera']]
+    return stats
+
+
+def _repo_modules():
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None) or ""
+        if path and name not in (__name__, '__main__') and os.path.dirname(os.path.abspath(path)) == SCRIPT_DIR:
+            yield name, path
+
+
+def load_spec(path):
+    """Execute a spec file and return its build_spec() result.
+    Repo modules edited since the last load (e.g. the VJ loop's timing constants) are
+    dropped from the import cache first, so the spec never mixes fresh and stale code.
+    """
+    for name, module_path in _repo_modules():
+        if name in _module_mtimes and os.path.getmtime(module_path) != _module_mtimes[name]:
+            del sys.modules[name]
+    module_name = f"scene_spec_{abs(hash(path))}"
+    spec_module = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec_module)
+    spec_module.loader.exec_module(module)
+    for name, module_path in _repo_modules():
+        _module_mtimes[name] = os.path.getmtime(module_path)
+    return module.build_spec()
+
+
+def apply_spec_file(path):
+    """Load and apply a spec file, printing a one-line summary."""
+    start = time.perf_counter()
+    stats = apply_spec(load_spec(path))
+    elapsed = time.perf_counter() - start
+    parts = [f"{key}: {', '.join(value)}" for key, value in stats.items()
+             if isinstance(value, list) and value]
+    parts += [key for key in ('world', 'compositor') if stats[key]]
+    print(f"Applied {os.path.basename(path)} in {elapsed * 1000:.0f} ms"
+          + (f" ({'; '.join(parts)})" if parts else " (no changes)"))
+    return stats
+
+
+def watch(path, interval=0.5):
+    """Re-apply the spec whenever the file changes (keeps running in a warm session)."""
+    state = {'mtime': None}
+
+    def poll():
+        try:
+            mtime = os.path.getmtime(path)
+            if mtime != state['mtime']:
+                state['mtime'] = mtime
+                apply_spec_file(path)
+        except Exception as exc:
+            print(f"Spec error: {exc}")
+        return interval
+
+    bpy.app.timers.register(poll, first_interval=0.0, persistent=True)
+    print(f"Watching {path} for changes")
+
+
+def main():
+    argv = sys.argv
+    argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    parser = argparse.ArgumentParser(prog="scene_spec.py")
+    parser.add_argument("spec", nargs="?", default=os.path.join(SCRIPT_DIR, "scene_03_vj_loop_spec.py"))
+    parser.add_argument("--watch", action="store_true", help="re-apply on every save (interactive sessions)")
+    args = parser.parse_args(argv)
+    if args.watch:
+        watch(os.path.abspath(args.spec))
+    else:
+        apply_spec_file(os.path.abspath(args.spec))
+
+
+if __name__ == "__main__":
+    main()
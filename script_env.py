@@ -0,0 +1,25 @@
+"""
+Script Environment
+Shared setup for the scripts Blender runs directly. Blender does not put a
+script's folder on sys.path, so an entry script adds it with one line and then
+imports the rest from here.
+
+Usage:
+  sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+  from script_env import SCRIPT_DIR, load_vj_module  # noqa: E402
+"""
+
+import importlib.util
+import os
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_vj_module():
+    """Load scene_03_vj_loop.py as a fresh module (timing constants, create_scene, render helpers)."""
+    vj_path = os.path.join(SCRIPT_DIR, "scene_03_vj_loop.py")
+    spec = importlib.util.spec_from_file_location("scene_03_vj_loop", vj_path)
+    vj = importlib.util.module_from_spec(spec)
+    assert spec and spec.loader
+    spec.loader.exec_module(vj)
+    return vj